@@ -0,0 +1,257 @@
+"""Core benchmark suite: MarkerManager, SequenceLooper, EventBus,
+LoopSettingsStore and normalize_url. Runs without a display or libmpv:
+
+    python -m benchmarks.bench_core [--quick] [--json out.json]
+                                    [--compare baseline.json [--tolerance 0.25]]
+
+Every result is a (name, params) case with a value in `unit`; lower is
+better. --json writes them with run metadata; --compare matches cases
+against an earlier --json file and exits with status 1 if any is more
+than `tolerance` slower.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from src.core.events import EventBus
+from src.core.loop_settings_store import LoopSettingsStore, normalize_url
+from src.core.marker_manager import MarkerManager
+
+from .bench_looper import bench_position_events, build_looper
+
+MARKER_COUNTS = (10, 1_000, 10_000)
+STORE_URLS = 5_000
+
+
+class Suite:
+    def __init__(self, quick: bool = False):
+        self.quick = quick
+        self.results: list[dict] = []
+
+    def add(self, name: str, value: float, unit: str, **params) -> None:
+        self.results.append({"name": name, "params": params, "value": value, "unit": unit})
+
+    def time_op(self, name: str, op, number: int, repeat: int = 5, **params) -> None:
+        """Median over `repeat` runs of `number` calls, in ns per call."""
+        if self.quick:
+            number = max(1, number // 10)
+            repeat = 3
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            runs.append((time.perf_counter() - start) / number * 1e9)
+        self.add(name, statistics.median(runs), "ns/op", **params)
+
+
+def _marker_manager(n: int) -> MarkerManager:
+    markers = MarkerManager(EventBus())
+    rng = random.Random(n)
+    with markers.batch():
+        for _ in range(n):
+            markers.add_marker(rng.uniform(0, 36_000))
+    return markers
+
+
+def bench_markers(suite: Suite) -> None:
+    for n in MARKER_COUNTS:
+        start = time.perf_counter()
+        markers = _marker_manager(n)
+        suite.add("markers.build_batch", (time.perf_counter() - start) * 1e9 / n,
+                  "ns/op", markers=n)
+        rng = random.Random(0)
+        ids = [m.id for m in markers.get_markers()]
+        positions = [rng.uniform(0, 36_000) for _ in range(1024)]
+        it = iter(range(1 << 62))
+
+        def move():
+            i = next(it)
+            markers.update_position(ids[i % len(ids)], positions[i % 1024])
+
+        def add_remove():
+            markers.remove_marker(markers.add_marker(positions[next(it) % 1024]).id)
+
+        suite.time_op("markers.update_position", move, 2_000, markers=n)
+        suite.time_op("markers.add_remove", add_remove, 1_000, markers=n)
+        suite.time_op("markers.nearest",
+                      lambda: markers.nearest(positions[next(it) % 1024]), 10_000, markers=n)
+        suite.time_op("markers.between_60s",
+                      lambda: markers.markers_between(positions[next(it) % 1024],
+                                                      positions[next(it) % 1024] + 60),
+                      10_000, markers=n)
+        suite.time_op("markers.get_markers", markers.get_markers, 10_000, markers=n)
+        suite.time_op("markers.to_dict", markers.to_dict, max(1, 100_000 // n), markers=n)
+
+
+def bench_looper(suite: Suite) -> None:
+    result = bench_position_events(20_000 if suite.quick else 200_000)
+    suite.add("looper.position_event", result["ns_per_event"], "ns/op", segments=50)
+
+    # Boundary decision: position event past the trigger -> seek issued
+    looper = build_looper()
+    issued = threading.Event()
+    looper.set_seek_callback(lambda _pos: issued.set())
+    looper.wait_for_seeks(1.0)
+    latencies = []
+    for _ in range(50 if suite.quick else 500):
+        trigger = looper._trigger
+        issued.clear()
+        start = time.perf_counter()
+        looper._on_position_changed(trigger + 0.001)
+        issued.wait(1.0)
+        latencies.append((time.perf_counter() - start) * 1e9)
+        looper.wait_for_seeks(1.0)
+    looper.shutdown()
+    latencies.sort()
+    suite.add("looper.boundary_to_seek.p50", latencies[len(latencies) // 2], "ns",
+              segments=50)
+    suite.add("looper.boundary_to_seek.p99", latencies[int(len(latencies) * 0.99)], "ns",
+              segments=50)
+
+
+def bench_event_bus(suite: Suite) -> None:
+    for handlers in (0, 1, 10, 100):
+        bus = EventBus()
+        for _ in range(handlers):
+            bus.on("position_changed", lambda _pos: None)
+        suite.time_op("event_bus.emit", lambda: bus.emit("position_changed", 1.0),
+                      max(1_000, 200_000 // max(handlers, 1)), handlers=handlers)
+    bus = EventBus()
+    bus.enable_stats()
+    for _ in range(10):
+        bus.on("position_changed", lambda _pos: None)
+    suite.time_op("event_bus.emit_with_stats", lambda: bus.emit("position_changed", 1.0),
+                  20_000, handlers=10)
+
+
+def _entry(rng: random.Random, n_markers: int = 12) -> dict:
+    ids = [f"{rng.getrandbits(48):012x}" for _ in range(n_markers)]
+    return {
+        "markers": [{"id": mid, "label": chr(65 + i), "position": rng.uniform(0, 600),
+                     "color": "#FF6B6B", "memo": ""} for i, mid in enumerate(ids)],
+        "segments": [{"start_marker_id": a, "end_marker_id": b, "display_name": ""}
+                     for a, b in zip(ids, ids[1:])],
+        "loop_mode": "loop_sequence",
+    }
+
+
+def bench_store(suite: Suite) -> None:
+    n = STORE_URLS // 10 if suite.quick else STORE_URLS
+    rng = random.Random(1)
+    legacy = {f"https://www.youtube.com/watch?v={i:011d}": _entry(rng) for i in range(n)}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "loop_settings.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+        start = time.perf_counter()
+        store = LoopSettingsStore(os.path.join(tmp, "loop_settings.db"), json_path)
+        suite.add("store.migrate_json", (time.perf_counter() - start) * 1e3, "ms", urls=n)
+
+        urls = list(legacy)
+        entries = list(legacy.values())
+        it = iter(range(1 << 62))
+
+        def save():
+            i = next(it)
+            e = entries[i % n]
+            store.save_for_url(urls[i % n], e["markers"], e["segments"], e["loop_mode"])
+
+        suite.time_op("store.save_for_url", save, 1_000, urls=n)
+        start = time.perf_counter()
+        store.flush()
+        suite.add("store.flush", (time.perf_counter() - start) * 1e3, "ms", urls=n)
+        suite.time_op("store.load_for_url",
+                      lambda: store.load_for_url(urls[rng.randrange(n)]), 2_000, urls=n)
+        store.close()
+
+        start = time.perf_counter()
+        store = LoopSettingsStore(os.path.join(tmp, "loop_settings.db"), json_path)
+        suite.add("store.open", (time.perf_counter() - start) * 1e3, "ms", urls=n)
+        store.close()
+
+
+def bench_normalize_url(suite: Suite) -> None:
+    urls = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s&feature=share",
+        "https://youtu.be/dQw4w9WgXcQ?si=abc123",
+        "https://www.youtube.com/watch?list=PL123&v=dQw4w9WgXcQ&index=3",
+        "https://example.com/media/archive.mp4",
+    ]
+    it = iter(range(1 << 62))
+    suite.time_op("normalize_url", lambda: normalize_url(urls[next(it) % 4]), 50_000)
+
+
+BENCHMARKS = (bench_markers, bench_looper, bench_event_bus, bench_store,
+              bench_normalize_url)
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]" if params else result["name"]
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> bool:
+    """Print each case against the baseline; False if any regressed."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_key(r): r["value"] for r in json.load(f)["results"]}
+    ok = True
+    for result in results:
+        key = _key(result)
+        old = baseline.get(key)
+        if not old:
+            continue
+        ratio = result["value"] / old
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"{key:55s} {old:14.1f} -> {result['value']:14.1f} {result['unit']:6s}"
+              f" x{ratio:5.2f}{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument("--json", metavar="PATH", help="write results here")
+    parser.add_argument("--compare", metavar="PATH", help="baseline --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    suite = Suite(quick=args.quick)
+    with contextlib.redirect_stdout(io.StringIO()):  # component log lines
+        for bench in BENCHMARKS:
+            bench(suite)
+    for result in suite.results:
+        print(f"{_key(result):55s} {result['value']:14.1f} {result['unit']}")
+
+    if args.json:
+        report = {
+            "meta": {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "quick": args.quick,
+            },
+            "results": suite.results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        print()
+        if not compare(suite.results, args.compare, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
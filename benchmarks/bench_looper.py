@@ -0,0 +1,63 @@
+"""Per-event cost of SequenceLooper._on_position_changed.
+
+Runs without a display or libmpv:
+
+    python -m benchmarks.bench_looper
+"""
+import sys
+import time
+import tracemalloc
+
+from src.core.events import EventBus
+from src.core.marker_manager import MarkerManager
+from src.core.sequence_looper import SequenceLooper
+
+
+def build_looper(n_segments: int = 50) -> SequenceLooper:
+    bus = EventBus()
+    markers = MarkerManager(bus)
+    looper = SequenceLooper(bus, markers)
+    ids = [markers.add_marker(i * 10.0).id for i in range(n_segments + 1)]
+    for a, b in zip(ids, ids[1:]):
+        looper.add_segment(a, b)
+    looper.set_seek_callback(lambda _pos: None)
+    looper.start()
+    return looper
+
+
+def bench_position_events(n_events: int = 200_000) -> dict:
+    """Events inside the active segment: the common, non-boundary case."""
+    looper = build_looper()
+    handler = looper._on_position_changed
+    positions = [(i % 900) / 100.0 for i in range(n_events)]
+
+    start = time.perf_counter()
+    for pos in positions:
+        handler(pos)
+    elapsed = time.perf_counter() - start
+
+    sample = positions[:10_000]
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    for pos in sample:
+        handler(pos)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+
+    return {
+        "events": n_events,
+        "ns_per_event": elapsed / n_events * 1e9,
+        "traced_peak_bytes_10k_events": peak,
+        "allocated_blocks_delta_10k_events": blocks_after - blocks_before,
+    }
+
+
+def main() -> None:
+    result = bench_position_events()
+    for key, value in result.items():
+        print(f"{key}: {value:.1f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""End-to-end playback benchmark: the real MpvPlayer on synthetic local media.
+
+Needs libmpv (python-mpv) and ffmpeg, but no display, audio device or
+network; video and audio go to mpv's null outputs:
+
+    python -m benchmarks.bench_playback [--media-dir DIR] [--seeks 20]
+                                        [--boundaries 5] [--json out.json]
+
+Test media is generated once per GOP size with ffmpeg's lavfi sources (a
+testsrc2 pattern and a 440 Hz tone) and a fixed keyframe interval, so
+keyframes fall at known positions. Measured:
+
+  first frame   load() to the first time-pos update, per GOP
+  seek          seek() to the landed time-pos update while paused, exact vs
+                keyframe, per GOP; `landed_off` is how far from the target
+  boundary      media position when the looper's boundary seek is issued,
+                relative to the segment end, at tempos 0.25x-2.0x
+  filter change AudioEffects changes during playback: the longest gap
+                between time-pos updates and the playback time lost in the
+                following second, against a no-change baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from src.core.audio_effects import AudioEffects
+from src.core.events import EventBus
+from src.core.marker_manager import MarkerManager
+from src.core.sequence_looper import SequenceLooper
+
+MEDIA_SECONDS = 120
+FPS = 30
+SAMPLE_RATE = 48000
+GOP_SECONDS = (0.5, 2.0, 10.0)
+TEMPOS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0)
+SEGMENT = (10.0, 12.0)  # boundary test loop, media seconds
+FILTER_WINDOW = 1.0  # seconds observed after each filter change
+TIMEOUT = 10.0
+
+HEADLESS_OPTIONS = {"vo": "null", "ao": "null", "ytdl": False}
+
+
+def generate_media(media_dir: str, gop_seconds: float) -> str:
+    """Encode (or reuse) a test file with a keyframe every `gop_seconds`."""
+    gop = max(1, round(gop_seconds * FPS))
+    path = os.path.join(media_dir, f"lavfi_{MEDIA_SECONDS}s_gop{gop}.mkv")
+    if os.path.exists(path):
+        return path
+    tmp = path + ".part.mkv"
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate={FPS}:duration={MEDIA_SECONDS}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate={SAMPLE_RATE}"
+                             f":duration={MEDIA_SECONDS}",
+        # mpeg4 and aac are built into every ffmpeg; no B-frames and no
+        # scene-cut keyframes, so the GOP layout is exactly -g frames
+        "-c:v", "mpeg4", "-q:v", "5", "-bf", "0", "-g", str(gop),
+        "-sc_threshold", "1000000000",
+        "-c:a", "aac", "-b:a", "128k", "-shortest", tmp,
+    ], check=True)
+    os.replace(tmp, path)
+    return path
+
+
+def keyframe_times(path: str) -> Optional[list[float]]:
+    """Keyframe timestamps as read back by ffprobe, if available."""
+    if not shutil.which("ffprobe"):
+        return None
+    out = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time", "-of", "csv=p=0", path,
+    ], check=True, capture_output=True, text=True).stdout
+    return [float(line) for line in out.split() if line.strip()]
+
+
+def _pct(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _summary(values: list[float], scale: float = 1e3) -> dict:
+    """p50/p95/max (and min) of `values`, scaled to ms by default."""
+    if not values:
+        return {"n": 0}
+    return {"n": len(values), "min": min(values) * scale, "p50": _pct(values, 0.5) * scale,
+            "p95": _pct(values, 0.95) * scale, "max": max(values) * scale}
+
+
+class PositionProbe:
+    """Records every position_changed event with its arrival time."""
+
+    def __init__(self, bus: EventBus):
+        self.samples: list[tuple[float, float]] = []  # (perf_counter, position)
+        self._cond = threading.Condition()
+        bus.on("position_changed", self._on_position, lane=EventBus.REALTIME)
+
+    def _on_position(self, position: float) -> None:
+        with self._cond:
+            self.samples.append((time.perf_counter(), position))
+            self._cond.notify_all()
+
+    def mark(self) -> int:
+        with self._cond:
+            return len(self.samples)
+
+    def wait(self, since: int, predicate: Callable[[float], bool] = lambda _p: True,
+             timeout: float = TIMEOUT) -> Optional[tuple[float, float]]:
+        """First sample from index `since` on that satisfies `predicate`."""
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            i = since
+            while True:
+                while i < len(self.samples):
+                    sample = self.samples[i]
+                    i += 1
+                    if predicate(sample[1]):
+                        return sample
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+class PlaybackBench:
+    def __init__(self, player_factory):
+        self.bus = EventBus()
+        self.probe = PositionProbe(self.bus)
+        self.player = player_factory(self.bus, options=HEADLESS_OPTIONS)
+        self.markers = MarkerManager(self.bus)
+        self.looper = SequenceLooper(self.bus, self.markers)
+        self.effects = AudioEffects(self.bus)
+        self.effects.set_player(self.player)
+        self.looper.set_effects_controller(self.effects)
+
+    def load(self, path: str) -> Optional[float]:
+        """Load `path` and return the seconds until its first frame."""
+        self.player.stop()
+        self.player.play()  # pause persists across files
+        time.sleep(0.2)  # let updates from the previous file drain
+        since = self.probe.mark()
+        start = time.perf_counter()
+        self.player.load(path)
+        sample = self.probe.wait(since)
+        return sample[0] - start if sample else None
+
+    def first_frame(self, path: str, repeat: int) -> dict:
+        times = [t for t in (self.load(path) for _ in range(repeat)) if t is not None]
+        return {"first_frame_ms": _summary(times), "failed": repeat - len(times)}
+
+    def seeks(self, path: str, gop_seconds: float, n: int, rng: random.Random) -> dict:
+        result = {}
+        for name, reference in (("exact", "absolute+exact"),
+                                ("keyframe", "absolute+keyframes")):
+            self.load(path)
+            self.player.pause()
+            time.sleep(0.3)
+            latencies, offsets, failed = [], [], 0
+            last = self.player.time_pos or 0.0
+            for _ in range(n):
+                # Far enough from the last position that a keyframe seek
+                # cannot land where playback already is
+                target = last
+                while abs(target - last) < 2 * gop_seconds + 1:
+                    target = rng.uniform(5, MEDIA_SECONDS - 5)
+                since = self.probe.mark()
+                start = time.perf_counter()
+                self.player.seek(target, reference)
+                sample = self.probe.wait(since)
+                if sample is None:
+                    failed += 1
+                    continue
+                latencies.append(sample[0] - start)
+                offsets.append(abs(sample[1] - target))
+                last = sample[1]
+                time.sleep(0.05)
+            result[name] = {"latency_ms": _summary(latencies),
+                            "landed_off_ms": _summary(offsets), "failed": failed}
+        return result
+
+    def boundaries(self, path: str, boundaries: int) -> dict:
+        """Loop one segment at each tempo and record where playback was
+        when each boundary seek went out."""
+        self.load(path)
+        start_id = self.markers.add_marker(SEGMENT[0]).id
+        end_id = self.markers.add_marker(SEGMENT[1]).id
+        self.looper.add_segment(start_id, end_id)
+        end = SEGMENT[1]
+        overshoots: list[float] = []
+        starting = [True]
+
+        def seek(position: float) -> None:
+            if starting[0]:  # the seek issued by start(), not a boundary
+                starting[0] = False
+            else:
+                now = self.player.time_pos
+                if now is not None:
+                    overshoots.append(now - end)
+            self.player.seek(position)
+
+        self.looper.set_seek_callback(seek)
+        result = {}
+        for tempo in TEMPOS:
+            overshoots.clear()
+            starting[0] = True
+            self.effects.tempo = tempo
+            self.looper.start()
+            self.player.play()
+            deadline = time.perf_counter() + boundaries * (end - SEGMENT[0]) / tempo + TIMEOUT
+            while len(overshoots) < boundaries and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            self.looper.stop()
+            self.player.pause()
+            result[f"{tempo:g}x"] = {"overshoot_ms": _summary(list(overshoots)),
+                                     "trigger_lead_ms": SequenceLooper.SEEK_THRESHOLD * 1e3}
+        self.effects.tempo = 1.0
+        self.looper.set_seek_callback(self.player.seek)
+        return result
+
+    def _observe_change(self, action: Callable[[], None]) -> Optional[tuple[float, float]]:
+        """Run `action` during playback; (longest update gap, time lost)."""
+        since = self.probe.mark()
+        if since == 0:
+            return None
+        speed_before = self.player.speed
+        start = time.perf_counter()
+        action()
+        speed_after = self.player.speed
+        time.sleep(FILTER_WINDOW)
+        samples = self.probe.samples[since - 1:]
+        samples = [s for s in samples if s[0] <= start + FILTER_WINDOW]
+        if len(samples) < 2:
+            return FILTER_WINDOW, FILTER_WINDOW
+        walls = [start] + [w for w, _p in samples[1:]]
+        gap = max(b - a for a, b in zip(walls, walls[1:]))
+        (w0, p0), (w1, p1) = samples[0], samples[-1]
+        expected = (start - w0) * speed_before + (w1 - start) * speed_after
+        return gap, expected - (p1 - p0)
+
+    def filter_changes(self, path: str, repeat: int) -> dict:
+        self.load(path)
+        self.player.seek(30.0)
+        self.effects.initialize_filter()
+        time.sleep(1.0)
+        toggle = iter(range(1 << 30))
+
+        def rebuild():  # semitones without segment pitch: af rebuilt via set_af
+            self.effects.semitones = 2 if next(toggle) % 2 == 0 else 0
+
+        def retune():  # labeled rubberband filter, retuned with af-command
+            self.effects.semitones = 2 if next(toggle) % 2 == 0 else 0
+
+        def tempo():
+            self.effects.tempo = 1.25 if next(toggle) % 2 == 0 else 1.0
+
+        scenarios = [("baseline", lambda: None), ("af_rebuild", rebuild),
+                     ("tempo", tempo), ("af_command", retune)]
+        result = {}
+        for name, action in scenarios:
+            if name == "af_command":
+                self.effects.semitones = 0
+                self.effects.use_segment_pitch(True)
+                time.sleep(0.5)
+            gaps, lost = [], []
+            for _ in range(repeat):
+                observed = self._observe_change(action)
+                if observed:
+                    gaps.append(observed[0])
+                    lost.append(observed[1])
+                time.sleep(0.5)
+                if self.player.time_pos and self.player.time_pos > MEDIA_SECONDS - 10:
+                    self.player.seek(30.0)
+                    time.sleep(0.5)
+            result[name] = {"max_update_gap_ms": _summary(gaps),
+                            "time_lost_ms": _summary(lost)}
+        self.effects.use_segment_pitch(False)
+        self.effects.reset()
+        return result
+
+    def shutdown(self) -> None:
+        self.looper.shutdown()
+        self.player.shutdown()
+
+
+def _print_summary(label: str, stats: dict) -> None:
+    if not stats.get("n"):
+        print(f"  {label:28s} no samples")
+        return
+    print(f"  {label:28s} n={stats['n']:3d}  p50={stats['p50']:8.1f}  "
+          f"p95={stats['p95']:8.1f}  max={stats['max']:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--media-dir", help="where test media is generated and reused"
+                                            " (default: a temporary directory)")
+    parser.add_argument("--loads", type=int, default=5, help="loads per GOP size")
+    parser.add_argument("--seeks", type=int, default=20, help="seeks per mode and GOP size")
+    parser.add_argument("--boundaries", type=int, default=5, help="boundaries per tempo")
+    parser.add_argument("--filter-changes", type=int, default=5,
+                        help="changes per filter scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write the full report here")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        parser.exit(2, "ffmpeg not found on PATH; it is needed to generate test media\n")
+    try:
+        from src.core.player import MpvPlayer
+    except (ImportError, OSError) as e:
+        parser.exit(2, f"libmpv/python-mpv not available: {e}\n")
+
+    with contextlib.ExitStack() as stack:
+        media_dir = args.media_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(media_dir, exist_ok=True)
+        media = {}
+        for gop in GOP_SECONDS:
+            path = generate_media(media_dir, gop)
+            keys = keyframe_times(path)
+            media[gop] = path
+            print(f"media gop={gop:g}s: {path}"
+                  + (f" ({len(keys)} keyframes)" if keys is not None else ""))
+
+        rng = random.Random(args.seed)
+        bench = PlaybackBench(MpvPlayer)
+        report = {"media_seconds": MEDIA_SECONDS, "fps": FPS, "gop": {}}
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # component log lines
+                for gop, path in media.items():
+                    report["gop"][f"{gop:g}s"] = {
+                        **bench.first_frame(path, args.loads),
+                        "seek": bench.seeks(path, gop, args.seeks, rng),
+                    }
+                middle = media[GOP_SECONDS[len(GOP_SECONDS) // 2]]
+                report["boundary"] = bench.boundaries(middle, args.boundaries)
+                report["filter_change"] = bench.filter_changes(middle, args.filter_changes)
+        finally:
+            bench.shutdown()
+
+    for gop, r in report["gop"].items():
+        print(f"gop={gop}")
+        _print_summary("first frame", r["first_frame_ms"])
+        for mode, s in r["seek"].items():
+            _print_summary(f"seek {mode}", s["latency_ms"])
+            _print_summary(f"seek {mode} landed off", s["landed_off_ms"])
+    print(f"boundary overshoot past segment end (trigger fires "
+          f"{SequenceLooper.SEEK_THRESHOLD * 1e3:.0f} ms early)")
+    for tempo, r in report["boundary"].items():
+        _print_summary(tempo, r["overshoot_ms"])
+    print("filter changes")
+    for name, r in report["filter_change"].items():
+        _print_summary(f"{name} update gap", r["max_update_gap_ms"])
+        _print_summary(f"{name} time lost", r["time_lost_ms"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-frame cost of TimelineCanvas updates.
+
+Needs a display (or Xvfb) and customtkinter, but no libmpv:
+
+    python -m benchmarks.bench_timeline [--frames 600]
+
+For each marker count it times a playhead frame (position update), a
+one-marker edit (markers_changed with a diff) and a full layout (resize),
+each followed by update_idletasks() so Tk's own redraw is included.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import customtkinter as ctk
+
+from src.core.events import ChangeDiff, EventBus
+from src.core.marker_manager import MarkerManager
+from src.gui.timeline_canvas import TimelineCanvas
+
+MARKER_COUNTS = (10, 100, 1000, 10_000)
+DURATION = 36_000.0  # a 10-hour archive
+
+
+def _per_frame_us(root, frames: int, step) -> float:
+    start = time.perf_counter()
+    for i in range(frames):
+        step(i)
+        root.update_idletasks()
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def bench(root, n_markers: int, frames: int) -> dict:
+    bus = EventBus()
+    markers = MarkerManager(bus)
+    app = SimpleNamespace(event_bus=bus, marker_manager=markers,
+                          snap_to_onsets=False, player=None)
+    timeline = TimelineCanvas(root, app)
+    timeline.pack(fill="x")
+    root.update()
+    with markers.batch():
+        for i in range(n_markers):
+            markers.add_marker(DURATION * (i + 0.5) / n_markers)
+    timeline._on_duration_changed(DURATION)
+    timeline._on_markers_changed(markers.get_markers(), ChangeDiff(reset=True))
+    root.update()
+
+    target = markers.get_markers()[n_markers // 2]
+    result = {
+        "markers": n_markers,
+        "position_frame_us": _per_frame_us(
+            root, frames, lambda i: timeline._on_position_changed(i / 60.0)),
+        "marker_edit_us": _per_frame_us(
+            root, frames // 10, lambda i: timeline._on_markers_changed(
+                markers.get_markers(), ChangeDiff(updated=frozenset((target.id,))))),
+        "full_layout_us": _per_frame_us(
+            root, frames // 10, lambda i: timeline._layout()),
+    }
+    timeline.destroy()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    root = ctk.CTk()
+    root.geometry("1100x120")
+    for n in MARKER_COUNTS:
+        r = bench(root, n, args.frames)
+        print(f"markers={r['markers']:5d}  position frame={r['position_frame_us']:8.1f} us"
+              f"  marker edit={r['marker_edit_us']:8.1f} us"
+              f"  full layout={r['full_layout_us']:9.1f} us")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
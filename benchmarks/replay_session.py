@@ -0,0 +1,133 @@
+"""Replay a session recorded with `run.py --record PATH` into the core
+objects (EventBus, MarkerManager, SequenceLooper) without mpv or a display.
+
+    python -m benchmarks.replay_session session.rec [--speed 10] [--json out.json]
+
+Player events and looper controls are fed back in; marker and sequence
+edits are restored from the recorded snapshots. The looper's boundary
+decisions (segment changes and seeks) are compared with the recorded run,
+and handler timings come from EventBus instrumentation. --speed 0 (the
+default) replays as fast as possible.
+"""
+import argparse
+import json
+import time
+
+from src.core.event_recorder import COMMAND, read_log
+from src.core.events import EventBus
+from src.core.marker_manager import MarkerManager, Segment
+from src.core.sequence_looper import SequenceLooper
+
+PLAYER_EVENTS = ("position_changed", "duration_changed", "playback_state_changed")
+SEEK_TIMEOUT = 1.0
+
+
+class SessionReplay:
+    def __init__(self):
+        self.bus = EventBus()
+        self.stats = self.bus.enable_stats()
+        self.markers = MarkerManager(self.bus)
+        self.looper = SequenceLooper(self.bus, self.markers)
+        self.decisions: list[tuple] = []  # (kind, value) from this replay
+        self.original: list[tuple] = []  # the same, from the recording
+        self.bus.on("segment_changed", lambda i: self.decisions.append(("segment", i)))
+        self.looper.set_seek_callback(
+            lambda pos: self.decisions.append(("seek", round(pos, 6))))
+
+    def _restore_markers(self, markers: list[dict]) -> None:
+        if self.markers.to_dict() != markers:
+            self.markers.from_dict([dict(m) for m in markers])
+
+    def _restore_sequence(self, segments: list[dict], loop_mode: str) -> None:
+        current = self.looper.to_dict()
+        wanted = {"segments": [SequenceLooper._segment_to_dict(Segment(**s))
+                               for s in segments],
+                  "loop_mode": loop_mode}
+        if current != wanted:
+            self.looper.from_dict(wanted)
+
+    def feed(self, record) -> None:
+        name, args = record.name, record.args
+        if record.kind == COMMAND:
+            if name == "looper.seek":
+                self.original.append(("seek", round(args[0], 6)))
+            elif name.startswith("looper."):
+                getattr(self.looper, name.split(".", 1)[1])(*args)
+                self.looper.wait_for_seeks(SEEK_TIMEOUT)
+            return  # other player commands have no core-side effect
+        if name == "segment_changed":
+            self.original.append(("segment", args[0]))
+        elif name in PLAYER_EVENTS:
+            self.bus.emit(name, *args)
+            self.looper.wait_for_seeks(SEEK_TIMEOUT)
+        elif name == "markers_changed":
+            self._restore_markers(args[0])
+        elif name == "sequence_changed" and len(args) == 4:
+            self._restore_sequence(args[0], args[3])
+
+    def run(self, path: str, speed: float = 0.0) -> dict:
+        records = 0
+        start = time.perf_counter()
+        for record in read_log(path):
+            if speed > 0:
+                delay = record.time / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.feed(record)
+            records += 1
+        wall = time.perf_counter() - start
+        self.looper.shutdown()
+        return self.report(records, wall)
+
+    def report(self, records: int, wall: float) -> dict:
+        first_divergence = None
+        for i, (a, b) in enumerate(zip(self.original, self.decisions)):
+            if a != b:
+                first_divergence = {"index": i, "recorded": a, "replayed": b}
+                break
+        if first_divergence is None and len(self.original) != len(self.decisions):
+            i = min(len(self.original), len(self.decisions))
+            first_divergence = {
+                "index": i,
+                "recorded": self.original[i] if i < len(self.original) else None,
+                "replayed": self.decisions[i] if i < len(self.decisions) else None,
+            }
+        return {
+            "records": records,
+            "wall_s": wall,
+            "decisions_recorded": len(self.original),
+            "decisions_replayed": len(self.decisions),
+            "diverged": first_divergence is not None,
+            "first_divergence": first_divergence,
+            "seek_latency": self.looper.seek_stats(),
+            "events": self.stats.snapshot()["events"],
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="1 = real time, 10 = ten times faster, 0 = unthrottled")
+    parser.add_argument("--json", metavar="PATH", help="write the full report here")
+    args = parser.parse_args()
+
+    report = SessionReplay().run(args.path, args.speed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"records: {report['records']}  wall: {report['wall_s']:.3f}s")
+    print(f"decisions: recorded={report['decisions_recorded']} "
+          f"replayed={report['decisions_replayed']} diverged={report['diverged']}")
+    if report["first_divergence"]:
+        print(f"first divergence: {report['first_divergence']}")
+    for event in ("position_changed", "markers_changed", "sequence_changed"):
+        for name, h in report["events"].get(event, {}).get("handlers", {}).items():
+            lat = h["latency"]
+            print(f"{event:18s} {name:45s} calls={h['calls']:7d} "
+                  f"p50={lat['p50_ms']:.3f}ms p99={lat['p99_ms']:.3f}ms "
+                  f"max={lat['max_ms']:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,50 @@
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
 import os
 
 # Add project directory to PATH so python-mpv can find libmpv-2.dll
 os.environ["PATH"] = os.path.dirname(os.path.abspath(__file__)) + os.pathsep + os.environ["PATH"]
 
 from src.app import App
+from src.utils.startup_trace import StartupTrace
+
+_IMPORTED = time.perf_counter()
 
 if __name__ == "__main__":
-    app = App()
+    parser = argparse.ArgumentParser(description="Stream Player")
+    parser.add_argument(
+        "--event-stats", nargs="?", const="event_stats.json", metavar="PATH",
+        help="record EventBus rates and handler timings; log them periodically "
+             "and write them to PATH (default event_stats.json) on exit",
+    )
+    parser.add_argument(
+        "--record", metavar="PATH",
+        help="record all events and player commands to PATH for "
+             "benchmarks/replay_session.py",
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH",
+        help="sample all threads from startup and write folded stacks "
+             "(flamegraph.pl / speedscope) to PATH on exit; Ctrl+Shift+P "
+             "toggles the profiler at any time",
+    )
+    parser.add_argument(
+        "--stall-log", metavar="PATH",
+        help="also append main-loop stall reports to PATH",
+    )
+    parser.add_argument(
+        "--startup-trace", action="store_true",
+        help="print how long each startup phase takes",
+    )
+    args = parser.parse_args()
+    trace = None
+    if args.startup_trace:
+        trace = StartupTrace(_STARTED)
+        trace.mark("imports", at=_IMPORTED)
+    app = App(event_stats_path=args.event_stats, record_path=args.record,
+              startup_trace=trace, profile_path=args.profile,
+              stall_log_path=args.stall_log)
     app.run()
@@ -1,12 +1,19 @@
 import threading
+import time
 from .core.events import EventBus
-from .core.player import MpvPlayer
 from .core.stream_resolver import StreamResolver
 from .core.marker_manager import MarkerManager
 from .core.sequence_looper import SequenceLooper
 from .core.audio_effects import AudioEffects
-from .core.loop_settings_store import LoopSettingsStore
+from .core.edit_history import EditHistory
+from .core.event_recorder import EventRecorder
+from .core.loop_settings_store import LoopSettingsStore, normalize_url
+from .core.search_index import SearchIndex
+from .core.stall_watchdog import StallWatchdog
+from .core.sampling_profiler import SamplingProfiler
+from .core.practice_log import PracticeLog
 from .gui.main_window import MainWindow
+from .utils.startup_trace import StartupTrace
 
 SAVE_DEBOUNCE_MS = 2000  # Debounce auto-save by 2 seconds
 
@@ -14,34 +21,134 @@ SAVE_DEBOUNCE_MS = 2000  # Debounce auto-save by 2 seconds
 class App:
     """Application controller wiring core modules and GUI together."""
 
-    def __init__(self):
+    def __init__(self, event_stats_path: str | None = None,
+                 record_path: str | None = None,
+                 startup_trace: StartupTrace | None = None,
+                 profile_path: str | None = None,
+                 stall_log_path: str | None = None):
+        self._trace = startup_trace or StartupTrace(enabled=False)
+        self.profiler = SamplingProfiler()
+        self._profile_path = profile_path
+        if profile_path:
+            self.profiler.start()
+        self._stall_log_path = stall_log_path
+        self.watchdog: StallWatchdog | None = None
         self.event_bus = EventBus()
+        self.recorder = EventRecorder(self.event_bus, record_path) if record_path else None
+        self._event_stats_path = event_stats_path
+        if event_stats_path:
+            self.event_bus.enable_stats()
         self.resolver = StreamResolver()
         self.marker_manager = MarkerManager(self.event_bus)
         self.sequence_looper = SequenceLooper(self.event_bus, self.marker_manager)
+        self.edit_history = EditHistory(self.marker_manager, self.sequence_looper)
         self.audio_effects = AudioEffects(self.event_bus)
+        self._trace.mark("core objects")
         self.loop_settings_store = LoopSettingsStore()
-        self.player: MpvPlayer = None
+        self.search_index = SearchIndex()
+        self.loop_settings_store.add_write_hook(self.search_index.index_settings)
+        self.practice_log = PracticeLog(self.event_bus, self.sequence_looper)
+        self._trace.mark("stores")
+        # Analysis pulls in numpy and a process pool; built in run()
+        # once the first frame is on screen
+        self.media_cache = None
+        self.analysis_pool = None
+        self.waveform_analyzer = None
+        self.onset_analyzer = None
+        self.loudness_analyzer = None
+        self.thumbnail_generator = None
+        self.snap_to_onsets = False  # toggled from MarkerPanel
+        self.player = None  # MpvPlayer, created in run() once the window exists
         self._current_url: str | None = None
         self._restoring = False
         self._save_timer: str | None = None
+        self._pending_hit = None  # SearchHit to open once its URL is loaded
 
-        self.event_bus.on("markers_changed", lambda _: self._schedule_auto_save())
-        self.event_bus.on("sequence_changed", lambda _s, _i: self._schedule_auto_save())
+        # Synchronous, so edits applied while restoring are not auto-saved
+        self.event_bus.on("markers_changed", lambda *_: self._schedule_auto_save())
+        self.event_bus.on("sequence_changed", lambda *_: self._schedule_auto_save())
+        # Rebuilding the filter chain is an mpv round trip; keep it off
+        # the emitting thread (mpv's, at play_once end). AudioEffects
+        # serializes it against boundary seeks applying prepared effects.
+        self.event_bus.on("sequence_changed", lambda *_: self._sync_segment_pitch(),
+                          lane=EventBus.MAIN)
 
     def run(self) -> None:
+        trace = self._trace
         self.window = MainWindow(self)
+        self.event_bus.attach_main_loop(self.window)
+        self.watchdog = StallWatchdog(self.window, log_path=self._stall_log_path)
+        trace.mark("main window")
         self.window.update()
+        trace.mark("first frame")
 
+        # libmpv is only needed once there is a window to embed into
+        from .core.player import MpvPlayer
         wid = self.window.video_frame.get_wid()
         self.player = MpvPlayer(self.event_bus, wid=wid)
+        trace.mark("player")
 
         self.sequence_looper.set_seek_callback(self.player.seek)
+        self.sequence_looper.set_effects_controller(self.audio_effects)
         self.audio_effects.set_player(self.player)
+        if self.recorder:
+            self.recorder.attach(self.player, self.sequence_looper)
+
+        self._init_analysis()
+        trace.mark("analyzers")
+
+        self.window.build_panels()
+        trace.mark("panels")
+        threading.Thread(target=self._preload, name="preload", daemon=True).start()
 
         self.window.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.window.after_idle(self._on_interactive)
         self.window.mainloop()
 
+    def _init_analysis(self) -> None:
+        from .core.media_cache import MediaCache
+        from .core.analysis_pool import AnalysisPool
+        from .core.waveform import WaveformAnalyzer
+        from .core.onsets import OnsetAnalyzer
+        from .core.loudness import LoudnessAnalyzer
+        from .core.thumbnails import ThumbnailGenerator
+        self.media_cache = MediaCache()
+        self.analysis_pool = AnalysisPool()
+        self.waveform_analyzer = WaveformAnalyzer(self.event_bus, self.media_cache)
+        self.onset_analyzer = OnsetAnalyzer(
+            self.event_bus, self.media_cache, self.analysis_pool
+        )
+        self.loudness_analyzer = LoudnessAnalyzer(
+            self.event_bus, self.media_cache, self.analysis_pool
+        )
+        self.thumbnail_generator = ThumbnailGenerator(
+            self.event_bus, self.media_cache, self.analysis_pool
+        )
+        self.marker_manager.set_snapper(self.onset_analyzer.snap)
+        self.audio_effects.set_loudness_analyzer(self.loudness_analyzer)
+
+    def _on_interactive(self) -> None:
+        self._trace.mark("interactive")
+        self._trace.report()
+
+    def toggle_profiler(self) -> None:
+        """Start sampling, or stop and write a folded-stacks file."""
+        if not self.profiler.running:
+            self.profiler.start()
+            print("[App] profiler started")
+            return
+        path = self._profile_path or time.strftime("profile-%Y%m%d-%H%M%S.folded")
+        samples = self.profiler.stop(path)
+        print(f"[App] profiler stopped: {samples} samples written to {path}")
+
+    def _preload(self) -> None:
+        """Import yt-dlp in the background so the first URL resolves fast."""
+        started = time.perf_counter()
+        self.resolver.preload()
+        if self._trace.enabled:
+            print(f"[startup] yt-dlp preloaded in background in "
+                  f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
     def load_url(self, url: str) -> None:
         self._save_current_settings()
 
@@ -55,19 +162,57 @@ class App:
                 ))
                 self.window.after(0, lambda: self.window.url_bar.add_to_history(url, title))
                 self.player.load(url)
+                try:
+                    self.search_index.index_titles([(url, title)])
+                except Exception as e:  # search is optional; playback is not
+                    print(f"[App] search index error: {e}")
+                self.waveform_analyzer.request(url)
+                self.onset_analyzer.request(url)
+                self.loudness_analyzer.request(url)
+                self.thumbnail_generator.request(url, info.duration)
                 self.window.after(0, lambda: self.audio_effects.initialize_filter())
                 self._current_url = url
+                self.practice_log.set_url(url)
                 self.window.after(0, lambda: self._restore_loop_settings(url))
             except Exception as e:
                 self.window.after(0, lambda: self.window.url_bar.set_error(str(e)))
 
         threading.Thread(target=_load, daemon=True).start()
 
+    def open_search_hit(self, hit) -> None:
+        """Load the hit's URL if needed, then jump to its segment or memo."""
+        if self._current_url and normalize_url(self._current_url) == hit.url:
+            self._apply_search_hit(hit)
+            return
+        self._pending_hit = hit
+        self.load_url(hit.url)
+
+    def _apply_search_hit(self, hit) -> None:
+        if hit.kind == "segment" and hit.ref is not None:
+            index = int(hit.ref)
+            if index < len(self.sequence_looper.get_segments()):
+                self.sequence_looper.jump_to(index)
+        elif hit.kind == "memo" and hit.ref is not None and self.player:
+            self.player.seek(hit.ref)
+
+    def _on_loaded_for_hit(self, _duration: float) -> None:
+        """Apply a pending search hit once the player can seek."""
+        self.event_bus.off("duration_changed", self._on_loaded_for_hit)
+        hit, self._pending_hit = self._pending_hit, None
+        if hit is not None:
+            self._apply_search_hit(hit)
+
     def add_marker_at_current(self) -> None:
         if self.player:
             pos = self.player.time_pos
             if pos is not None:
-                self.marker_manager.add_marker(pos)
+                self.marker_manager.add_marker(pos, snap=self.snap_to_onsets)
+
+    def _sync_segment_pitch(self) -> None:
+        """Install the retunable pitch filter only while segments need it."""
+        self.audio_effects.use_segment_pitch(
+            self.sequence_looper.has_pitch_overrides()
+        )
 
     def _schedule_auto_save(self) -> None:
         """Debounce auto-save: waits for activity to settle before writing."""
@@ -108,21 +253,51 @@ class App:
         self._restoring = True
         try:
             settings = self.loop_settings_store.load_for_url(url)
-            if settings:
-                self.marker_manager.from_dict(settings.get("markers", []))
-                self.sequence_looper.from_dict({
-                    "segments": settings.get("segments", []),
-                    "loop_mode": settings.get("loop_mode", "loop_sequence"),
-                })
-            else:
-                self.marker_manager.clear()
-                self.sequence_looper.set_segments([])
+            # Loading is not an edit: it starts a fresh history
+            self.edit_history.clear()
+            with self.edit_history.suspended(), self.edit_history.transaction():
+                if settings:
+                    self.marker_manager.from_dict(settings.get("markers", []))
+                    self.sequence_looper.from_dict({
+                        "segments": settings.get("segments", []),
+                        "loop_mode": settings.get("loop_mode", "loop_sequence"),
+                    })
+                else:
+                    self.marker_manager.clear()
+                    self.sequence_looper.set_segments([])
         finally:
             self._restoring = False
+        if self._pending_hit is not None:
+            if self.player and self.player.duration:
+                self._on_loaded_for_hit(self.player.duration)
+            else:
+                self.event_bus.on("duration_changed", self._on_loaded_for_hit,
+                                  lane=EventBus.MAIN)
 
     def _on_close(self) -> None:
         self._save_current_settings()
-        self.sequence_looper.stop()
+        self.loop_settings_store.close()
+        self.search_index.close()
+        self.sequence_looper.shutdown()
+        if self.analysis_pool:
+            self.waveform_analyzer.shutdown()
+            self.analysis_pool.shutdown()
         if self.player:
             self.player.shutdown()
+        self.practice_log.close()  # after the player, so the last span is complete
+        if self.recorder:
+            self.recorder.close()
+        if self.profiler.running:
+            self.toggle_profiler()
+        if self.watchdog:
+            self.watchdog.stop()
+            s = self.watchdog.snapshot()
+            print(f"[StallWatchdog] {s['stalls']} stall(s), "
+                  f"{s['stalled_total_s']:.2f} s total, "
+                  f"longest {s['stalled_max_s'] * 1000:.0f} ms")
+        if self._event_stats_path and self.event_bus.stats:
+            try:
+                self.event_bus.stats.dump_json(self._event_stats_path)
+            except OSError as e:
+                print(f"[App] event stats dump error: {e}")
         self.window.destroy()
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+
+class AnalysisPool:
+    """Shared process pool for CPU-heavy media analysis jobs.
+
+    The pool is created on first use with the spawn start method, so it is
+    safe next to Tk and mpv threads and behaves the same on every OS."""
+
+    def __init__(self, max_workers: int | None = None):
+        if max_workers is None:
+            max_workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor.submit(fn, *args)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PooledAnalyzer(ABC):
+    """Base for per-media analyses that run in the AnalysisPool and are
+    cached as arrays in the MediaCache.
+
+    Subclasses set CACHE_NAME and WORKER (a module-level function taking the
+    URL and returning a dict of arrays) and implement _set_result, which
+    receives None while a new media is pending."""
+
+    CACHE_NAME = ""
+    WORKER: Callable = None
+
+    def __init__(self, event_bus, cache, pool: AnalysisPool):
+        self._bus = event_bus
+        self._cache = cache
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._future: Future | None = None
+
+    def request(self, url: str) -> None:
+        """Load cached results for `url` or start analyzing it."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._future is not None:
+                self._future.cancel()
+                self._future = None
+        self._set_result(None)
+
+        cached = self._cache.load_arrays(url, self.CACHE_NAME)
+        if cached is not None:
+            self._set_result(cached)
+            return
+
+        future = self._pool.submit(type(self).WORKER, url)
+        with self._lock:
+            self._future = future
+        future.add_done_callback(
+            lambda f: self._on_done(url, f, generation)
+        )
+
+    def _on_done(self, url: str, future: Future, generation: int) -> None:
+        if future.cancelled() or generation != self._generation:
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"[{type(self).__name__}] analysis failed: {e}")
+            return
+        self._cache.save_arrays(url, self.CACHE_NAME, **result)
+        self._set_result(result)
+
+    @abstractmethod
+    def _set_result(self, result: dict | None) -> None:
+        """Publish `result`; None while a new media is pending."""
@@ -0,0 +1,84 @@
+import os
+import struct
+import subprocess
+from typing import Iterator
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+AUDIO_FORMAT = "bestaudio/best"
+
+
+def resolve_source(url: str, format_spec: str = AUDIO_FORMAT) -> str:
+    """Return something ffmpeg can open: a local path or a direct stream URL.
+
+    Web pages (YouTube etc.) are resolved with yt-dlp to the stream chosen
+    by `format_spec`. Meant to run in a worker process, never on the Tk
+    thread."""
+    if os.path.exists(url):
+        return url
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return parsed.path
+    from .stream_resolver import StreamResolver
+    return StreamResolver().resolve_stream_url(url, format_spec)
+
+
+_AU_MAGIC = 0x2E736E64  # ".snd"
+
+
+def decode_audio(source: str, sample_rate: int, chunk_seconds: float = 30.0,
+                 mono: bool = True) -> Iterator[np.ndarray]:
+    """Decode audio with ffmpeg to float32 chunks at `sample_rate`.
+
+    With `mono` chunks are 1-D downmixes. Otherwise mono and stereo sources
+    keep their channels (wider layouts are downmixed to stereo) and chunks
+    are (frames, channels); the channel count comes from the stream header.
+    Chunks are yielded as they arrive so callers can report progress on
+    long or remote media."""
+    if mono:
+        fmt = ["-ac", "1", "-f", "f32le"]
+    else:
+        # .au: a small header that carries the negotiated channel count
+        fmt = ["-af", "aformat=channel_layouts=mono|stereo",
+               "-c:a", "pcm_f32be", "-f", "au"]
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-i", source,
+        "-vn", "-ar", str(sample_rate), *fmt, "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        channels, dtype = 1, np.dtype("<f4")
+        if not mono:
+            header = proc.stdout.read(24)
+            if len(header) == 24:
+                magic, offset, _size, _encoding, _rate, channels = struct.unpack(">6I", header)
+                if magic != _AU_MAGIC:
+                    raise RuntimeError("ffmpeg decode failed: unexpected output header")
+                proc.stdout.read(offset - 24)  # annotation
+                dtype = np.dtype(">f4")
+        frame_bytes = 4 * channels
+        chunk_bytes = int(sample_rate * chunk_seconds) * frame_bytes
+        leftover = b""
+        while True:
+            buf = proc.stdout.read(chunk_bytes)
+            if not buf:
+                break
+            buf = leftover + buf
+            usable = len(buf) - len(buf) % frame_bytes
+            leftover = buf[usable:]
+            if usable:
+                samples = np.frombuffer(buf[:usable], dtype=dtype).astype(np.float32)
+                yield samples if mono else samples.reshape(-1, channels)
+        err = proc.stderr.read().decode("utf-8", "replace").strip()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg decode failed: {err or proc.returncode}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
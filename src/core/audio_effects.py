@@ -1,13 +1,45 @@
 import math
+import threading
+from dataclasses import dataclass
+from typing import Optional
 from .events import EventBus
 
 
+@dataclass(frozen=True)
+class PreparedEffects:
+    """Effect parameters resolved ahead of a segment boundary.
+
+    Holds the raw overrides (None = use global value) plus the resolved
+    speed, pitch command argument and normalization gain, so applying them
+    at the boundary is just property writes and an af-command."""
+    tempo_override: Optional[float]
+    semitones_override: Optional[int]
+    time_range: Optional[tuple[float, float]]
+    speed: float
+    semitones: int
+    pitch_ratio: str
+    gain_db: float
+    base_version: int
+
+
 class AudioEffects:
     """Manages tempo and transpose for mpv playback.
 
     - Tempo: mpv's speed property with audio_pitch_correction=True
       (mpv uses scaletempo2 internally to preserve pitch)
     - Transpose: lavfi rubberband filter for pitch shifting
+
+    When segments carry their own transpose, a labeled rubberband filter
+    is installed once and retuned with af-command at each boundary, so the
+    filter graph is never rebuilt while the looper seeks.
+
+    Loudness normalization applies a static, precomputed gain per segment
+    (or per file) through mpv's volume-gain instead of a realtime dynamic
+    normalizer filter.
+
+    Settings are changed from the UI while the looper's seek worker applies
+    prepared effects; one lock covers the applied state and the mpv calls
+    that install or retune the filter, so they never interleave.
     """
 
     MIN_TEMPO = 0.25
@@ -15,15 +47,42 @@ class AudioEffects:
     MIN_SEMITONES = -12
     MAX_SEMITONES = 12
 
+    PITCH_FILTER_LABEL = "segpitch"
+    TARGET_LUFS = -16.0
+
     def __init__(self, event_bus: EventBus):
         self._bus = event_bus
         self._tempo: float = 1.0
         self._semitones: int = 0
         self._player = None
+        self._segment_pitch = False  # labeled rubberband filter installed
+        self._base_version = 0  # bumped when global tempo/semitones change
+        self._applied_speed: float = 1.0
+        self._applied_semitones: int = 0
+        self._loudness = None  # LoudnessAnalyzer
+        self._normalize = False
+        self._applied_gain: float = 0.0
+        self._applied_range: Optional[tuple[float, float]] = None
+        self._applied_overrides: tuple[Optional[float], Optional[int]] = (None, None)
+        self._lock = threading.RLock()
+
+        self._bus.on("loudness_changed", lambda _lufs: self._refresh_gain())
 
     def set_player(self, player) -> None:
         self._player = player
 
+    def set_loudness_analyzer(self, analyzer) -> None:
+        self._loudness = analyzer
+
+    @property
+    def normalize(self) -> bool:
+        return self._normalize
+
+    @normalize.setter
+    def normalize(self, enabled: bool) -> None:
+        self._normalize = enabled
+        self._refresh_gain()
+
     def initialize_filter(self) -> None:
         """Apply initial audio filter. Called after media loads."""
         self._apply_af()
@@ -35,9 +94,10 @@ class AudioEffects:
     @tempo.setter
     def tempo(self, value: float) -> None:
         value = max(self.MIN_TEMPO, min(self.MAX_TEMPO, value))
-        self._tempo = value
-        if self._player:
-            self._player.speed = value
+        with self._lock:
+            self._tempo = value
+            self._base_version += 1
+            self._reapply()
         self._bus.emit("effects_changed", self._tempo, self._semitones)
 
     @property
@@ -47,21 +107,130 @@ class AudioEffects:
     @semitones.setter
     def semitones(self, value: int) -> None:
         value = max(self.MIN_SEMITONES, min(self.MAX_SEMITONES, value))
-        self._semitones = value
-        self._apply_af()
+        with self._lock:
+            self._semitones = value
+            self._base_version += 1
+            self._reapply()
         self._bus.emit("effects_changed", self._tempo, self._semitones)
 
+    def use_segment_pitch(self, enabled: bool) -> None:
+        """Install or remove the labeled pitch filter used for per-segment
+        transpose. Call when the sequence changes, not at a boundary."""
+        with self._lock:
+            if enabled == self._segment_pitch:
+                return
+            self._segment_pitch = enabled
+            self._apply_af()
+
+    def prepare(self, tempo: Optional[float] = None,
+                semitones: Optional[int] = None,
+                time_range: Optional[tuple[float, float]] = None) -> PreparedEffects:
+        """Resolve per-segment overrides against the global settings.
+
+        `time_range` selects the segment whose loudness sets the gain;
+        None uses the whole file."""
+        speed = self._tempo if tempo is None else tempo
+        speed = max(self.MIN_TEMPO, min(self.MAX_TEMPO, speed))
+        st = self._semitones if semitones is None else semitones
+        st = max(self.MIN_SEMITONES, min(self.MAX_SEMITONES, st))
+        return PreparedEffects(
+            tempo_override=tempo,
+            semitones_override=semitones,
+            time_range=time_range,
+            speed=speed,
+            semitones=st,
+            pitch_ratio=f"{math.pow(2, st / 12.0):.6f}",
+            gain_db=self._gain_for(time_range),
+            base_version=self._base_version,
+        )
+
+    def _gain_for(self, time_range: Optional[tuple[float, float]]) -> float:
+        if not self._normalize or self._loudness is None or not self._loudness.ready:
+            return 0.0
+        start, end = time_range if time_range else (None, None)
+        return self._loudness.gain_for(self.TARGET_LUFS, start, end)
+
+    def apply_prepared(self, prepared: PreparedEffects) -> None:
+        """Apply prepared parameters without rebuilding the filter graph.
+
+        Only the values that differ from what is currently applied are
+        written. Parameters prepared before a global change are re-resolved.
+        """
+        with self._lock:
+            if prepared.base_version != self._base_version:
+                prepared = self.prepare(prepared.tempo_override,
+                                        prepared.semitones_override,
+                                        prepared.time_range)
+            self._applied_range = prepared.time_range
+            self._applied_overrides = (prepared.tempo_override,
+                                       prepared.semitones_override)
+            if prepared.speed != self._applied_speed:
+                if self._player:
+                    self._player.speed = prepared.speed
+                self._applied_speed = prepared.speed
+            if prepared.semitones != self._applied_semitones:
+                self._set_pitch(prepared.semitones, prepared.pitch_ratio)
+            if prepared.gain_db != self._applied_gain:
+                self._set_gain(prepared.gain_db)
+
+    def _reapply(self) -> None:
+        """Re-resolve what is playing after a global change, so the active
+        segment's overrides stay in force. Lock held."""
+        tempo, semitones = self._applied_overrides
+        self.apply_prepared(self.prepare(tempo, semitones, self._applied_range))
+
+    def _refresh_gain(self) -> None:
+        """Recompute the gain of the current range after the analysis or
+        the normalize setting changed."""
+        with self._lock:
+            self._base_version += 1
+            self._set_gain(self._gain_for(self._applied_range))
+
+    def _set_gain(self, gain_db: float) -> None:
+        """Lock held."""
+        self._applied_gain = gain_db
+        if not self._player:
+            return
+        try:
+            self._player.volume_gain = gain_db
+        except Exception as e:
+            print(f"[AudioEffects] volume-gain error: {e}")
+
+    def _set_pitch(self, semitones: int, ratio: Optional[str] = None) -> None:
+        """Retune the labeled filter if installed, else rebuild the chain.
+        Lock held."""
+        self._applied_semitones = semitones
+        if not self._segment_pitch:
+            self._apply_af()
+            return
+        if not self._player:
+            return
+        if ratio is None:
+            ratio = f"{math.pow(2, semitones / 12.0):.6f}"
+        try:
+            self._player.af_command(self.PITCH_FILTER_LABEL, "pitch", ratio)
+        except Exception as e:
+            print(f"[AudioEffects] af-command error: {e}")
+
     def _apply_af(self) -> None:
-        """Apply pitch shift using asetrate + atempo filters."""
+        """Apply pitch shift using asetrate + atempo filters.
+
+        In segment pitch mode a labeled rubberband filter is used instead,
+        so later pitch changes can go through af-command. Lock held."""
         if not self._player:
             return
 
-        if self._semitones == 0:
+        semitones = self._applied_semitones
+        if self._segment_pitch:
+            ratio = math.pow(2, semitones / 12.0)
+            af_str = (f'@{self.PITCH_FILTER_LABEL}:'
+                      f'lavfi="rubberband=pitch={ratio:.6f}"')
+        elif semitones == 0:
             af_str = ""
         else:
             # Compensate for observed +1 semitone offset
             # The system produces (input + 1) semitones, so use (desired - 1)
-            adjusted = self._semitones - 1
+            adjusted = semitones - 1
             pitch_ratio = math.pow(2, adjusted / 12.0)
             new_rate = int(48000 * pitch_ratio)
             tempo_comp = 1.0 / pitch_ratio
@@ -69,14 +238,14 @@ class AudioEffects:
 
         try:
             self._player.set_af(af_str)
-            print(f"[AudioEffects] af='{af_str}' semitones={self._semitones} adjusted={self._semitones - 1 if self._semitones != 0 else 0}")
+            print(f"[AudioEffects] af='{af_str}' semitones={semitones} adjusted={semitones - 1 if semitones != 0 else 0}")
         except Exception as e:
             print(f"[AudioEffects] set_af error: {e}")
 
     def reset(self) -> None:
-        self._tempo = 1.0
-        self._semitones = 0
-        if self._player:
-            self._player.speed = 1.0
-        self._apply_af()
+        with self._lock:
+            self._tempo = 1.0
+            self._semitones = 0
+            self._base_version += 1
+            self._reapply()
         self._bus.emit("effects_changed", self._tempo, self._semitones)
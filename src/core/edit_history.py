@@ -0,0 +1,112 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+
+class EditHistory:
+    """Undo/redo over MarkerManager and SequenceLooper edits.
+
+    Every mutation reports its inverse as a small (function, args) op to the
+    journal set on both managers, so a step costs O(changes) memory: a drag
+    stores one old position, a removal keeps the removed object, and a clear
+    keeps the previous immutable marker snapshot rather than copies.
+
+    Ops recorded inside `transaction()` form one step; other ops form a step
+    each. Undoing a step replays its inverses in reverse order inside both
+    managers' batches (one change event per collection), and the inverses
+    those replays journal become the redo step."""
+
+    MAX_STEPS = 500
+
+    def __init__(self, marker_manager, sequence_looper):
+        self._markers = marker_manager
+        self._looper = sequence_looper
+        self._undo: deque[list] = deque(maxlen=self.MAX_STEPS)
+        self._redo: deque[list] = deque(maxlen=self.MAX_STEPS)
+        self._open: list | None = None  # ops of the step being recorded
+        self._suspended = 0
+        marker_manager.set_journal(self._record)
+        sequence_looper.set_journal(self._record)
+
+    def _record(self, fn: Callable, args: tuple) -> None:
+        if self._suspended:
+            return
+        if self._open is not None:
+            self._open.append((fn, args))
+        else:
+            self._undo.append([(fn, args)])
+            self._redo.clear()
+
+    @contextmanager
+    def _batched(self):
+        # Markers flush first so the looper compiles against new positions
+        with self._looper.batch(), self._markers.batch():
+            yield
+
+    @contextmanager
+    def transaction(self):
+        """Group the edits made inside into one undo step and one change
+        event per collection."""
+        if self._open is not None:
+            with self._batched():
+                yield
+            return
+        self._open = []
+        try:
+            with self._batched():
+                yield
+        finally:
+            ops, self._open = self._open, None
+            if ops and not self._suspended:
+                self._undo.append(ops)
+                self._redo.clear()
+
+    @contextmanager
+    def suspended(self):
+        """Apply edits without recording them (e.g. loading saved state)."""
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    def _replay(self, source: deque, target: deque) -> bool:
+        if not source or self._open is not None:
+            return False
+        ops = source.pop()
+        self._open = []
+        done = 0
+        try:
+            with self._batched():
+                for fn, args in reversed(ops):
+                    fn(*args)
+                    done += 1
+        except BaseException:
+            # Keep both directions usable: the ops that did not run stay on
+            # `source`, the inverse of those that did goes to `target`
+            if done < len(ops):
+                source.append(ops[:len(ops) - done])
+            raise
+        finally:
+            inverse, self._open = self._open, None
+            if inverse:
+                target.append(inverse)
+        return True
+
+    def undo(self) -> bool:
+        return self._replay(self._undo, self._redo)
+
+    def redo(self) -> bool:
+        return self._replay(self._redo, self._undo)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
@@ -0,0 +1,147 @@
+import functools
+import json
+import struct
+import threading
+import time
+from dataclasses import fields, is_dataclass
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional
+from .events import ChangeDiff, EventBus
+
+MAGIC = b"SPREC2\n"  # 1: pickled payloads
+
+# Record kinds
+EVENT = 0
+EVENT_F64 = 1  # event with a single float argument (position updates)
+COMMAND = 2
+NAME = 3  # defines the string for a name id
+
+_HEADER = struct.Struct("<dBHI")  # time, kind, name id, payload length
+_F64 = struct.Struct("<d")
+
+PLAYER_COMMANDS = (
+    "load", "play", "pause", "toggle_pause", "stop", "seek", "seek_relative",
+    "frame_step", "frame_back_step", "set_af", "af_command",
+)
+LOOPER_COMMANDS = ("start", "jump_to", "stop")
+
+
+class Record(NamedTuple):
+    time: float  # seconds since recording started
+    kind: int
+    name: str
+    args: tuple
+
+
+def _plain(value):
+    """Reduce an event argument to plain data. Large analysis results
+    (arrays, pyramids) are dropped: they are not inputs to the looper."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, ChangeDiff):
+        return {"added": sorted(value.added), "removed": sorted(value.removed),
+                "updated": sorted(value.updated), "reset": value.reset}
+    if is_dataclass(value):
+        d = {f.name: getattr(value, f.name) for f in fields(value)}
+        if "start_marker_id" in d:
+            d.pop("id", None)  # segment ids are session-local
+        return d
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return None
+
+
+class EventRecorder:
+    """Writes every EventBus event and player/looper command of a session to
+    a compact binary log for later replay (see benchmarks/replay_session.py).
+
+    Each record is a fixed header (time, kind, name id, payload length)
+    followed by the payload: 8 bytes for single-float events such as
+    position_changed, otherwise plain data as compact JSON. Names are
+    written once and referenced by id."""
+
+    def __init__(self, event_bus: EventBus, path: str):
+        self._bus = event_bus
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._names: dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._looper = None
+        event_bus.add_tap(self._on_event)
+
+    def attach(self, player, looper) -> None:
+        """Record calls to the player's commands and the looper's controls.
+        Boundary seeks are recorded as 'looper.seek', apart from user seeks."""
+        looper.set_seek_callback(self._wrap("looper.seek", player.seek))
+        for name in PLAYER_COMMANDS:
+            setattr(player, name, self._wrap(f"player.{name}", getattr(player, name)))
+        for name in LOOPER_COMMANDS:
+            setattr(looper, name, self._wrap(f"looper.{name}", getattr(looper, name)))
+        self._looper = looper
+
+    def _wrap(self, name: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args):
+            self._write(COMMAND, name, args)
+            return fn(*args)
+        return wrapper
+
+    def _on_event(self, event: str, args: tuple) -> None:
+        if event == "sequence_changed" and self._looper is not None:
+            # The loop mode is looper state, not part of the event
+            args = args + (self._looper.loop_mode,)
+        self._write(EVENT, event, args)
+
+    def _name_id(self, name: str, now: float) -> int:
+        """Id for `name`, writing its definition first. Lock held."""
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            data = name.encode("utf-8")
+            self._file.write(_HEADER.pack(now, NAME, name_id, len(data)))
+            self._file.write(data)
+        return name_id
+
+    def _write(self, kind: int, name: str, args: tuple) -> None:
+        if kind == EVENT and len(args) == 1 and type(args[0]) is float:
+            kind, payload = EVENT_F64, _F64.pack(args[0])
+        else:
+            payload = json.dumps(_plain(args), separators=(",", ":")).encode("utf-8")
+        now = time.perf_counter() - self._started
+        with self._lock:
+            if self._file is None:
+                return
+            name_id = self._name_id(name, now)
+            self._file.write(_HEADER.pack(now, kind, name_id, len(payload)))
+            self._file.write(payload)
+
+    def close(self) -> None:
+        self._bus.remove_tap(self._on_event)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_log(path: str) -> Iterator[Record]:
+    """Yield the records of a log written by EventRecorder, in order."""
+    names: dict[int, str] = {}
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an event recording")
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return  # end of file, or a record cut short by a crash
+            t, kind, name_id, length = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if kind == NAME:
+                names[name_id] = payload.decode("utf-8")
+                continue
+            if kind == EVENT_F64:
+                args = _F64.unpack(payload)
+            else:
+                args = tuple(json.loads(payload))
+            yield Record(t, kind, names[name_id], args)
@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from typing import Callable
+
+
+class LatencyHistogram:
+    """Power-of-two microsecond buckets: bucket i counts samples below
+    2**i us (the last bucket is open-ended)."""
+
+    BUCKETS = 24  # up to ~8 s
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        us = int(seconds * 1e6)
+        self.counts[min(us.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (seconds) of the bucket holding the q-quantile."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets_us": {f"<{1 << i}": n for i, n in enumerate(self.counts) if n},
+        }
+
+
+def _handler_name(cb: Callable, lane: str) -> str:
+    """Display name: qualname (plus line number for lambdas) and lane."""
+    name = getattr(cb, "__qualname__", repr(cb))
+    code = getattr(cb, "__code__", None)
+    if code is not None and name.endswith("<lambda>"):
+        name += f":{code.co_firstlineno}"
+    return f"{name} [{lane}]"
+
+
+class _HandlerStats:
+    __slots__ = ("name", "lane", "calls", "errors", "latency", "queue_delay")
+
+    def __init__(self, name: str, lane: str):
+        self.name = name
+        self.lane = lane
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.queue_delay = LatencyHistogram()
+
+
+class EventStats:
+    """Per-event emit counts and rates, and per-handler latency/queueing
+    histograms and exception counts, recorded by EventBus when enabled."""
+
+    LOG_INTERVAL = 10.0  # seconds between periodic log lines
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._emits: dict[str, int] = {}
+        # Keyed by the callback itself: lambdas share qualnames
+        self._handlers: dict[tuple[str, Callable, str], _HandlerStats] = {}
+        self._names: set[tuple[str, str]] = set()  # (event, display name)
+        self._last_log = self._started
+        self._last_log_emits: dict[str, int] = {}
+
+    def record_emit(self, event: str) -> None:
+        with self._lock:
+            self._emits[event] = self._emits.get(event, 0) + 1
+
+    def record_call(self, event: str, cb: Callable, lane: str, elapsed: float,
+                    failed: bool, queued: float | None = None) -> None:
+        key = (event, cb, lane)
+        with self._lock:
+            stats = self._handlers.get(key)
+            if stats is None:
+                stats = self._handlers[key] = _HandlerStats(
+                    self._unique_name(event, _handler_name(cb, lane)), lane)
+            stats.calls += 1
+            stats.errors += failed
+            stats.latency.add(elapsed)
+            if queued is not None:
+                stats.queue_delay.add(queued)
+
+    def _unique_name(self, event: str, name: str) -> str:
+        """`name`, suffixed if another handler of `event` has it. Lock held."""
+        unique, n = name, 1
+        while (event, unique) in self._names:
+            n += 1
+            unique = f"{name} #{n}"
+        self._names.add((event, unique))
+        return unique
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of everything recorded so far."""
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            events = {}
+            for event, count in sorted(self._emits.items()):
+                events[event] = {"emits": count, "rate_hz": count / elapsed,
+                                 "handlers": {}}
+            for (event, _cb, _lane), stats in sorted(
+                    self._handlers.items(), key=lambda item: (item[0][0], item[1].name)):
+                entry = events.setdefault(
+                    event, {"emits": 0, "rate_hz": 0.0, "handlers": {}})
+                entry["handlers"][stats.name] = {
+                    "lane": stats.lane,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "latency": stats.latency.to_dict(),
+                    "queue_delay": stats.queue_delay.to_dict(),
+                }
+            return {"elapsed_s": elapsed, "events": events}
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def maybe_log(self) -> None:
+        """Print one summary line every LOG_INTERVAL seconds: event rates
+        since the last line and the slowest handler so far."""
+        now = time.monotonic()
+        with self._lock:
+            span = now - self._last_log
+            if span < self.LOG_INTERVAL:
+                return
+            rates = []
+            for event, count in sorted(self._emits.items()):
+                delta = count - self._last_log_emits.get(event, 0)
+                if delta:
+                    rates.append(f"{event}={delta / span:.1f}/s")
+            slowest = max(self._handlers.items(),
+                          key=lambda item: item[1].latency.percentile(0.99),
+                          default=None)
+            self._last_log = now
+            self._last_log_emits = dict(self._emits)
+            line = "[EventStats] " + (" ".join(rates) or "idle")
+            if slowest is not None:
+                (event, _cb, _lane), stats = slowest
+                line += (f" | slowest p99 {stats.name} ({event}) "
+                         f"{stats.latency.percentile(0.99) * 1000:.2f} ms")
+        print(line)
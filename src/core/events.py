@@ -1,27 +1,308 @@
+import queue
+import threading
+import time
+import traceback
 from collections import defaultdict
-from typing import Callable, Any
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Any, Optional
+from .event_stats import EventStats
 
 
 class EventBus:
-    """Lightweight pub/sub event bus for decoupling core logic from GUI."""
+    """Lightweight pub/sub event bus for decoupling core logic from GUI.
+
+    Each subscription runs in a lane:
+      REALTIME  inline on the emitting thread, before any other lane, and
+                timed against REALTIME_BUDGET (warns when exceeded)
+      SYNC      inline on the emitting thread (default)
+      DEFERRED  handed to one background worker, in emit order
+      MAIN      queued and delivered by a pump on the Tk main loop (see
+                attach_main_loop), coalesced per event: only the latest
+                arguments are delivered, except that a trailing ChangeDiff
+                argument is merged with the ones it replaces. The pump is
+                scheduled only when the queue becomes non-empty: right away
+                for emits on the main thread, after PUMP_INTERVAL_MS for
+                emits from other threads, so bursts coalesce and an idle
+                bus never wakes the loop.
+
+    enable_stats() turns on per-event and per-handler instrumentation
+    (EventStats); while disabled it costs one attribute check per emit."""
+
+    REALTIME = "realtime"
+    SYNC = "sync"
+    DEFERRED = "deferred"
+    MAIN = "main"
+
+    PUMP_INTERVAL_MS = 20
+    STATS_TICK_MS = 1000  # stats log check; EventStats spaces the lines
+    REALTIME_BUDGET = 0.002  # seconds per handler call
+    BUDGET_WARN_INTERVAL = 5.0  # seconds between warnings per handler
 
     def __init__(self):
-        self._listeners: dict[str, list[Callable]] = defaultdict(list)
+        self._lanes: dict[str, dict[str, list[Callable]]] = {
+            lane: defaultdict(list)
+            for lane in (self.REALTIME, self.SYNC, self.DEFERRED, self.MAIN)
+        }
+        self._realtime = self._lanes[self.REALTIME]
+        self._listeners = self._lanes[self.SYNC]
+        self._deferred_listeners = self._lanes[self.DEFERRED]
+        self._main_listeners = self._lanes[self.MAIN]
+        self._pending: dict[str, tuple[tuple, dict, Optional[float]]] = {}
+        self._pending_lock = threading.Lock()
+        self._root = None
+        self._interval_ms = self.PUMP_INTERVAL_MS
+        self._main_ident: Optional[int] = None
+        self._pump_scheduled = False
+        self._stats_ticking = False
+        self._deferred: queue.SimpleQueue = queue.SimpleQueue()
+        self._deferred_thread: threading.Thread | None = None
+        self._budget_warned: dict[Callable, float] = {}
+        self._stats: Optional[EventStats] = None
+        self._taps: tuple[Callable, ...] = ()
 
-    def on(self, event: str, callback: Callable) -> None:
-        self._listeners[event].append(callback)
+    def on(self, event: str, callback: Callable, lane: str = SYNC) -> None:
+        self._lanes[lane][event].append(callback)
+        if lane == self.DEFERRED and self._deferred_thread is None:
+            self._deferred_thread = threading.Thread(
+                target=self._run_deferred, name="eventbus-deferred", daemon=True)
+            self._deferred_thread.start()
 
     def off(self, event: str, callback: Callable) -> None:
-        try:
-            self._listeners[event].remove(callback)
-        except ValueError:
-            pass
+        for listeners in self._lanes.values():
+            try:
+                listeners[event].remove(callback)
+            except ValueError:
+                pass
+
+    def add_tap(self, tap: Callable[[str, tuple], None]) -> None:
+        """Call tap(event, args) on every emit, before any handler."""
+        self._taps = self._taps + (tap,)
+
+    def remove_tap(self, tap: Callable[[str, tuple], None]) -> None:
+        self._taps = tuple(t for t in self._taps if t is not tap)
+
+    def enable_stats(self) -> EventStats:
+        """Start recording emit rates and handler timings."""
+        if self._stats is None:
+            self._stats = EventStats()
+            if self._root is not None:
+                self._start_stats_tick()
+        return self._stats
+
+    def disable_stats(self) -> None:
+        self._stats = None
+
+    @property
+    def stats(self) -> Optional[EventStats]:
+        return self._stats
 
     def emit(self, event: str, *args: Any, **kwargs: Any) -> None:
+        for tap in self._taps:
+            tap(event, args)
+        stats = self._stats
+        queued_at = None
+        if stats is not None:
+            stats.record_emit(event)
+            queued_at = time.perf_counter()
+        for cb in self._realtime.get(event, []):
+            self._call_realtime(event, cb, args, kwargs)
         for cb in self._listeners.get(event, []):
-            try:
-                cb(*args, **kwargs)
-            except Exception as e:
-                import traceback
-                print(f"[EventBus] error in '{event}' handler {cb.__qualname__}: {e}")
-                traceback.print_exc()
+            self._call(event, cb, args, kwargs)
+        if self._deferred_listeners.get(event):
+            self._deferred.put((event, args, kwargs, queued_at))
+        if self._main_listeners.get(event):
+            with self._pending_lock:
+                prev = self._pending.get(event)
+                if prev is not None:
+                    queued_at = prev[2]  # delay counts from the oldest emit
+                    if (args and prev[0] and isinstance(args[-1], ChangeDiff)
+                            and isinstance(prev[0][-1], ChangeDiff)):
+                        args = args[:-1] + (prev[0][-1].merge(args[-1]),)
+                self._pending[event] = (args, kwargs, queued_at)
+                schedule = self._root is not None and not self._pump_scheduled
+                if schedule:
+                    self._pump_scheduled = True
+            if schedule:
+                self._schedule_pump()
+
+    def _call(self, event: str, cb: Callable, args: tuple, kwargs: dict,
+              lane: str = SYNC, queued_at: Optional[float] = None) -> None:
+        stats = self._stats
+        if stats is not None:
+            start = time.perf_counter()
+        failed = False
+        try:
+            cb(*args, **kwargs)
+        except Exception as e:
+            failed = True
+            print(f"[EventBus] error in '{event}' handler {cb.__qualname__}: {e}")
+            traceback.print_exc()
+        if stats is not None:
+            end = time.perf_counter()
+            stats.record_call(event, cb, lane, end - start, failed,
+                              None if queued_at is None else start - queued_at)
+
+    def _call_realtime(self, event: str, cb: Callable, args: tuple, kwargs: dict) -> None:
+        start = time.perf_counter()
+        self._call(event, cb, args, kwargs, self.REALTIME)
+        elapsed = time.perf_counter() - start
+        if elapsed > self.REALTIME_BUDGET:
+            now = time.monotonic()
+            if now - self._budget_warned.get(cb, -self.BUDGET_WARN_INTERVAL) >= self.BUDGET_WARN_INTERVAL:
+                self._budget_warned[cb] = now
+                print(f"[EventBus] realtime handler {cb.__qualname__} for '{event}' "
+                      f"took {elapsed * 1000:.1f} ms "
+                      f"(budget {self.REALTIME_BUDGET * 1000:.1f} ms)")
+
+    def _run_deferred(self) -> None:
+        while True:
+            event, args, kwargs, queued_at = self._deferred.get()
+            for cb in list(self._deferred_listeners.get(event, [])):
+                self._call(event, cb, args, kwargs, self.DEFERRED, queued_at)
+
+    def attach_main_loop(self, root, interval_ms: int = PUMP_INTERVAL_MS) -> None:
+        """Start delivering MAIN-lane events from `root`'s Tk loop."""
+        self._interval_ms = interval_ms
+        self._main_ident = threading.get_ident()
+        with self._pending_lock:
+            self._root = root
+            schedule = bool(self._pending) and not self._pump_scheduled
+            if schedule:
+                self._pump_scheduled = True
+        if schedule:
+            self._schedule_pump()
+        if self._stats is not None:
+            self._start_stats_tick()
+
+    def _start_stats_tick(self) -> None:
+        if not self._stats_ticking:
+            self._stats_ticking = True
+            self._stats_tick()
+
+    def _stats_tick(self) -> None:
+        """Periodic stats log line, independent of MAIN-lane traffic.
+        Stops once stats are disabled."""
+        stats = self._stats
+        if stats is None:
+            self._stats_ticking = False
+            return
+        stats.maybe_log()
+        try:
+            self._root.after(self.STATS_TICK_MS, self._stats_tick)
+        except Exception:
+            self._stats_ticking = False  # window destroyed
+
+    def _schedule_pump(self) -> None:
+        """Arm one pump run; the caller has set _pump_scheduled."""
+        delay = 0 if threading.get_ident() == self._main_ident else self._interval_ms
+        try:
+            self._root.after(delay, self._pump)
+        except Exception:
+            pass  # window destroyed
+
+    def _pump(self) -> None:
+        with self._pending_lock:
+            self._pump_scheduled = False
+        self.dispatch_pending()
+
+    def dispatch_pending(self) -> None:
+        """Deliver queued MAIN-lane events. Call on the main thread."""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        for event, (args, kwargs, queued_at) in pending.items():
+            for cb in list(self._main_listeners.get(event, [])):
+                self._call(event, cb, args, kwargs, self.MAIN, queued_at)
+
+
+@dataclass(frozen=True)
+class ChangeDiff:
+    """What a markers_changed / sequence_changed event covers, by item id.
+
+    `reset` means the whole collection was replaced; an empty diff means
+    only state such as the active index or loop mode changed."""
+    added: frozenset = frozenset()
+    removed: frozenset = frozenset()
+    updated: frozenset = frozenset()
+    reset: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.updated or self.reset)
+
+    def merge(self, later: 'ChangeDiff') -> 'ChangeDiff':
+        """Diff covering this change followed by `later`."""
+        if self.reset or later.reset:
+            return ChangeDiff(reset=True)
+        added = (self.added - later.removed) | (later.added - self.removed)
+        removed = (self.removed - later.added) | (later.removed - self.added)
+        updated = ((self.updated | later.updated | (self.removed & later.added))
+                   - added - removed)
+        return ChangeDiff(added, removed, updated)
+
+
+class ChangeBatcher:
+    """Merges changes made inside `batch()` into one diff and calls
+    `flush(diff)` once when the outermost batch exits. Outside a batch
+    every change is flushed immediately."""
+
+    def __init__(self, flush: Callable[[ChangeDiff], None]):
+        self._flush = flush
+        self._depth = 0
+        self._dirty = False
+        self._reset = False
+        self._added: set = set()
+        self._removed: set = set()
+        self._updated: set = set()
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    @contextmanager
+    def batch(self):
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._dirty:
+                self._emit()
+
+    def record(self, added=(), removed=(), updated=(), reset: bool = False) -> None:
+        self._dirty = True
+        if reset:
+            self._reset = True
+        if not self._reset:
+            for key in added:
+                if key in self._removed:
+                    self._removed.discard(key)
+                    self._updated.add(key)
+                else:
+                    self._added.add(key)
+            for key in removed:
+                self._updated.discard(key)
+                if key in self._added:
+                    self._added.discard(key)
+                else:
+                    self._removed.add(key)
+            for key in updated:
+                if key not in self._added:
+                    self._updated.add(key)
+        if self._depth == 0:
+            self._emit()
+
+    def _emit(self) -> None:
+        if self._reset:
+            diff = ChangeDiff(reset=True)
+        else:
+            diff = ChangeDiff(frozenset(self._added), frozenset(self._removed),
+                              frozenset(self._updated))
+        self._dirty = False
+        self._reset = False
+        self._added.clear()
+        self._removed.clear()
+        self._updated.clear()
+        self._flush(diff)
@@ -1,12 +1,18 @@
 import json
 import os
+import sqlite3
+import threading
+from typing import Callable
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
 
 _PROJECT_ROOT = os.path.dirname(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 )
-SETTINGS_FILE = os.path.join(_PROJECT_ROOT, "loop_settings.json")
+SETTINGS_FILE = os.path.join(_PROJECT_ROOT, "loop_settings.json")  # legacy
+SETTINGS_DB = os.path.join(_PROJECT_ROOT, "loop_settings.db")
+
+SCHEMA_VERSION = 1
 
 # Query params to strip for URL normalization
 _STRIP_PARAMS = {"t", "feature", "si"}
@@ -29,42 +35,159 @@ def normalize_url(url: str) -> str:
 
 
 class LoopSettingsStore:
-    """Persists loop settings (markers, segments, loop_mode) per URL."""
-
-    def __init__(self):
-        self._data: dict[str, dict] = {}
-        self._load()
-
-    def _load(self) -> None:
-        try:
-            if os.path.exists(SETTINGS_FILE):
-                with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    self._data = json.load(f)
-        except Exception:
-            self._data = {}
-
-    def _save(self) -> None:
-        try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self._data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[LoopSettingsStore] save error: {e}")
+    """Persists loop settings (markers, segments, loop_mode) per URL.
+
+    Settings live in SQLite (WAL mode), one row per normalized URL, and are
+    read lazily per URL. Saves return immediately: a write-behind thread
+    commits them in batched transactions, keeping only the latest pending
+    save per URL, and reads see pending saves. A legacy loop_settings.json
+    is imported once and renamed to loop_settings.json.migrated."""
+
+    def __init__(self, path: str = SETTINGS_DB, legacy_json: str = SETTINGS_FILE):
+        self._path = path
+        self._cond = threading.Condition()
+        self._pending: dict[str, dict | None] = {}  # None = delete
+        self._inflight: dict[str, dict | None] = {}  # taken by the writer
+        self._running = True
+        self._read_lock = threading.Lock()
+        self._write_hooks: list[Callable[[sqlite3.Connection, str, dict | None], None]] = []
+        self._conn = self._connect()
+        self._migrate(legacy_json)
+        self._writer = threading.Thread(target=self._run_writer,
+                                        name="settings-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _migrate(self, legacy_json: str) -> None:
+        conn = self._conn
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        legacy: dict | None = {}
+        if legacy_json and os.path.exists(legacy_json):
+            try:
+                with open(legacy_json, "r", encoding="utf-8") as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                # Leave the file and the version alone so the import is
+                # retried on the next start instead of being lost
+                print(f"[LoopSettingsStore] legacy load error, not migrating: {e}")
+                legacy = None
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS loop_settings ("
+                " url TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " updated REAL NOT NULL DEFAULT (julianday('now')))"
+            )
+            if legacy is None:
+                return
+            # OR IGNORE: on a retried import, sessions saved since win
+            imported = conn.executemany(
+                "INSERT OR IGNORE INTO loop_settings (url, data) VALUES (?, ?)",
+                ((url, self._encode(entry)) for url, entry in legacy.items()),
+            ).rowcount
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        if legacy:
+            os.replace(legacy_json, legacy_json + ".migrated")
+            print(f"[LoopSettingsStore] migrated {imported} URL(s) from {legacy_json}")
+
+    def add_write_hook(
+            self, hook: Callable[[sqlite3.Connection, str, dict | None],
+                             Callable[[], None] | None]) -> None:
+        """Call hook(conn, url_key, entry_or_None) for every committed save,
+        inside the same transaction (e.g. to keep a search index current).
+        A callable returned by the hook runs after the commit, outside the
+        transaction, for work that must not hold the write lock."""
+        self._write_hooks.append(hook)
+
+    @staticmethod
+    def _encode(entry: dict) -> str:
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and self._running:
+                    self._cond.wait()
+                if not self._pending and not self._running:
+                    return
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"[LoopSettingsStore] save error: {e}")
+            with self._cond:
+                self._inflight = {}
+                self._cond.notify_all()
+
+    def _write(self, batch: dict[str, dict | None]) -> None:
+        """Commit a batch of saves atomically."""
+        after = []
+        with self._read_lock, self._conn:
+            for key, entry in batch.items():
+                if entry is None:
+                    self._conn.execute("DELETE FROM loop_settings WHERE url = ?", (key,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO loop_settings (url, data, updated)"
+                        " VALUES (?, ?, julianday('now'))",
+                        (key, self._encode(entry)),
+                    )
+                for hook in self._write_hooks:
+                    done = hook(self._conn, key, entry)
+                    if callable(done):
+                        after.append(done)
+        for done in after:
+            done()
 
     def save_for_url(self, url: str, markers: list[dict],
                      segments: list[dict], loop_mode: str) -> None:
         key = normalize_url(url)
         if not markers and not segments:
-            if key in self._data:
-                del self._data[key]
-                self._save()
-            return
-        self._data[key] = {
-            "markers": markers,
-            "segments": segments,
-            "loop_mode": loop_mode,
-        }
-        self._save()
+            entry = None
+        else:
+            entry = {
+                "markers": markers,
+                "segments": segments,
+                "loop_mode": loop_mode,
+            }
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("LoopSettingsStore is closed")
+            self._pending[key] = entry
+            self._cond.notify_all()
 
     def load_for_url(self, url: str) -> dict | None:
         key = normalize_url(url)
-        return self._data.get(key)
+        with self._cond:
+            for overlay in (self._pending, self._inflight):
+                if key in overlay:
+                    return overlay[key]
+        with self._read_lock:
+            row = self._conn.execute(
+                "SELECT data FROM loop_settings WHERE url = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every save so far is committed."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self) -> None:
+        """Commit pending saves and stop the writer."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._writer.join()
+        with self._read_lock:
+            self._conn.close()
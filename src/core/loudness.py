@@ -0,0 +1,196 @@
+import math
+from typing import Optional
+
+import numpy as np
+from .analysis_pool import AnalysisPool, PooledAnalyzer
+from .events import EventBus
+from .media_cache import MediaCache
+
+
+LOUDNESS_SAMPLE_RATE = 48000
+SUB_BLOCK = 4800  # 100 ms; BS.1770 400 ms blocks are 4 consecutive sub-blocks
+BLOCK_SUB_BLOCKS = 4
+ABSOLUTE_GATE = -70.0  # LUFS
+RELATIVE_GATE = -10.0  # LU below the absolute-gated loudness
+
+
+def _biquad_power(b, a, freqs: np.ndarray, fs: float) -> np.ndarray:
+    """|H(e^jw)|^2 of a biquad at the given frequencies."""
+    z = np.exp(-1j * 2 * np.pi * freqs / fs)
+    num = b[0] + b[1] * z + b[2] * z * z
+    den = a[0] + a[1] * z + a[2] * z * z
+    return np.abs(num / den) ** 2
+
+
+def k_weighting_power(freqs: np.ndarray, fs: float) -> np.ndarray:
+    """Power response of the BS.1770 K-weighting filter (shelf + high-pass)."""
+    # Stage 1: high shelf, +4 dB above ~1.5 kHz
+    gain_db, q, fc = 4.0, 1 / math.sqrt(2), 1500.0
+    big_a = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * fc / fs
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    sq = 2 * math.sqrt(big_a) * alpha
+    shelf_b = (big_a * ((big_a + 1) + (big_a - 1) * cos_w0 + sq),
+               -2 * big_a * ((big_a - 1) + (big_a + 1) * cos_w0),
+               big_a * ((big_a + 1) + (big_a - 1) * cos_w0 - sq))
+    shelf_a = ((big_a + 1) - (big_a - 1) * cos_w0 + sq,
+               2 * ((big_a - 1) - (big_a + 1) * cos_w0),
+               (big_a + 1) - (big_a - 1) * cos_w0 - sq)
+    # Stage 2: RLB high-pass at 38 Hz
+    q, fc = 0.5, 38.0
+    w0 = 2 * math.pi * fc / fs
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    hp_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    hp_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    return _biquad_power(shelf_b, shelf_a, freqs, fs) * _biquad_power(hp_b, hp_a, freqs, fs)
+
+
+class SubBlockMeter:
+    """K-weighted mean square and sample peak per 100 ms sub-block.
+
+    Input is (frames,) or (frames, channels). As in BS.1770 each channel is
+    weighted on its own and the mean squares are summed (channel weight 1,
+    i.e. mono or L/R; the decoder downmixes wider layouts to stereo).
+
+    Weighting is applied in the frequency domain per sub-block, so the whole
+    pass is a batched FFT with no per-sample Python loop."""
+
+    def __init__(self):
+        freqs = np.fft.rfftfreq(SUB_BLOCK, 1.0 / LOUDNESS_SAMPLE_RATE)
+        self._weights = k_weighting_power(freqs, LOUDNESS_SAMPLE_RATE)
+        # Parseval: mean square = sum(w * |X|^2) * scale, with one-sided bins doubled
+        self._weights[1:-1] *= 2
+        self._scale = 1.0 / (SUB_BLOCK * SUB_BLOCK)
+        self._tail: Optional[np.ndarray] = None  # (frames, channels)
+        self._ms: list[np.ndarray] = []
+        self._peak: list[np.ndarray] = []
+
+    def feed(self, samples: np.ndarray) -> None:
+        samples = samples.reshape(len(samples), -1)
+        if self._tail is None:
+            self._tail = np.zeros((0, samples.shape[1]), dtype=np.float32)
+        buf = np.concatenate([self._tail, samples])
+        n = len(buf) // SUB_BLOCK
+        self._tail = buf[n * SUB_BLOCK:]
+        if n:
+            self._push(buf[:n * SUB_BLOCK].reshape(n, SUB_BLOCK, -1))
+
+    def finish(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._tail is not None and len(self._tail):
+            block = np.zeros((1, SUB_BLOCK, self._tail.shape[1]), dtype=np.float32)
+            block[0, :len(self._tail)] = self._tail
+            self._push(block)
+            self._tail = None
+        if not self._ms:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty
+        return np.concatenate(self._ms), np.concatenate(self._peak)
+
+    def _push(self, blocks: np.ndarray) -> None:
+        """blocks: (n, SUB_BLOCK, channels)."""
+        spec = np.fft.rfft(blocks, axis=1)
+        power = (spec.real ** 2 + spec.imag ** 2).sum(axis=2)  # summed over channels
+        self._ms.append((power @ self._weights * self._scale).astype(np.float32))
+        self._peak.append(np.abs(blocks).max(axis=(1, 2)).astype(np.float32))
+
+
+def gated_loudness(sub_ms: np.ndarray) -> Optional[float]:
+    """BS.1770 integrated loudness (LUFS) from 100 ms sub-block mean squares.
+
+    Ranges shorter than one 400 ms block fall back to ungated loudness."""
+    if len(sub_ms) == 0:
+        return None
+    if len(sub_ms) < BLOCK_SUB_BLOCKS:
+        z = np.array([sub_ms.mean()])
+    else:
+        csum = np.concatenate([[0.0], np.cumsum(sub_ms, dtype=np.float64)])
+        z = (csum[BLOCK_SUB_BLOCKS:] - csum[:-BLOCK_SUB_BLOCKS]) / BLOCK_SUB_BLOCKS
+    with np.errstate(divide="ignore"):
+        lk = -0.691 + 10 * np.log10(z)
+    z = z[lk > ABSOLUTE_GATE]
+    lk = lk[lk > ABSOLUTE_GATE]
+    if len(z) == 0:
+        return None
+    rel = -0.691 + 10 * math.log10(z.mean()) + RELATIVE_GATE
+    z = z[lk > rel]
+    if len(z) == 0:
+        return None
+    return -0.691 + 10 * math.log10(z.mean())
+
+
+def analyze_loudness(url: str) -> dict:
+    """Worker entry point: decode `url` and return per-sub-block levels."""
+    from .audio_decode import decode_audio, resolve_source
+    meter = SubBlockMeter()
+    for chunk in decode_audio(resolve_source(url), LOUDNESS_SAMPLE_RATE, mono=False):
+        meter.feed(chunk)
+    ms, peak = meter.finish()
+    return {"ms": ms, "peak": peak}
+
+
+class LoudnessAnalyzer(PooledAnalyzer):
+    """Loudness of the loaded media, computed in the analysis pool and
+    cached per media as 100 ms sub-block levels, from which file and
+    segment loudness are derived on demand.
+
+    Publishes 'loudness_changed' (file_lufs or None)."""
+
+    CACHE_NAME = "loudness-v2.npz"  # v2: per-channel weighting
+    WORKER = analyze_loudness
+    SUB_BLOCK_SECONDS = SUB_BLOCK / LOUDNESS_SAMPLE_RATE
+
+    def __init__(self, event_bus: EventBus, cache: MediaCache, pool: AnalysisPool):
+        super().__init__(event_bus, cache, pool)
+        self._ms = np.zeros(0, dtype=np.float32)
+        self._peak = np.zeros(0, dtype=np.float32)
+        self.file_lufs: Optional[float] = None
+
+    def _set_result(self, result: Optional[dict]) -> None:
+        if result is None:
+            self._ms = np.zeros(0, dtype=np.float32)
+            self._peak = np.zeros(0, dtype=np.float32)
+            self.file_lufs = None
+        else:
+            self._ms = result["ms"]
+            self._peak = result["peak"]
+            self.file_lufs = gated_loudness(self._ms)
+        self._bus.emit("loudness_changed", self.file_lufs)
+
+    @property
+    def ready(self) -> bool:
+        return len(self._ms) > 0
+
+    def _slice(self, start: Optional[float], end: Optional[float]) -> slice:
+        i0 = 0 if start is None else max(0, int(start / self.SUB_BLOCK_SECONDS))
+        i1 = len(self._ms) if end is None else int(math.ceil(end / self.SUB_BLOCK_SECONDS))
+        return slice(i0, max(i0 + 1, i1))
+
+    def loudness(self, start: Optional[float] = None,
+                 end: Optional[float] = None) -> Optional[float]:
+        """Integrated loudness in LUFS of [start, end] (whole file if None)."""
+        if start is None and end is None:
+            return self.file_lufs
+        return gated_loudness(self._ms[self._slice(start, end)])
+
+    def peak_db(self, start: Optional[float] = None,
+                end: Optional[float] = None) -> Optional[float]:
+        peaks = self._peak[self._slice(start, end)]
+        if len(peaks) == 0:
+            return None
+        peak = float(peaks.max())
+        return 20 * math.log10(peak) if peak > 0 else None
+
+    def gain_for(self, target_lufs: float, start: Optional[float] = None,
+                 end: Optional[float] = None, max_gain_db: float = 12.0) -> float:
+        """Static gain (dB) bringing the range to `target_lufs` without
+        pushing its sample peak above -1 dBFS."""
+        lufs = self.loudness(start, end)
+        if lufs is None:
+            return 0.0
+        gain = target_lufs - lufs
+        peak = self.peak_db(start, end)
+        if peak is not None:
+            gain = min(gain, -1.0 - peak)
+        return max(-max_gain_db, min(max_gain_db, gain))
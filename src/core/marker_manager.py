@@ -1,15 +1,17 @@
 import string
 import uuid
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from typing import Optional
-from .events import EventBus
+from typing import Callable, Optional
+from .events import ChangeBatcher, ChangeDiff, EventBus
 
 
 def _gen_id() -> str:
     return uuid.uuid4().hex[:12]
 
 
-@dataclass
+@dataclass(slots=True)
 class Marker:
     id: str
     label: str
@@ -26,10 +28,21 @@ class Segment:
     start_marker_id: str
     end_marker_id: str
     display_name: str = ""
+    tempo: Optional[float] = None  # per-segment override, None = global tempo
+    semitones: Optional[int] = None  # per-segment override, None = global transpose
+    id: str = field(default_factory=_gen_id)  # session-local, not persisted
 
 
 class MarkerManager:
-    """Manages markers with immutable IDs. Labels are display-only."""
+    """Manages markers with immutable IDs. Labels are display-only.
+
+    Markers are kept sorted by position, with a parallel array of positions
+    for bisect lookups and hash indexes by id and label. Positions must be
+    changed through update_position so the index stays sorted.
+
+    Every change emits 'markers_changed' (markers, diff). Changes made inside
+    `batch()` are merged into a single event. Each change also reports its
+    inverse to the journal (see EditHistory)."""
 
     COLORS = [
         "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4",
@@ -40,70 +53,203 @@ class MarkerManager:
     def __init__(self, event_bus: EventBus):
         self._bus = event_bus
         self._markers: list[Marker] = []
+        self._positions = array('d')  # parallel to _markers, sorted
+        self._by_id: dict[str, Marker] = {}
+        self._by_label: dict[str, Marker] = {}  # first marker per label
+        self._label_counts: dict[str, int] = {}
+        self._snapshot: Optional[tuple[Marker, ...]] = ()
         self._label_counter = 0
+        self._snapper: Optional[Callable[[float], float]] = None
+        self._batcher = ChangeBatcher(self._flush_changes)
+        self._journal: Optional[Callable[[Callable, tuple], None]] = None
+
+    def set_journal(self, journal: Optional[Callable[[Callable, tuple], None]]) -> None:
+        """Set the callback that receives (undo_fn, args) for every change."""
+        self._journal = journal
+
+    def _log(self, undo_fn: Callable, *args) -> None:
+        if self._journal is not None:
+            self._journal(undo_fn, args)
+
+    def batch(self):
+        """Context manager: apply many edits, emit one markers_changed."""
+        return self._batcher.batch()
+
+    def set_snapper(self, snapper: Optional[Callable[[float], float]]) -> None:
+        """Set the function used to snap positions (e.g. to onsets)."""
+        self._snapper = snapper
+
+    def snap(self, position: float) -> float:
+        if self._snapper is None:
+            return position
+        return self._snapper(position)
 
     def _next_label(self) -> str:
         idx = self._label_counter
         self._label_counter += 1
-        if idx < 26:
-            return string.ascii_uppercase[idx]
-        return string.ascii_uppercase[idx // 26 - 1] + string.ascii_uppercase[idx % 26]
+        # A..Z, AA..ZZ, AAA.. (bijective base 26)
+        label = ""
+        idx += 1
+        while idx:
+            idx, rem = divmod(idx - 1, 26)
+            label = string.ascii_uppercase[rem] + label
+        return label
+
+    def _insert(self, marker: Marker) -> None:
+        i = bisect_right(self._positions, marker.position)
+        self._markers.insert(i, marker)
+        self._positions.insert(i, marker.position)
+        self._by_id[marker.id] = marker
+        label = marker.label
+        self._label_counts[label] = self._label_counts.get(label, 0) + 1
+        first = self._by_label.get(label)
+        if first is None or marker.position < first.position:
+            self._by_label[label] = marker
+        self._snapshot = None
+
+    def _index_of(self, marker: Marker) -> int:
+        """Position of `marker` in the sorted list (O(log n) + ties)."""
+        i = bisect_left(self._positions, marker.position)
+        while self._markers[i] is not marker:
+            i += 1
+        return i
+
+    def _detach(self, marker: Marker) -> None:
+        i = self._index_of(marker)
+        del self._markers[i]
+        del self._positions[i]
+        label = marker.label
+        count = self._label_counts[label] - 1
+        if count:
+            self._label_counts[label] = count
+            if self._by_label.get(label) is marker:
+                self._remap_label(label)
+        else:
+            del self._label_counts[label]
+            self._by_label.pop(label, None)
+        self._snapshot = None
+
+    def _remap_label(self, label: str) -> None:
+        """Point `label` at its first marker again (duplicate labels only,
+        so the scan is rare)."""
+        first = next((m for m in self._markers if m.label == label), None)
+        if first is None:
+            self._by_label.pop(label, None)
+        else:
+            self._by_label[label] = first
 
-    def add_marker(self, position: float, label: Optional[str] = None) -> Marker:
+    def _rebuild_indexes(self) -> None:
+        self._markers.sort()
+        self._positions = array('d', (m.position for m in self._markers))
+        self._by_id = {m.id: m for m in self._markers}
+        self._by_label = {}
+        self._label_counts = {}
+        for m in reversed(self._markers):  # first marker wins on duplicate labels
+            self._by_label[m.label] = m
+            self._label_counts[m.label] = self._label_counts.get(m.label, 0) + 1
+        self._snapshot = None
+
+    def _flush_changes(self, diff: ChangeDiff) -> None:
+        self._bus.emit("markers_changed", self.get_markers(), diff)
+
+    def add_marker(self, position: float, label: Optional[str] = None,
+                   snap: bool = False) -> Marker:
+        if snap:
+            position = self.snap(position)
         if label is None:
             label = self._next_label()
         color = self.COLORS[len(self._markers) % len(self.COLORS)]
         marker = Marker(id=_gen_id(), label=label, position=position, color=color)
-        self._markers.append(marker)
-        self._markers.sort()
-        self._bus.emit("markers_changed", self.get_markers())
+        self._restore(marker)
         return marker
 
+    def _restore(self, marker: Marker) -> None:
+        """Insert an existing Marker object (new, or removed earlier)."""
+        self._insert(marker)
+        self._log(self.remove_marker, marker.id)
+        self._batcher.record(added=(marker.id,))
+
     def remove_marker(self, marker_id: str) -> None:
-        self._markers = [m for m in self._markers if m.id != marker_id]
-        self._bus.emit("markers_changed", self.get_markers())
+        marker = self._by_id.pop(marker_id, None)
+        if marker is not None:
+            self._detach(marker)
+            # Nothing mutates the object while it is detached; keep it as is
+            self._log(self._restore, marker)
+            self._batcher.record(removed=(marker_id,))
 
-    def get_markers(self) -> list[Marker]:
-        return list(self._markers)
+    def get_markers(self) -> tuple[Marker, ...]:
+        """Read-only snapshot in position order, shared until the next change."""
+        if self._snapshot is None:
+            self._snapshot = tuple(self._markers)
+        return self._snapshot
 
     def get_by_id(self, marker_id: str) -> Optional[Marker]:
-        for m in self._markers:
-            if m.id == marker_id:
-                return m
-        return None
+        return self._by_id.get(marker_id)
 
     def get_by_label(self, label: str) -> Optional[Marker]:
-        for m in self._markers:
-            if m.label == label:
-                return m
-        return None
-
-    def update_position(self, marker_id: str, position: float) -> None:
-        for m in self._markers:
-            if m.id == marker_id:
-                m.position = position
-                self._markers.sort()
-                self._bus.emit("markers_changed", self.get_markers())
-                return
+        return self._by_label.get(label)
+
+    def markers_between(self, start: float, end: float) -> list[Marker]:
+        """Markers with start <= position <= end, in position order."""
+        i = bisect_left(self._positions, start)
+        j = bisect_right(self._positions, end)
+        return self._markers[i:j]
+
+    def nearest(self, position: float) -> Optional[Marker]:
+        """Marker closest to `position`, or None when there are none."""
+        i = bisect_left(self._positions, position)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self._markers):
+                if best is None or (abs(self._positions[j] - position)
+                                    < abs(best.position - position)):
+                    best = self._markers[j]
+        return best
+
+    def update_position(self, marker_id: str, position: float,
+                        snap: bool = False) -> None:
+        if snap:
+            position = self.snap(position)
+        marker = self._by_id.get(marker_id)
+        if marker is None:
+            return
+        self._log(self.update_position, marker_id, marker.position)
+        self._detach(marker)
+        marker.position = position
+        self._insert(marker)
+        self._batcher.record(updated=(marker_id,))
 
     def update_memo(self, marker_id: str, memo: str) -> None:
-        for m in self._markers:
-            if m.id == marker_id:
-                m.memo = memo
-                self._bus.emit("markers_changed", self.get_markers())
-                return
+        marker = self._by_id.get(marker_id)
+        if marker is not None and marker.memo != memo:
+            self._log(self.update_memo, marker_id, marker.memo)
+            marker.memo = memo
+            self._batcher.record(updated=(marker_id,))
 
     def swap_labels(self, id_a: str, id_b: str) -> None:
         ma = self.get_by_id(id_a)
         mb = self.get_by_id(id_b)
         if ma and mb:
             ma.label, mb.label = mb.label, ma.label
-            self._bus.emit("markers_changed", self.get_markers())
+            for m in (ma, mb):
+                if self._label_counts[m.label] > 1:
+                    self._remap_label(m.label)
+                else:
+                    self._by_label[m.label] = m
+            self._log(self.swap_labels, id_a, id_b)
+            self._batcher.record(updated=(id_a, id_b))
 
     def clear(self) -> None:
-        self._markers.clear()
-        self._label_counter = 0
-        self._bus.emit("markers_changed", [])
+        self._replace((), 0)
+
+    def _replace(self, markers, label_counter: int) -> None:
+        """Swap in a whole new marker collection."""
+        # The old snapshot tuple is shared with readers; no copy needed
+        self._log(self._replace, self.get_markers(), self._label_counter)
+        self._markers = list(markers)
+        self._rebuild_indexes()
+        self._label_counter = label_counter
+        self._batcher.record(reset=True)
 
     def to_dict(self) -> list[dict]:
         return [{'id': m.id, 'label': m.label, 'position': m.position,
@@ -111,11 +257,9 @@ class MarkerManager:
                 for m in self._markers]
 
     def from_dict(self, data: list[dict]) -> None:
-        self._markers = []
+        markers = []
         for d in data:
             if 'id' not in d:
                 d['id'] = _gen_id()
-            self._markers.append(Marker(**d))
-        self._markers.sort()
-        self._label_counter = len(self._markers)
-        self._bus.emit("markers_changed", self.get_markers())
+            markers.append(Marker(**d))
+        self._replace(markers, len(markers))
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import shutil
+import time
+from typing import Optional
+from .loop_settings_store import normalize_url
+
+
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+CACHE_DIR = os.path.join(_PROJECT_ROOT, "media_cache")
+
+
+class MediaCache:
+    """On-disk cache for per-media analysis results (waveforms, etc.).
+
+    Each media gets its own directory keyed by a hash of its normalized URL.
+    Directories are touched on access; once the total size exceeds
+    `max_bytes` the least recently used ones are evicted."""
+
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._root = root
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()[:20]
+
+    def path_for(self, url: str, name: str) -> str:
+        """Path of a cache entry, creating the media directory if needed."""
+        media_dir = os.path.join(self._root, self.key_for(url))
+        os.makedirs(media_dir, exist_ok=True)
+        return os.path.join(media_dir, name)
+
+    def lookup(self, url: str, name: str) -> Optional[str]:
+        """Return the path of an existing entry (marking it used), or None."""
+        media_dir = os.path.join(self._root, self.key_for(url))
+        path = os.path.join(media_dir, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(media_dir)
+        except OSError:
+            pass
+        return path
+
+    def save_arrays(self, url: str, name: str, **arrays) -> None:
+        """Atomically write NumPy arrays as an .npz entry."""
+        import numpy as np
+        path = self.path_for(url, name)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[MediaCache] save error: {e}")
+            return
+        self.commit(path)
+
+    def commit(self, path: str) -> None:
+        """Call after writing an entry; enforces the size limit while
+        keeping the entry's own media directory."""
+        self.evict(keep=os.path.dirname(path))
+
+    def load_arrays(self, url: str, name: str) -> Optional[dict]:
+        import numpy as np
+        path = self.lookup(url, name)
+        if path is None:
+            return None
+        try:
+            with np.load(path) as data:
+                return {k: data[k] for k in data.files}
+        except Exception as e:
+            print(f"[MediaCache] load error: {e}")
+            return None
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used media directories over the size limit."""
+        try:
+            names = os.listdir(self._root)
+        except OSError:
+            return
+        entries = []
+        total = 0
+        for name in names:
+            media_dir = os.path.join(self._root, name)
+            if not os.path.isdir(media_dir):
+                continue
+            size = 0
+            for f in os.listdir(media_dir):
+                try:
+                    size += os.path.getsize(os.path.join(media_dir, f))
+                except OSError:
+                    pass
+            total += size
+            try:
+                mtime = os.path.getmtime(media_dir)
+            except OSError:
+                mtime = time.time()
+            entries.append((mtime, size, media_dir))
+
+        entries.sort()
+        for _mtime, size, media_dir in entries:
+            if total <= self._max_bytes:
+                break
+            if keep and os.path.abspath(media_dir) == os.path.abspath(keep):
+                continue
+            shutil.rmtree(media_dir, ignore_errors=True)
+            total -= size
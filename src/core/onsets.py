@@ -0,0 +1,173 @@
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .analysis_pool import AnalysisPool, PooledAnalyzer
+from .events import EventBus
+from .media_cache import MediaCache
+
+
+ONSET_SAMPLE_RATE = 11025
+N_FFT = 1024
+HOP = 256  # ~23 ms per frame
+FRAMES_PER_BATCH = 4096  # bounds FFT memory on long media
+MIN_BPM = 60
+MAX_BPM = 180
+PREFERRED_BPM = 120  # center of the tempo prior that resolves octave errors
+BEAT_BLOCK_SECONDS = 8.0  # beat phase is re-fitted per block to follow drift
+
+
+class SpectralFlux:
+    """Incremental log-magnitude spectral flux over streamed audio chunks."""
+
+    def __init__(self):
+        self._window = np.hanning(N_FFT).astype(np.float32)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._prev: Optional[np.ndarray] = None
+        self._parts: list[np.ndarray] = []
+
+    @property
+    def frames_per_second(self) -> float:
+        return ONSET_SAMPLE_RATE / HOP
+
+    def feed(self, samples: np.ndarray) -> None:
+        buf = np.concatenate([self._tail, samples])
+        if len(buf) < N_FFT:
+            self._tail = buf
+            return
+        n_frames = (len(buf) - N_FFT) // HOP + 1
+        for start in range(0, n_frames, FRAMES_PER_BATCH):
+            stop = min(n_frames, start + FRAMES_PER_BATCH)
+            seg = buf[start * HOP:(stop - 1) * HOP + N_FFT]
+            frames = sliding_window_view(seg, N_FFT)[::HOP]
+            mag = np.abs(np.fft.rfft(frames * self._window, axis=1))
+            logmag = np.log1p(100.0 * mag).astype(np.float32)
+            prev = logmag[:1] if self._prev is None else self._prev
+            diff = np.diff(np.concatenate([prev, logmag]), axis=0)
+            self._parts.append(np.maximum(diff, 0.0).sum(axis=1))
+            self._prev = logmag[-1:]
+        self._tail = buf[n_frames * HOP:]
+
+    def envelope(self) -> np.ndarray:
+        if not self._parts:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self._parts)
+
+
+def frame_times(frames: np.ndarray) -> np.ndarray:
+    """Frame index -> seconds. Flux peaks while the attack is still in the
+    trailing half of the window, so the window center is shifted one hop."""
+    return (frames * HOP + N_FFT / 2 + HOP) / ONSET_SAMPLE_RATE
+
+
+def pick_onsets(env: np.ndarray, fps: float) -> np.ndarray:
+    """Frame indices of onset peaks: local maxima that stand out from a
+    moving average by a multiple of the envelope's spread."""
+    if len(env) < 3:
+        return np.zeros(0, dtype=np.int64)
+    env = env / (np.percentile(env, 99.5) or 1.0)
+    w = max(1, int(0.05 * fps))  # local max over +-50 ms
+    local_max = sliding_window_view(np.pad(env, w, mode="edge"), 2 * w + 1).max(axis=1)
+    m = max(1, int(0.5 * fps))  # threshold against +-0.5 s mean
+    csum = np.concatenate([[0.0], np.cumsum(np.pad(env, m, mode="edge"))])
+    mean = (csum[2 * m + 1:] - csum[:-2 * m - 1]) / (2 * m + 1)
+    peaks = np.nonzero((env == local_max) & (env > mean + 1.5 * env.std()))[0]
+    # Drop peaks closer than the local-max window (flat tops)
+    if len(peaks) > 1:
+        peaks = peaks[np.concatenate([[True], np.diff(peaks) > w])]
+    return peaks
+
+
+def estimate_beats(env: np.ndarray, fps: float) -> tuple[float, np.ndarray]:
+    """Global tempo by autocorrelation, beat phase fitted per block.
+
+    Returns (bpm, beat frame indices); bpm is 0 when the media is too short."""
+    lag_min = int(fps * 60 / MAX_BPM)
+    lag_max = int(np.ceil(fps * 60 / MIN_BPM))
+    n = len(env)
+    if n < lag_max * 4:
+        return 0.0, np.zeros(0, dtype=np.int64)
+
+    x = env - env.mean()
+    nfft = 1 << int(2 * n - 1).bit_length()
+    spec = np.fft.rfft(x, nfft)
+    ac = np.fft.irfft(spec * np.conj(spec), nfft)[:lag_max + 2]
+    # Log-Gaussian prior so half/double tempo don't win on periodic input
+    lags = np.arange(lag_min, lag_max + 1)
+    bpms = 60.0 * fps / lags
+    prior = np.exp(-0.5 * np.log2(bpms / PREFERRED_BPM) ** 2)
+    lag = lag_min + int(np.argmax(ac[lag_min:lag_max + 1] * prior))
+    # Parabolic interpolation for a fractional period
+    a, b, c = ac[lag - 1], ac[lag], ac[lag + 1]
+    denom = a - 2 * b + c
+    period = lag + (0.5 * (a - c) / denom if denom else 0.0)
+
+    block = max(int(BEAT_BLOCK_SECONDS * fps), int(np.ceil(period)) * 2)
+    n_blocks = n // block
+    beats_per_block = int(block // period)
+    phases = np.arange(int(np.ceil(period)))
+    offsets = np.round(np.arange(beats_per_block) * period).astype(np.int64)
+    starts = np.arange(n_blocks) * block
+    # idx[b, p, j]: frame of beat j in block b for phase candidate p
+    idx = starts[:, None, None] + phases[None, :, None] + offsets[None, None, :]
+    idx = np.minimum(idx, n - 1)
+    best = np.argmax(env[idx].sum(axis=2), axis=1)
+    beats = idx[np.arange(n_blocks), best].ravel()
+    return 60.0 * fps / period, beats
+
+
+def analyze_onsets(url: str) -> dict:
+    """Worker entry point: decode `url` and return onset/beat times."""
+    from .audio_decode import decode_audio, resolve_source
+    flux = SpectralFlux()
+    for chunk in decode_audio(resolve_source(url), ONSET_SAMPLE_RATE):
+        flux.feed(chunk)
+    env = flux.envelope()
+    fps = flux.frames_per_second
+    bpm, beats = estimate_beats(env, fps)
+    return {
+        "onsets": frame_times(pick_onsets(env, fps)),
+        "beats": frame_times(beats),
+        "bpm": np.array([bpm]),
+    }
+
+
+class OnsetAnalyzer(PooledAnalyzer):
+    """Onset and beat grid of the loaded media, computed in the analysis
+    pool and cached per media. Publishes 'onsets_changed' (onsets, beats)."""
+
+    CACHE_NAME = "onsets.npz"
+    WORKER = analyze_onsets
+    SNAP_WINDOW = 0.25  # seconds; farther onsets are ignored
+
+    def __init__(self, event_bus: EventBus, cache: MediaCache, pool: AnalysisPool):
+        super().__init__(event_bus, cache, pool)
+        self._onsets = np.zeros(0)
+        self._beats = np.zeros(0)
+        self.bpm = 0.0
+
+    def _set_result(self, result: Optional[dict]) -> None:
+        if result is None:
+            self._onsets = np.zeros(0)
+            self._beats = np.zeros(0)
+            self.bpm = 0.0
+        else:
+            self._onsets = np.asarray(result["onsets"], dtype=np.float64)
+            self._beats = np.asarray(result["beats"], dtype=np.float64)
+            self.bpm = float(result["bpm"][0])
+        self._bus.emit("onsets_changed", self._onsets, self._beats)
+
+    def snap(self, position: float) -> float:
+        """Nearest onset within SNAP_WINDOW, or `position` unchanged."""
+        onsets = self._onsets
+        if len(onsets) == 0:
+            return position
+        i = int(np.searchsorted(onsets, position))
+        best = position
+        best_dist = self.SNAP_WINDOW
+        for j in (i - 1, i):
+            if 0 <= j < len(onsets):
+                dist = abs(onsets[j] - position)
+                if dist <= best_dist:
+                    best, best_dist = float(onsets[j]), dist
+        return best
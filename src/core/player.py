@@ -7,7 +7,8 @@ from .events import EventBus
 class MpvPlayer:
     """Wrapper around mpv.MPV for playback control with property observation."""
 
-    def __init__(self, event_bus: EventBus, wid: Optional[int] = None):
+    def __init__(self, event_bus: EventBus, wid: Optional[int] = None,
+                 options: Optional[dict] = None):
         self._bus = event_bus
         self._lock = threading.Lock()
 
@@ -20,6 +21,9 @@ class MpvPlayer:
         }
         if wid is not None:
             mpv_kwargs['wid'] = str(wid)
+        if options:
+            # Extra mpv options, e.g. vo/ao='null' for headless benchmarks
+            mpv_kwargs.update(options)
 
         self._mpv = mpv.MPV(**mpv_kwargs)
 
@@ -91,6 +95,15 @@ class MpvPlayer:
     def volume(self, value: float) -> None:
         self._mpv.volume = max(0, min(100, value))
 
+    @property
+    def volume_gain(self) -> float:
+        """Extra gain in dB applied after volume (mpv's volume-gain)."""
+        return self._mpv.volume_gain
+
+    @volume_gain.setter
+    def volume_gain(self, value: float) -> None:
+        self._mpv.volume_gain = value
+
     def frame_step(self) -> None:
         self._mpv.command('frame-step')
 
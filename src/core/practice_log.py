@@ -0,0 +1,329 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+from .events import EventBus
+from .loop_settings_store import normalize_url
+
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+PRACTICE_DB = os.path.join(_PROJECT_ROOT, "practice_log.db")
+
+SCHEMA_VERSION = 1
+
+FLUSH_INTERVAL = 5.0  # seconds between appends of buffered spans
+COMPACT_INTERVAL = 3600.0  # seconds between retention/downsampling passes
+RAW_RETENTION_DAYS = 30  # rolled-up spans are kept this long...
+MAX_RAW_SPANS = 200_000  # ...and never more than this many
+DAILY_RETENTION_DAYS = 120  # older day buckets are merged into 30-day ones
+COARSE_BUCKET_DAYS = 30
+MIN_SPAN = 0.05  # seconds; shorter spans are dropped unless they start a loop
+
+
+class PracticeTotal(NamedTuple):
+    label: str  # segment name or marker labels; "" for playback outside the looper
+    tempo: float
+    loops: int  # passes through the segment
+    seconds: float  # time spent playing
+    last: float  # unix time of the latest span
+
+
+class PracticeDay(NamedTuple):
+    day: datetime.date  # first day of the bucket
+    days: int  # bucket width: 1, or COARSE_BUCKET_DAYS for older history
+    loops: int
+    seconds: float
+
+
+class _Span(NamedTuple):
+    start: float  # unix time
+    duration: float
+    url: str
+    segment: str  # "start_id:end_id", "" outside the looper
+    label: str
+    tempo: float
+    loop: int  # 1 if the span starts a pass through the segment
+
+
+class PracticeLog:
+    """Practice telemetry: how often each segment was looped and how long
+    was played at each tempo, per URL.
+
+    Playback is cut into spans of constant (url, segment, tempo) by
+    'segment_changed', 'effects_changed', 'playback_state_changed' and
+    'sequence_changed'. Handlers only close the current span into a
+    buffer; a background thread appends the buffer to an append-only table
+    every FLUSH_INTERVAL and rolls new rows up into per-URL/segment/tempo
+    totals and per-day buckets in the same transaction. Old raw spans are
+    dropped once rolled up and old day buckets are merged into 30-day
+    buckets, so the file stays bounded and per-URL queries read only
+    aggregate rows."""
+
+    def __init__(self, event_bus: EventBus, sequence_looper, path: str = PRACTICE_DB):
+        self._looper = sequence_looper
+        self._lock = threading.Lock()  # span state and buffer
+        self._cond = threading.Condition(self._lock)
+        self._buffer: list[_Span] = []
+        self._running = True
+        self._url: Optional[str] = None
+        self._segment: tuple[str, str, Optional[float]] = ("", "", None)  # key, label, tempo override
+        self._tempo = 1.0  # global tempo
+        self._playing = False
+        self._open: Optional[tuple[float, float, int]] = None  # (wall, monotonic, loop)
+        self._loop_pending = 0
+        self._names: dict[str, int] = {"": 0}
+        self._labels: dict[int, str] = {}
+        self._last_compact = 0.0
+        self._db_lock = threading.Lock()  # writer vs. queries
+        self._conn = self._connect(path)
+        self._create_schema()
+        self._writer = threading.Thread(target=self._run_writer,
+                                        name="practice-log", daemon=True)
+        self._writer.start()
+
+        # segment_changed is emitted under the looper lock ahead of the
+        # boundary seek; keep span bookkeeping off that path. All four share
+        # the lane so they are handled in emit order.
+        for event, handler in (("segment_changed", self._on_segment_changed),
+                               ("effects_changed", self._on_effects_changed),
+                               ("playback_state_changed", self._on_state_changed),
+                               ("sequence_changed", self._on_sequence_changed)):
+            event_bus.on(event, handler, lane=EventBus.DEFERRED)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        # Must precede table creation to take effect on a new file
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._conn
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS names ("
+                         " id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+            conn.execute("CREATE TABLE IF NOT EXISTS segment_labels ("
+                         " seg INTEGER PRIMARY KEY, label TEXT NOT NULL)")
+            # Append-only log; seg 0 = outside the looper
+            conn.execute("CREATE TABLE IF NOT EXISTS spans ("
+                         " id INTEGER PRIMARY KEY, start REAL NOT NULL,"
+                         " duration REAL NOT NULL, url INTEGER NOT NULL,"
+                         " seg INTEGER NOT NULL, tempo REAL NOT NULL,"
+                         " loop INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS totals ("
+                         " url INTEGER NOT NULL, seg INTEGER NOT NULL,"
+                         " tempo REAL NOT NULL, loops INTEGER NOT NULL,"
+                         " seconds REAL NOT NULL, last REAL NOT NULL,"
+                         " PRIMARY KEY (url, seg, tempo)) WITHOUT ROWID")
+            # day = proleptic Gregorian ordinal of the local date
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets ("
+                         " url INTEGER NOT NULL, day INTEGER NOT NULL,"
+                         " days INTEGER NOT NULL, seg INTEGER NOT NULL,"
+                         " loops INTEGER NOT NULL, seconds REAL NOT NULL,"
+                         " PRIMARY KEY (url, day, days, seg)) WITHOUT ROWID")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    # -- span tracking (event handlers, any thread) -----------------------
+
+    def _close_span(self, now: float) -> None:
+        """Buffer the open span, if any. Lock held."""
+        if self._open is None:
+            return
+        wall, started, loop = self._open
+        self._open = None
+        if now - started < MIN_SPAN and not loop:
+            return  # state churn (e.g. a pause toggled while loading)
+        key, label, override = self._segment
+        tempo = override if override is not None else self._tempo
+        self._buffer.append(_Span(wall, now - started, self._url, key, label,
+                                  round(tempo, 2), loop))
+
+    def _reopen(self, now: float) -> None:
+        """Start a span if something is playing. Lock held."""
+        if self._playing and self._url is not None:
+            self._open = (time.time(), now, self._loop_pending)
+            self._loop_pending = 0
+
+    def _change(self, **state) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._close_span(now)
+            for name, value in state.items():
+                setattr(self, name, value)
+            self._reopen(now)
+
+    def set_url(self, url: Optional[str]) -> None:
+        """Attribute playback from now on to `url` (None: nothing loaded)."""
+        self._change(_url=normalize_url(url) if url else None,
+                     _segment=("", "", None), _loop_pending=0)
+
+    def _on_segment_changed(self, index: int) -> None:
+        segments = self._looper.get_segments()
+        if not 0 <= index < len(segments):
+            return
+        seg = segments[index]
+        label = seg.display_name or self._looper.get_segment_label(seg)
+        self._change(_segment=(f"{seg.start_marker_id}:{seg.end_marker_id}",
+                               label, seg.tempo),
+                     _loop_pending=1)
+
+    def _on_effects_changed(self, tempo: float, _semitones: int) -> None:
+        if tempo != self._tempo:
+            self._change(_tempo=tempo)
+
+    def _on_state_changed(self, state: str) -> None:
+        playing = state == "playing"
+        if playing != self._playing:
+            self._change(_playing=playing)
+
+    def _on_sequence_changed(self, *_args) -> None:
+        if not self._looper.active and self._segment[0]:
+            self._change(_segment=("", "", None), _loop_pending=0)
+
+    # -- writer -------------------------------------------------------------
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._cond:
+                if self._running:
+                    self._cond.wait(FLUSH_INTERVAL)
+                running = self._running
+                batch, self._buffer = self._buffer, []
+            try:
+                with self._db_lock:
+                    if batch:
+                        self._append(batch)
+                    if not running or time.monotonic() - self._last_compact >= COMPACT_INTERVAL:
+                        self._compact()
+                        self._last_compact = time.monotonic()
+            except Exception as e:
+                print(f"[PracticeLog] write error: {e}")
+            if not running:
+                return
+
+    def _name_id(self, name: str) -> int:
+        """Id of a URL or segment key, interning it. Transaction held."""
+        name_id = self._names.get(name)
+        if name_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO names (name) VALUES (?)", (name,))
+            name_id = self._conn.execute(
+                "SELECT id FROM names WHERE name = ?", (name,)).fetchone()[0]
+            self._names[name] = name_id
+        return name_id
+
+    def _append(self, batch: list[_Span]) -> None:
+        """Append spans and fold them into the aggregates, atomically."""
+        rows = []
+        totals: dict[tuple, list] = {}
+        days: dict[tuple, list] = {}
+        with self._conn:
+            for span in batch:
+                url = self._name_id(span.url)
+                seg = self._name_id(span.segment)
+                if seg and self._labels.get(seg) != span.label:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO segment_labels VALUES (?, ?)",
+                        (seg, span.label))
+                    self._labels[seg] = span.label
+                rows.append((span.start, span.duration, url, seg, span.tempo, span.loop))
+                total = totals.setdefault((url, seg, span.tempo), [0, 0.0, 0.0])
+                total[0] += span.loop
+                total[1] += span.duration
+                total[2] = max(total[2], span.start + span.duration)
+                day = datetime.date.fromtimestamp(span.start).toordinal()
+                bucket = days.setdefault((url, day, 1, seg), [0, 0.0])
+                bucket[0] += span.loop
+                bucket[1] += span.duration
+            self._conn.executemany(
+                "INSERT INTO spans (start, duration, url, seg, tempo, loop)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "INSERT INTO totals VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (url, seg, tempo) DO UPDATE SET"
+                " loops = loops + excluded.loops, seconds = seconds + excluded.seconds,"
+                " last = max(last, excluded.last)",
+                [key + tuple(v) for key, v in totals.items()])
+            self._add_buckets([key + tuple(v) for key, v in days.items()])
+
+    def _add_buckets(self, rows: list[tuple]) -> None:
+        self._conn.executemany(
+            "INSERT INTO buckets VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (url, day, days, seg) DO UPDATE SET"
+            " loops = loops + excluded.loops, seconds = seconds + excluded.seconds",
+            rows)
+
+    def _compact(self) -> None:
+        """Drop old raw spans and downsample old day buckets."""
+        today = datetime.date.today().toordinal()
+        with self._conn:
+            # Every stored span is already in the aggregates (same transaction)
+            self._conn.execute("DELETE FROM spans WHERE start < ?",
+                               (time.time() - RAW_RETENTION_DAYS * 86400,))
+            excess = self._conn.execute(
+                "SELECT max(id) - ? FROM spans", (MAX_RAW_SPANS,)).fetchone()[0]
+            if excess and excess > 0:
+                self._conn.execute("DELETE FROM spans WHERE id <= ?", (excess,))
+            cutoff = today - DAILY_RETENTION_DAYS
+            old = self._conn.execute(
+                "SELECT url, day / ? * ?, ?, seg, sum(loops), sum(seconds)"
+                " FROM buckets WHERE days = 1 AND day < ?"
+                " GROUP BY url, day / ?, seg",
+                (COARSE_BUCKET_DAYS, COARSE_BUCKET_DAYS, COARSE_BUCKET_DAYS,
+                 cutoff, COARSE_BUCKET_DAYS)).fetchall()
+            if old:
+                self._add_buckets(old)
+                self._conn.execute("DELETE FROM buckets WHERE days = 1 AND day < ?",
+                                   (cutoff,))
+        self._conn.execute("PRAGMA incremental_vacuum")
+
+    # -- queries --------------------------------------------------------------
+
+    def _url_id(self, url: str) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM names WHERE name = ?",
+                                 (normalize_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def summary(self, url: str) -> list[PracticeTotal]:
+        """Loops and playing time per segment and tempo for `url`, most
+        practiced first. Lags playback by up to FLUSH_INTERVAL."""
+        with self._db_lock:
+            url_id = self._url_id(url)
+            if url_id is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT coalesce(l.label, ''), t.tempo, t.loops, t.seconds, t.last"
+                " FROM totals t LEFT JOIN segment_labels l ON l.seg = t.seg"
+                " WHERE t.url = ? ORDER BY t.seconds DESC", (url_id,)).fetchall()
+        return [PracticeTotal(*row) for row in rows]
+
+    def history(self, url: str, days: int = 365) -> list[PracticeDay]:
+        """Loops and playing time per day (per 30 days for older history)
+        for `url` over the last `days` days, oldest first."""
+        since = datetime.date.today().toordinal() - days
+        with self._db_lock:
+            url_id = self._url_id(url)
+            if url_id is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT day, days, sum(loops), sum(seconds) FROM buckets"
+                " WHERE url = ? AND day + days > ? GROUP BY day, days ORDER BY day",
+                (url_id, since)).fetchall()
+        return [PracticeDay(datetime.date.fromordinal(day), width, loops, seconds)
+                for day, width, loops, seconds in rows]
+
+    def close(self) -> None:
+        """Record the open span, write everything and stop the writer."""
+        self._change(_playing=False)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._writer.join()
+        self._conn.close()
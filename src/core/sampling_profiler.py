@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Statistical profiler: a helper thread samples the stacks of all
+    threads every INTERVAL seconds and counts identical stacks.
+
+    stop() writes the counts in the folded format ("thread;frame;frame N"
+    per line) read by flamegraph.pl, speedscope and inferno."""
+
+    INTERVAL = 0.005
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._counts: dict[str, int] = {}
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._counts = {}
+        self.samples = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler",
+                                        daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)  # co_qualname: 3.11+
+        return f"{name} ({os.path.basename(code.co_filename)})"
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        counts = self._counts
+        while self._running:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            self.samples += 1
+            time.sleep(self.INTERVAL)
+
+    def stop(self, path: str) -> int:
+        """Stop sampling and write the folded stacks to `path`. Returns
+        the number of samples taken."""
+        if not self._running:
+            return 0
+        self._running = False
+        self._thread.join()
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._counts.items()):
+                f.write(f"{stack} {count}\n")
+        return self.samples
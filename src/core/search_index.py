@@ -0,0 +1,228 @@
+import json
+import re
+import sqlite3
+import threading
+from typing import Callable, Iterable, NamedTuple, Optional
+from .loop_settings_store import SETTINGS_DB, normalize_url
+
+_WORD = re.compile(r"\w+")
+
+SCHEMA_VERSION = 1
+FUZZY_MIN_SIMILARITY = 0.5  # Dice coefficient over trigrams
+FUZZY_MAX_TERMS = 8
+RANK_MAX_MATCHES = 500  # rank results only when a query matches at most this many
+
+
+class SearchHit(NamedTuple):
+    url: str
+    kind: str  # "title", "memo" or "segment"
+    text: str
+    label: str  # title, marker label or segment label
+    ref: Optional[float]  # marker position (memo) or segment index (segment)
+
+
+def _trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Full-text search over saved sessions: URLs and titles, marker memos
+    and segment names, in an FTS5 table next to the loop settings.
+
+    Rows for a URL are replaced in the same transaction that saves its
+    settings (LoopSettingsStore write hook), so the index stays current
+    without rescans. Queries match word prefixes; when that finds fewer
+    than `limit` hits, misspelled words are expanded to similar indexed
+    terms through an in-memory trigram index of the FTS vocabulary."""
+
+    def __init__(self, path: str = SETTINGS_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._lock = threading.Lock()
+        self._terms: set[str] = set()
+        self._trigram_terms: dict[str, set[str]] = {}
+        self._create_schema()
+        for (term,) in self._conn.execute("SELECT term FROM search_vocab"):
+            self._add_term(term)
+
+    def _create_schema(self) -> None:
+        with self._conn:
+            # Rows live in search_docs (indexed by url); search_fts is an
+            # external-content index over them, kept in sync by triggers.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_docs ("
+                " id INTEGER PRIMARY KEY, url TEXT NOT NULL, kind TEXT NOT NULL,"
+                " label TEXT, ref REAL, text TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_docs_url ON search_docs (url, kind)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+                " text, content='search_docs', content_rowid='id',"
+                " prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_vocab"
+                " USING fts5vocab(search_fts, 'row')"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value)"
+            )
+            row = self._conn.execute(
+                "SELECT value FROM search_meta WHERE key = 'schema'").fetchone()
+            if row is None or row[0] < SCHEMA_VERSION:
+                self._backfill()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_meta VALUES ('schema', ?)",
+                    (SCHEMA_VERSION,))
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS search_docs_ai AFTER INSERT ON search_docs"
+                " BEGIN INSERT INTO search_fts (rowid, text) VALUES (new.id, new.text); END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS search_docs_ad AFTER DELETE ON search_docs"
+                " BEGIN INSERT INTO search_fts (search_fts, rowid, text)"
+                " VALUES ('delete', old.id, old.text); END"
+            )
+
+    def _backfill(self) -> None:
+        """Index every saved session once (first run), before the sync
+        triggers exist. Transaction held."""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'loop_settings'").fetchone()
+        if not exists:
+            return
+        rows = self._conn.execute("SELECT url, data FROM loop_settings").fetchall()
+        for url, data in rows:
+            # Nothing else runs yet, so the terms can go in right away
+            self.index_settings(self._conn, url, json.loads(data))()
+        # Bulk-build the FTS index once instead of row by row via triggers
+        self._conn.execute("INSERT INTO search_fts (search_fts) VALUES ('rebuild')")
+
+    def _add_term(self, term: str) -> None:
+        if term in self._terms:
+            return
+        self._terms.add(term)
+        for gram in _trigrams(term):
+            self._trigram_terms.setdefault(gram, set()).add(term)
+
+    def _add_text_terms(self, texts: Iterable[str]) -> None:
+        """Add the words of `texts` to the fuzzy vocabulary. Never called
+        with a write transaction open, so _lock and SQLite's write lock
+        are not taken in opposite orders."""
+        with self._lock:
+            for text in texts:
+                for word in _WORD.findall(text.lower()):
+                    self._add_term(word)
+
+    # -- updates --------------------------------------------------------
+
+    def index_settings(self, conn: sqlite3.Connection, key: str,
+                       entry: Optional[dict]) -> Callable[[], None]:
+        """Replace the memo/segment rows of `key`. Runs inside the caller's
+        transaction (the settings store's write hook); returns the step
+        that adds the new words to the vocabulary, to run after commit."""
+        conn.execute(
+            "DELETE FROM search_docs WHERE url = ? AND kind != 'title'", (key,))
+        if not entry:
+            return lambda: None
+        labels = {}
+        rows = []
+        for m in entry.get("markers", []):
+            labels[m.get("id")] = m.get("label", "")
+            memo = m.get("memo", "")
+            if memo:
+                rows.append((memo, key, "memo", m.get("label", ""),
+                             m.get("position")))
+        for i, seg in enumerate(entry.get("segments", [])):
+            name = seg.get("display_name", "")
+            if name:
+                label = (labels.get(seg.get("start_marker_id"), "?")
+                         + labels.get(seg.get("end_marker_id"), "?"))
+                rows.append((name, key, "segment", label, i))
+        conn.executemany(
+            "INSERT INTO search_docs (text, url, kind, label, ref)"
+            " VALUES (?, ?, ?, ?, ?)", rows)
+        texts = [text for text, *_ in rows]
+        return lambda: self._add_text_terms(texts)
+
+    def index_titles(self, items: Iterable[tuple[str, str]]) -> None:
+        """Index (url, title) pairs, replacing earlier titles."""
+        texts = []
+        with self._lock, self._conn:
+            for url, title in items:
+                key = normalize_url(url)
+                self._conn.execute(
+                    "DELETE FROM search_docs WHERE url = ? AND kind = 'title'", (key,))
+                # The URL itself is searchable too (e.g. a video id)
+                text = f"{title} {key}"
+                self._conn.execute(
+                    "INSERT INTO search_docs (text, url, kind, label, ref)"
+                    " VALUES (?, ?, 'title', ?, NULL)",
+                    (text, key, title))
+                texts.append(text)
+        self._add_text_terms(texts)
+
+    # -- queries --------------------------------------------------------
+
+    def _similar_terms(self, word: str) -> list[str]:
+        grams = _trigrams(word)
+        counts: dict[str, int] = {}
+        for gram in grams:
+            for term in self._trigram_terms.get(gram, ()):
+                counts[term] = counts.get(term, 0) + 1
+        scored = []
+        for term, shared in counts.items():
+            score = 2 * shared / (len(grams) + len(_trigrams(term)))
+            if score >= FUZZY_MIN_SIMILARITY and not term.startswith(word):
+                scored.append((score, term))
+        scored.sort(reverse=True)
+        return [term for _score, term in scored[:FUZZY_MAX_TERMS]]
+
+    def _query(self, match: str, limit: int) -> list[SearchHit]:
+        # bm25 ranking scores every match; for very broad queries (short
+        # prefixes) skip it and return the first hits instead
+        order = ""
+        with self._lock:
+            matches = self._conn.execute(
+                "SELECT count(*) FROM (SELECT rowid FROM search_fts"
+                " WHERE search_fts MATCH ? LIMIT ?)",
+                (match, RANK_MAX_MATCHES + 1)).fetchone()[0]
+            if matches <= RANK_MAX_MATCHES:
+                order = " ORDER BY search_fts.rank"
+            rows = self._conn.execute(
+                "SELECT d.url, d.kind, d.text, d.label, d.ref"
+                " FROM search_fts JOIN search_docs d ON d.id = search_fts.rowid"
+                " WHERE search_fts MATCH ?" + order + " LIMIT ?",
+                (match, limit)).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Hits for all words of `query` (as prefixes), best first, then
+        fuzzy matches for misspelled words."""
+        words = _WORD.findall(query.lower())
+        if not words:
+            return []
+        prefix = " AND ".join(f'"{w}"*' for w in words)
+        hits = self._query(prefix, limit)
+        if len(hits) >= limit:
+            return hits
+        with self._lock:
+            expanded = [[w] + self._similar_terms(w) for w in words]
+        if all(len(alts) == 1 for alts in expanded):
+            return hits
+        fuzzy = " AND ".join(
+            "(" + " OR ".join([f'"{alts[0]}"*'] + [f'"{t}"' for t in alts[1:]]) + ")"
+            for alts in expanded)
+        seen = set(hits)
+        for hit in self._query(fuzzy, limit):
+            if hit not in seen and len(hits) < limit:
+                hits.append(hit)
+        return hits
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
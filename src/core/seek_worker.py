@@ -0,0 +1,99 @@
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+
+class SeekWorker:
+    """Single long-lived thread that issues seeks through a latest-wins slot.
+
+    Submitting replaces any request that has not started yet, so a burst of
+    boundary seeks collapses into the newest one and seeks can never overtake
+    each other. Jobs receive the perf_counter() time at which the request was
+    made; `record_latency` collects the delay until the seek is issued."""
+
+    LATENCY_SAMPLES = 256
+
+    def __init__(self, name: str = "seek-worker"):
+        self._cond = threading.Condition()
+        self._pending: Optional[tuple[Callable[[float], None], float]] = None
+        self._running = True
+        self._busy = False
+        self._dropped = 0
+        self._latencies: list[float] = []
+        self._latency_count = 0
+        self._latency_max = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable[[float], None],
+               requested_at: Optional[float] = None) -> None:
+        """Queue `job`, replacing a request that is still waiting."""
+        if requested_at is None:
+            requested_at = time.perf_counter()
+        with self._cond:
+            if not self._running:
+                return
+            if self._pending is not None:
+                self._dropped += 1
+            self._pending = (job, requested_at)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and self._running:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                job, requested_at = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                job(requested_at)
+            except Exception as e:
+                print(f"[SeekWorker] job error: {e}")
+                traceback.print_exc()
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no request is pending or running."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._pending is None and not self._busy, timeout)
+
+    def record_latency(self, requested_at: float) -> None:
+        """Record the time from `requested_at` until now (seek issue)."""
+        latency = time.perf_counter() - requested_at
+        with self._cond:
+            if len(self._latencies) >= self.LATENCY_SAMPLES:
+                self._latencies.pop(0)
+            self._latencies.append(latency)
+            self._latency_count += 1
+            self._latency_max = max(self._latency_max, latency)
+
+    def stats(self) -> dict:
+        """Seek latency summary in seconds over the recent samples."""
+        with self._cond:
+            if not self._latencies:
+                return {"count": 0, "dropped": self._dropped}
+            last = self._latencies[-1]
+            samples = sorted(self._latencies)
+            count, dropped, worst = self._latency_count, self._dropped, self._latency_max
+        return {
+            "count": count,
+            "dropped": dropped,
+            "last": last,
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": worst,
+        }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._running = False
+            self._pending = None
+            self._cond.notify_all()
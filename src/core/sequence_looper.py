@@ -1,8 +1,20 @@
+import math
 import threading
+import time
 import traceback
-from typing import Optional, Callable
+from contextlib import contextmanager
+from typing import NamedTuple, Optional, Callable
 from .marker_manager import MarkerManager, Segment
-from .events import EventBus
+from .events import ChangeBatcher, ChangeDiff, EventBus
+from .seek_worker import SeekWorker
+
+
+class ScheduleEntry(NamedTuple):
+    """A segment resolved against marker positions."""
+    start: float
+    end: float
+    trigger: float  # position at which the boundary fires
+    label: str
 
 
 class SequenceLooper:
@@ -10,7 +22,22 @@ class SequenceLooper:
     to trigger seeks at segment boundaries.
 
     Segments reference markers by immutable ID. Loop ranges are
-    normalized to min/max of the two marker positions."""
+    normalized to min/max of the two marker positions.
+
+    Segments may override tempo/transpose. The next segment's effect
+    parameters are prepared one boundary ahead and applied right before
+    its seek.
+
+    Segments are compiled into an immutable schedule whenever markers or
+    the sequence change; the schedule is swapped in whole, so the position
+    handler on mpv's thread reads it without locks or allocation.
+
+    All seeks (boundaries, start, jump_to) go through one SeekWorker, so a
+    newer seek replaces one still waiting and seeks stay in order.
+
+    Changes emit 'sequence_changed' (segments, current_index, diff); edits
+    made inside `batch()` are merged into a single event. Segment edits
+    report their inverse to the journal (see EditHistory)."""
 
     LOOP_SEQUENCE = "loop_sequence"
     LOOP_SINGLE = "loop_single"
@@ -26,20 +53,87 @@ class SequenceLooper:
         self._active: bool = False
         self._loop_mode: str = self.LOOP_SEQUENCE
         self._seek_callback: Optional[Callable[[float], None]] = None
+        self._effects = None  # AudioEffects, for per-segment overrides
+        self._prepared = None  # (index, Segment, PreparedEffects) for next boundary
+        self._schedule: tuple[Optional[ScheduleEntry], ...] = ()
+        self._trigger: float = math.inf  # boundary of the active segment
         self._lock = threading.RLock()
+        self._batcher = ChangeBatcher(self._flush_changes)
+        self._seek_worker = SeekWorker()
+        self._journal: Optional[Callable[[Callable, tuple], None]] = None
 
-        self._bus.on("position_changed", self._on_position_changed)
+        self._bus.on("position_changed", self._on_position_changed,
+                     lane=EventBus.REALTIME)
+        self._bus.on("markers_changed", self._on_markers_changed)
 
     def set_seek_callback(self, callback: Callable[[float], None]) -> None:
         self._seek_callback = callback
 
-    def _resolve_range(self, seg: Segment) -> Optional[tuple[float, float]]:
-        """Resolve a segment to (start_time, end_time), normalized min/max."""
-        m1 = self._markers.get_by_id(seg.start_marker_id)
-        m2 = self._markers.get_by_id(seg.end_marker_id)
-        if m1 is None or m2 is None:
-            return None
-        return (min(m1.position, m2.position), max(m1.position, m2.position))
+    def set_effects_controller(self, effects) -> None:
+        """Attach the AudioEffects instance that applies segment overrides."""
+        self._effects = effects
+
+    def set_journal(self, journal: Optional[Callable[[Callable, tuple], None]]) -> None:
+        """Set the callback that receives (undo_fn, args) for segment edits."""
+        self._journal = journal
+
+    def _log(self, undo_fn: Callable, *args) -> None:
+        if self._journal is not None:
+            self._journal(undo_fn, args)
+
+    def seek_stats(self) -> dict:
+        """Boundary/jump detection to seek issue latency, in seconds."""
+        return self._seek_worker.stats()
+
+    def wait_for_seeks(self, timeout: Optional[float] = None) -> bool:
+        """Block until requested seeks have been issued (for replay/tests)."""
+        return self._seek_worker.wait_idle(timeout)
+
+    def shutdown(self) -> None:
+        self.stop()
+        self._seek_worker.shutdown()
+
+    @contextmanager
+    def batch(self):
+        """Apply many edits under the lock and emit one sequence_changed."""
+        with self._lock, self._batcher.batch():
+            yield
+
+    def _flush_changes(self, diff: ChangeDiff) -> None:
+        with self._lock:
+            if not diff.empty:
+                self._compile()
+            self._bus.emit("sequence_changed", list(self._segments),
+                           self._current_index, diff)
+
+    def _compile(self) -> None:
+        """Resolve all segments into a new schedule. Called with lock held."""
+        entries = []
+        for seg in self._segments:
+            m1 = self._markers.get_by_id(seg.start_marker_id)
+            m2 = self._markers.get_by_id(seg.end_marker_id)
+            if m1 is None or m2 is None:
+                entries.append(None)
+                continue
+            start = min(m1.position, m2.position)
+            end = max(m1.position, m2.position)
+            entries.append(ScheduleEntry(start, end, end - self.SEEK_THRESHOLD,
+                                         f"{m1.label}{m2.label}"))
+        self._schedule = tuple(entries)
+        self._update_trigger()
+
+    def _update_trigger(self) -> None:
+        """Point the hot path at the active segment's boundary."""
+        schedule = self._schedule
+        index = self._current_index
+        if self._active and 0 <= index < len(schedule) and schedule[index]:
+            self._trigger = schedule[index].trigger
+        else:
+            self._trigger = math.inf
+
+    def _on_markers_changed(self, _markers, _diff=None) -> None:
+        with self._lock:
+            self._compile()
 
     def get_segment_label(self, seg: Segment) -> str:
         """Get display label like 'AB' from marker IDs."""
@@ -50,45 +144,82 @@ class SequenceLooper:
         return f"{l1}{l2}"
 
     def set_segments(self, segments: list[Segment]) -> None:
+        self._replace_segments(segments, self._loop_mode)
+
+    def _replace_segments(self, segments, loop_mode: str) -> None:
         with self._lock:
+            self._log(self._replace_segments, tuple(self._segments), self._loop_mode)
             self._segments = list(segments)
+            self._loop_mode = loop_mode
             self._current_index = 0
-            self._bus.emit("sequence_changed", self._segments, self._current_index)
+            self._batcher.record(reset=True)
 
     def add_segment(self, start_marker_id: str, end_marker_id: str,
-                    display_name: str = "") -> None:
+                    display_name: str = "", tempo: Optional[float] = None,
+                    semitones: Optional[int] = None) -> None:
         seg = Segment(start_marker_id=start_marker_id,
                       end_marker_id=end_marker_id,
-                      display_name=display_name)
+                      display_name=display_name,
+                      tempo=tempo, semitones=semitones)
+        with self._lock:
+            self._insert_segment(len(self._segments), seg)
+
+    def _insert_segment(self, index: int, seg: Segment) -> None:
+        with self._lock:
+            self._segments.insert(index, seg)
+            if self._active and index <= self._current_index < len(self._segments) - 1:
+                self._current_index += 1
+            self._log(self._remove_segment_by_id, seg.id)
+            self._batcher.record(added=(seg.id,))
+
+    def _remove_segment_by_id(self, segment_id: str) -> None:
+        with self._lock:
+            for i, seg in enumerate(self._segments):
+                if seg.id == segment_id:
+                    self.remove_segment(i)
+                    return
+
+    def set_segment_effects(self, index: int, tempo: Optional[float],
+                            semitones: Optional[int]) -> None:
+        """Set or clear (None) the tempo/transpose override of a segment."""
         with self._lock:
-            self._segments.append(seg)
-            self._bus.emit("sequence_changed", self._segments, self._current_index)
+            if 0 <= index < len(self._segments):
+                seg = self._segments[index]
+                self._log(self.set_segment_effects, index, seg.tempo, seg.semitones)
+                seg.tempo = tempo
+                seg.semitones = semitones
+                self._prepared = None
+                self._batcher.record(updated=(seg.id,))
+
+    def has_pitch_overrides(self) -> bool:
+        with self._lock:
+            return any(s.semitones is not None for s in self._segments)
 
     def remove_segment(self, index: int) -> None:
         with self._lock:
             if 0 <= index < len(self._segments):
-                self._segments.pop(index)
+                seg = self._segments.pop(index)
                 if self._current_index >= len(self._segments) and self._segments:
                     self._current_index = 0
-                self._bus.emit("sequence_changed", self._segments, self._current_index)
+                self._log(self._insert_segment, index, seg)
+                self._batcher.record(removed=(seg.id,))
 
     def remove_segments_referencing(self, marker_id: str) -> None:
         """Remove all segments that reference the given marker ID."""
         with self._lock:
-            self._segments = [
-                s for s in self._segments
-                if s.start_marker_id != marker_id and s.end_marker_id != marker_id
-            ]
-            if self._current_index >= len(self._segments) and self._segments:
-                self._current_index = 0
-            self._bus.emit("sequence_changed", self._segments, self._current_index)
+            # Highest index first, so undo reinserts in ascending order
+            for i in range(len(self._segments) - 1, -1, -1):
+                s = self._segments[i]
+                if s.start_marker_id == marker_id or s.end_marker_id == marker_id:
+                    self.remove_segment(i)
 
     def reorder(self, old_index: int, new_index: int) -> None:
         with self._lock:
             if 0 <= old_index < len(self._segments) and 0 <= new_index < len(self._segments):
                 seg = self._segments.pop(old_index)
                 self._segments.insert(new_index, seg)
-                self._bus.emit("sequence_changed", self._segments, self._current_index)
+                self._log(self.reorder, new_index, old_index)
+                self._batcher.record(updated=(seg.id,))
 
     def start(self) -> None:
         with self._lock:
@@ -97,9 +228,10 @@ class SequenceLooper:
                 return
             self._active = True
             self._current_index = 0
+            self._trigger = math.inf  # until the seek is issued
             print(f"[SequenceLooper] start: active, index=0, segments={len(self._segments)}")
         self._bus.emit("segment_changed", self._current_index)
-        self._seek_to_current_start()
+        self._request_seek(0)
 
     def jump_to(self, index: int) -> None:
         """Jump to a specific segment and continue playback from there."""
@@ -108,16 +240,22 @@ class SequenceLooper:
                 return
             self._active = True
             self._current_index = index
+            self._trigger = math.inf
         self._bus.emit("segment_changed", self._current_index)
-        self._seek_to_current_start()
+        self._request_seek(index)
 
     def stop(self) -> None:
         with self._lock:
             was_active = self._active
             self._active = False
+            self._prepared = None
+            self._update_trigger()
         if was_active:
+            if self._effects:
+                self._effects.apply_prepared(self._effects.prepare())
             print("[SequenceLooper] stop: deactivated")
-            self._bus.emit("sequence_changed", list(self._segments), self._current_index)
+            with self._lock:
+                self._batcher.record()
         else:
             print("[SequenceLooper] stop: already inactive")
 
@@ -131,8 +269,9 @@ class SequenceLooper:
 
     @loop_mode.setter
     def loop_mode(self, mode: str) -> None:
-        self._loop_mode = mode
-        self._bus.emit("sequence_changed", list(self._segments), self._current_index)
+        with self._lock:
+            self._loop_mode = mode
+            self._batcher.record()
 
     def get_segments(self) -> list[Segment]:
         with self._lock:
@@ -144,78 +283,126 @@ class SequenceLooper:
     def to_dict(self) -> dict:
         with self._lock:
             return {
-                "segments": [
-                    {
-                        "start_marker_id": s.start_marker_id,
-                        "end_marker_id": s.end_marker_id,
-                        "display_name": s.display_name,
-                    }
-                    for s in self._segments
-                ],
+                "segments": [self._segment_to_dict(s) for s in self._segments],
                 "loop_mode": self._loop_mode,
             }
 
+    @staticmethod
+    def _segment_to_dict(seg: Segment) -> dict:
+        d = {
+            "start_marker_id": seg.start_marker_id,
+            "end_marker_id": seg.end_marker_id,
+            "display_name": seg.display_name,
+        }
+        # Overrides are only written when set to keep saved files compact
+        if seg.tempo is not None:
+            d["tempo"] = seg.tempo
+        if seg.semitones is not None:
+            d["semitones"] = seg.semitones
+        return d
+
     def from_dict(self, data: dict) -> None:
-        with self._lock:
-            self._segments = []
-            for d in data.get("segments", []):
-                self._segments.append(Segment(
-                    start_marker_id=d["start_marker_id"],
-                    end_marker_id=d["end_marker_id"],
-                    display_name=d.get("display_name", ""),
-                ))
-            self._loop_mode = data.get("loop_mode", self.LOOP_SEQUENCE)
-            self._current_index = 0
-        self._bus.emit("sequence_changed", list(self._segments), self._current_index)
+        segments = [
+            Segment(
+                start_marker_id=d["start_marker_id"],
+                end_marker_id=d["end_marker_id"],
+                display_name=d.get("display_name", ""),
+                tempo=d.get("tempo"),
+                semitones=d.get("semitones"),
+            )
+            for d in data.get("segments", [])
+        ]
+        self._replace_segments(segments, data.get("loop_mode", self.LOOP_SEQUENCE))
 
     def _on_position_changed(self, position: float) -> None:
+        # Fast path: one attribute read and a float compare per event.
+        # The trigger is inf while inactive or while a boundary seek is pending.
+        if position < self._trigger:
+            return
         with self._lock:
-            if not self._active or not self._segments:
+            if not self._active or position < self._trigger:
                 return
+            entry = self._schedule[self._current_index]
+            print(f"[SequenceLooper] boundary reached: {entry.label} end={entry.end:.2f} pos={position:.2f}")
+            self._advance_segment(time.perf_counter())
 
-            segment = self._segments[self._current_index]
-            time_range = self._resolve_range(segment)
-            if time_range is None:
-                return
-
-            _, end_time = time_range
-            if position >= end_time - self.SEEK_THRESHOLD:
-                label = self.get_segment_label(segment)
-                print(f"[SequenceLooper] boundary reached: {label} end={end_time:.2f} pos={position:.2f}")
-                self._advance_segment()
+    def _next_index(self, index: int) -> Optional[int]:
+        """Index that follows `index` under the current loop mode."""
+        if self._loop_mode == self.LOOP_SINGLE:
+            return index
+        if self._loop_mode == self.PLAY_ONCE:
+            return index + 1 if index + 1 < len(self._segments) else None
+        return (index + 1) % len(self._segments)
 
-    def _advance_segment(self) -> None:
+    def _advance_segment(self, detected_at: float) -> None:
         """Move to next segment. Called with lock held."""
-        if self._loop_mode == self.LOOP_SINGLE:
-            pass  # stay on current, re-seek to start
-        elif self._loop_mode == self.LOOP_SEQUENCE:
-            self._current_index = (self._current_index + 1) % len(self._segments)
-        elif self._loop_mode == self.PLAY_ONCE:
-            if self._current_index + 1 >= len(self._segments):
-                self._active = False
-                print("[SequenceLooper] play_once: finished all segments")
-                self._bus.emit("sequence_changed", list(self._segments), self._current_index)
-                return
-            self._current_index += 1
+        next_index = self._next_index(self._current_index)
+        self._trigger = math.inf  # until the seek to the next segment is issued
+        if next_index is None:
+            self._active = False
+            print("[SequenceLooper] play_once: finished all segments")
+            self._batcher.record()
+            return
+        self._current_index = next_index
 
-        seg = self._segments[self._current_index]
-        label = self.get_segment_label(seg)
+        entry = self._schedule[self._current_index]
+        label = entry.label if entry else "??"
         print(f"[SequenceLooper] advance to index={self._current_index} ({label})")
         self._bus.emit("segment_changed", self._current_index)
-        threading.Thread(target=self._seek_to_current_start, daemon=True).start()
+        self._request_seek(self._current_index, detected_at)
 
-    def _seek_to_current_start(self) -> None:
+    def _entry_range(self, index: int) -> Optional[tuple[float, float]]:
+        entry = self._schedule[index] if index < len(self._schedule) else None
+        return (entry.start, entry.end) if entry else None
+
+    def _prepare_effects(self, index: int, segment: Segment):
+        """Return prepared effects for `segment`, reusing the ones computed
+        at the previous boundary when they still match."""
+        time_range = self._entry_range(index)
+        prepared = self._prepared
+        if (prepared and prepared[0] == index and prepared[1] is segment
+                and prepared[2].time_range == time_range):
+            return prepared[2]
+        return self._effects.prepare(segment.tempo, segment.semitones, time_range)
+
+    def _prepare_next(self, index: int) -> None:
+        """Resolve the effects of the segment after `index` ahead of time."""
         with self._lock:
-            if not self._segments:
+            if not self._effects or not self._segments:
                 return
-            segment = self._segments[self._current_index]
-        time_range = self._resolve_range(segment)
-        if time_range and self._seek_callback:
-            start_time, _ = time_range
-            label = self.get_segment_label(segment)
-            print(f"[SequenceLooper] seeking to {label} start={start_time:.2f}")
+            next_index = self._next_index(index)
+            if next_index is None:
+                self._prepared = None
+                return
+            seg = self._segments[next_index]
+            self._prepared = (next_index, seg, self._effects.prepare(
+                seg.tempo, seg.semitones, self._entry_range(next_index)))
+
+    def _request_seek(self, index: int, requested_at: Optional[float] = None) -> None:
+        self._seek_worker.submit(
+            lambda t: self._seek_to_start(index, t), requested_at)
+
+    def _seek_to_start(self, index: int, requested_at: float) -> None:
+        """Seek to the start of segment `index`. Runs on the seek worker."""
+        with self._lock:
+            # A later advance, jump or stop made this request stale
+            if (not self._active or index != self._current_index
+                    or index >= len(self._segments)):
+                return
+            segment = self._segments[index]
+            entry = self._schedule[index] if index < len(self._schedule) else None
+            effects = self._prepare_effects(index, segment) if self._effects else None
+        if entry and self._seek_callback:
+            print(f"[SequenceLooper] seeking to {entry.label} start={entry.start:.2f}")
             try:
-                self._seek_callback(start_time)
+                if effects is not None:
+                    self._effects.apply_prepared(effects)
+                self._seek_worker.record_latency(requested_at)
+                self._seek_callback(entry.start)
             except Exception as e:
                 print(f"[SequenceLooper] seek error: {e}")
                 traceback.print_exc()
+        with self._lock:
+            if index == self._current_index:
+                self._update_trigger()
+        self._prepare_next(index)
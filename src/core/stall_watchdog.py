@@ -0,0 +1,92 @@
+import datetime
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from .event_stats import LatencyHistogram
+
+
+class StallWatchdog:
+    """Measures Tk event-loop latency and reports stalls.
+
+    A heartbeat scheduled with after() every INTERVAL_MS records how late
+    it ran. A helper thread watches the last heartbeat; when the loop has
+    not turned for THRESHOLD seconds it captures the main thread's stack,
+    and when the loop recovers it logs the stall's start time, duration
+    and that stack."""
+
+    INTERVAL_MS = 50
+    THRESHOLD = 0.2  # seconds without a heartbeat that count as a stall
+
+    def __init__(self, root, log_path: Optional[str] = None):
+        self._root = root
+        self._log_path = log_path
+        self._main_ident = threading.main_thread().ident
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()  # heartbeat lateness
+        self.stalls = 0
+        self.stalled_total = 0.0
+        self.stalled_max = 0.0
+        self._last_beat = time.monotonic()
+        self._stack: Optional[list[str]] = None  # captured during the current stall
+        self._running = True
+        root.after(self.INTERVAL_MS, self._beat, self._last_beat)
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog",
+                                        daemon=True)
+        self._thread.start()
+
+    def _beat(self, scheduled: float) -> None:
+        now = time.monotonic()
+        late = max(0.0, now - scheduled - self.INTERVAL_MS / 1000)
+        with self._lock:
+            gap = now - self._last_beat
+            self._last_beat = now
+            stack, self._stack = self._stack, None
+            self.latency.add(late)
+        if stack is not None:
+            self._report(now - gap, gap - self.INTERVAL_MS / 1000, stack)
+        if self._running:
+            self._root.after(self.INTERVAL_MS, self._beat, now)
+
+    def _watch(self) -> None:
+        while self._running:
+            time.sleep(self.INTERVAL_MS / 2000)
+            with self._lock:
+                if (self._stack is None
+                        and time.monotonic() - self._last_beat > self.THRESHOLD):
+                    frame = sys._current_frames().get(self._main_ident)
+                    self._stack = traceback.format_stack(frame) if frame else []
+
+    def _report(self, started: float, duration: float, stack: list[str]) -> None:
+        with self._lock:
+            self.stalls += 1
+            self.stalled_total += duration
+            self.stalled_max = max(self.stalled_max, duration)
+            count = self.stalls
+        wall = datetime.datetime.now() - datetime.timedelta(
+            seconds=time.monotonic() - started)
+        lines = [f"[StallWatchdog] {wall:%Y-%m-%d %H:%M:%S.%f} main loop stalled "
+                 f"{duration * 1000:.0f} ms (stall #{count}); main thread was in:"]
+        lines.extend("  " + line.rstrip() for line in "".join(stack[-12:]).splitlines())
+        text = "\n".join(lines)
+        print(text)
+        if self._log_path:
+            try:
+                with open(self._log_path, "a", encoding="utf-8") as f:
+                    f.write(text + "\n")
+            except OSError as e:
+                print(f"[StallWatchdog] log write error: {e}")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stalls": self.stalls,
+                "stalled_total_s": self.stalled_total,
+                "stalled_max_s": self.stalled_max,
+                "heartbeat_lateness": self.latency.to_dict(),
+            }
+
+    def stop(self) -> None:
+        self._running = False
+        self._thread.join()
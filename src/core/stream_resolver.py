@@ -1,4 +1,3 @@
-import yt_dlp
 from dataclasses import dataclass
 from typing import Optional
 
@@ -10,19 +9,42 @@ class StreamInfo:
     duration: Optional[float]
 
 
+def _yt_dlp():
+    # yt-dlp takes a large part of a second to import; load it on first use
+    import yt_dlp
+    return yt_dlp
+
+
 class StreamResolver:
     """Extracts metadata from YouTube and other sites using yt-dlp."""
 
+    def preload(self) -> None:
+        """Import yt-dlp ahead of the first resolve (call off the main thread)."""
+        _yt_dlp()
+
     def resolve(self, url: str) -> StreamInfo:
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
             'skip_download': True,
         }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with _yt_dlp().YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=False)
             return StreamInfo(
                 url=url,
                 title=info.get('title', 'Unknown'),
                 duration=info.get('duration'),
             )
+
+    def resolve_stream_url(self, url: str, format_spec: str) -> str:
+        """Return a direct URL of the stream selected by `format_spec`,
+        for analysis decoding."""
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'format': format_spec,
+        }
+        with _yt_dlp().YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            return info['url']
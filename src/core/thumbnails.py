@@ -0,0 +1,162 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import as_completed
+from typing import Optional
+
+import numpy as np
+from .analysis_pool import AnalysisPool
+from .audio_decode import resolve_source
+from .events import EventBus
+from .media_cache import MediaCache
+
+
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+VIDEO_FORMAT = "bestvideo[height<=480]/best[height<=480]/best"
+
+
+def extract_thumbnails(source: str, start: float, count: int,
+                       interval: float) -> np.ndarray:
+    """Worker entry point: `count` RGB thumbnails every `interval` seconds
+    from `start`, letterboxed to THUMB_WIDTH x THUMB_HEIGHT."""
+    vf = (f"fps=1/{interval},"
+          f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease,"
+          f"pad={THUMB_WIDTH}:{THUMB_HEIGHT}:(ow-iw)/2:(oh-ih)/2")
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-i", source,
+        "-an", "-vf", vf, "-frames:v", str(count),
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+    ]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg thumbnail extraction failed: {err}")
+    frame_bytes = THUMB_WIDTH * THUMB_HEIGHT * 3
+    n = len(proc.stdout) // frame_bytes
+    return np.frombuffer(proc.stdout[:n * frame_bytes], dtype=np.uint8).reshape(
+        n, THUMB_HEIGHT, THUMB_WIDTH, 3
+    )
+
+
+class ThumbnailGenerator:
+    """Timeline preview thumbnails from a per-media sprite sheet.
+
+    The sheet holds one frame every INTERVAL seconds. Slices of it are
+    extracted in parallel by the analysis pool and written into a .npy file
+    in the media cache, which is then memory-mapped for lookups. Previews
+    never touch the main player. Publishes 'thumbnails_changed' (ready)."""
+
+    CACHE_NAME = "thumbs.npy"
+    INTERVAL = 10.0
+    FRAMES_PER_TASK = 30
+
+    def __init__(self, event_bus: EventBus, cache: MediaCache, pool: AnalysisPool):
+        self._bus = event_bus
+        self._cache = cache
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending_url: Optional[str] = None
+        self._sheet: Optional[np.ndarray] = None
+
+        self._bus.on("duration_changed", self._on_duration_changed)
+
+    def request(self, url: str, duration: Optional[float] = None) -> None:
+        """Load the cached sheet for `url` or generate it. Without a known
+        duration generation waits for the player's duration_changed."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._pending_url = None
+        self._sheet = None
+        self._bus.emit("thumbnails_changed", False)
+
+        path = self._cache.lookup(url, self.CACHE_NAME)
+        if path is not None and self._load(path):
+            return
+        if duration:
+            self._start(url, duration, generation)
+        else:
+            with self._lock:
+                self._pending_url = url
+
+    def _on_duration_changed(self, duration: float) -> None:
+        with self._lock:
+            url, self._pending_url = self._pending_url, None
+            generation = self._generation
+        if url and duration:
+            self._start(url, duration, generation)
+
+    def _start(self, url: str, duration: float, generation: int) -> None:
+        threading.Thread(
+            target=self._generate, args=(url, duration, generation), daemon=True
+        ).start()
+
+    def _generate(self, url: str, duration: float, generation: int) -> None:
+        count = int(duration // self.INTERVAL) + 1
+        path = self._cache.path_for(url, self.CACHE_NAME)
+        tmp = f"{path}.{generation}.tmp"  # one per generation: A->B->A overlaps
+        futures = {}
+        sheet = None
+        try:
+            source = self._pool.submit(resolve_source, url, VIDEO_FORMAT).result()
+            try:
+                sheet = np.lib.format.open_memmap(
+                    tmp, mode="w+", dtype=np.uint8,
+                    shape=(count, THUMB_HEIGHT, THUMB_WIDTH, 3),
+                )
+                futures = {
+                    self._pool.submit(
+                        extract_thumbnails, source, i * self.INTERVAL,
+                        min(self.FRAMES_PER_TASK, count - i), self.INTERVAL,
+                    ): i
+                    for i in range(0, count, self.FRAMES_PER_TASK)
+                }
+                for future in as_completed(futures):
+                    if generation != self._generation:
+                        for f in futures:
+                            f.cancel()
+                        break
+                    frames = future.result()
+                    i = futures[future]
+                    sheet[i:i + len(frames)] = frames
+                sheet.flush()
+            finally:
+                del sheet  # release the memmap before tmp is moved or removed
+            # Under the lock so a request() for another URL cannot slip in
+            # between the check and publishing this sheet
+            with self._lock:
+                if generation == self._generation:
+                    os.replace(tmp, path)
+                    self._cache.commit(path)
+                    self._load(path)
+                    return
+        except Exception as e:
+            for f in futures:
+                f.cancel()
+            print(f"[ThumbnailGenerator] generation failed: {e}")
+
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+    def _load(self, path: str) -> bool:
+        try:
+            sheet = np.load(path, mmap_mode="r")
+        except Exception as e:
+            print(f"[ThumbnailGenerator] load error: {e}")
+            return False
+        self._sheet = sheet
+        self._bus.emit("thumbnails_changed", True)
+        return True
+
+    def frame_at(self, position: float) -> Optional[np.ndarray]:
+        """RGB thumbnail (H, W, 3) nearest to `position`, or None."""
+        sheet = self._sheet
+        if sheet is None or len(sheet) == 0:
+            return None
+        i = int(round(position / self.INTERVAL))
+        return sheet[max(0, min(len(sheet) - 1, i))]
@@ -0,0 +1,213 @@
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from .events import EventBus
+from .media_cache import MediaCache
+
+
+WAVEFORM_SAMPLE_RATE = 8000
+BASE_BLOCK = 128  # samples per level-0 bin (16 ms at 8 kHz)
+LEVEL_FACTOR = 4  # bins merged per pyramid level
+MIN_LEVEL_BINS = 64  # stop adding levels below this many bins
+
+
+def block_peaks(samples: np.ndarray, block: int) -> tuple[np.ndarray, np.ndarray]:
+    """Min/max of each `block`-sample block. A trailing partial block
+    gets its own bin."""
+    n = len(samples)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return empty, empty
+    pad = (-n) % block
+    if pad:
+        samples = np.concatenate([samples, np.repeat(samples[-1:], pad)])
+    blocks = samples.reshape(-1, block)
+    return blocks.min(axis=1), blocks.max(axis=1)
+
+
+class PeakPyramid:
+    """Multi-resolution min/max peaks of an audio track.
+
+    Level 0 holds one bin per BASE_BLOCK samples; each further level merges
+    LEVEL_FACTOR bins of the previous one, so any zoom can be drawn from a
+    level with roughly one bin per pixel."""
+
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray,
+                 sample_rate: int = WAVEFORM_SAMPLE_RATE,
+                 block: int = BASE_BLOCK):
+        self.sample_rate = sample_rate
+        self.block = block
+        self.levels: list[tuple[np.ndarray, np.ndarray]] = [
+            (mins.astype(np.float32, copy=False), maxs.astype(np.float32, copy=False))
+        ]
+        while len(self.levels[-1][0]) > MIN_LEVEL_BINS * LEVEL_FACTOR:
+            lo, hi = self.levels[-1]
+            self.levels.append((block_peaks(lo, LEVEL_FACTOR)[0],
+                                block_peaks(hi, LEVEL_FACTOR)[1]))
+        self.peak = float(max(np.abs(mins).max(initial=0.0),
+                              np.abs(maxs).max(initial=0.0)))
+
+    @property
+    def duration(self) -> float:
+        return len(self.levels[0][0]) * self.block / self.sample_rate
+
+    def seconds_per_bin(self, level: int) -> float:
+        return self.block * LEVEL_FACTOR ** level / self.sample_rate
+
+    def level_for(self, seconds_per_pixel: float) -> int:
+        """Coarsest level that still has at least one bin per pixel."""
+        level = 0
+        while (level + 1 < len(self.levels)
+               and self.seconds_per_bin(level + 1) <= seconds_per_pixel):
+            level += 1
+        return level
+
+    def envelope(self, t0: float, t1: float,
+                 pixels: int) -> tuple[np.ndarray, np.ndarray]:
+        """Per-pixel (min, max) over [t0, t1]. Pixels past the analyzed
+        range are zero, which is how partial results are drawn."""
+        out_lo = np.zeros(pixels, dtype=np.float32)
+        out_hi = np.zeros(pixels, dtype=np.float32)
+        if pixels <= 0 or t1 <= t0:
+            return out_lo, out_hi
+        level = self.level_for((t1 - t0) / pixels)
+        lo, hi = self.levels[level]
+        spb = self.seconds_per_bin(level)
+        edges = np.linspace(t0 / spb, t1 / spb, pixels + 1).astype(np.int64)
+        starts = np.maximum(edges[:-1], 0)
+        valid = np.nonzero(starts < len(lo))[0]
+        if len(valid) == 0:
+            return out_lo, out_hi
+        starts = starts[valid]
+        first = starts[0]
+        last = min(len(lo), max(edges[valid[-1] + 1], starts[-1] + 1))
+        # When zoomed past level-0 resolution several pixels share a start;
+        # reduceat then yields that single bin, which is what we want.
+        offsets = starts - first
+        out_lo[valid] = np.minimum.reduceat(lo[first:last], offsets)
+        out_hi[valid] = np.maximum.reduceat(hi[first:last], offsets)
+        return out_lo, out_hi
+
+    def to_arrays(self) -> dict:
+        lo, hi = self.levels[0]
+        return {
+            "mins": lo, "maxs": hi,
+            "meta": np.array([self.sample_rate, self.block], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, data: dict) -> 'PeakPyramid':
+        sample_rate, block = (int(v) for v in data["meta"])
+        return cls(data["mins"], data["maxs"], sample_rate, block)
+
+
+def _peaks_worker(url: str, out: multiprocessing.Queue) -> None:
+    """Worker process: decode audio and stream level-0 peaks chunk by chunk."""
+    try:
+        from .audio_decode import decode_audio, resolve_source
+        source = resolve_source(url)
+        for chunk in decode_audio(source, WAVEFORM_SAMPLE_RATE):
+            out.put(("peaks",) + block_peaks(chunk, BASE_BLOCK))
+        out.put(("done",))
+    except Exception as e:
+        out.put(("error", str(e)))
+
+
+class WaveformAnalyzer:
+    """Builds the waveform peak pyramid of the loaded media.
+
+    Decoding runs in a separate process; a collector thread assembles the
+    peaks, publishes partial pyramids via 'waveform_changed'
+    (pyramid, complete) and stores the final one in the media cache."""
+
+    CACHE_NAME = "waveform.npz"
+    EMIT_INTERVAL = 0.5  # seconds between partial updates
+
+    def __init__(self, event_bus: EventBus, cache: MediaCache):
+        self._bus = event_bus
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._process = None
+        self._generation = 0
+
+    def request(self, url: str) -> None:
+        """Start analysis for `url`, replacing any running job."""
+        self.cancel()
+        with self._lock:
+            generation = self._generation
+        self._bus.emit("waveform_changed", None, False)
+
+        cached = self._cache.load_arrays(url, self.CACHE_NAME)
+        if cached is not None:
+            try:
+                self._bus.emit("waveform_changed",
+                               PeakPyramid.from_arrays(cached), True)
+                return
+            except Exception as e:
+                print(f"[WaveformAnalyzer] bad cache entry: {e}")
+
+        ctx = multiprocessing.get_context("spawn")
+        out = ctx.Queue()
+        proc = ctx.Process(target=_peaks_worker, args=(url, out), daemon=True)
+        with self._lock:
+            if generation != self._generation:
+                return
+            proc.start()
+            self._process = proc
+        threading.Thread(
+            target=self._collect, args=(url, proc, out, generation), daemon=True
+        ).start()
+
+    def _collect(self, url: str, proc, out, generation: int) -> None:
+        mins: list[np.ndarray] = []
+        maxs: list[np.ndarray] = []
+        last_emit = time.monotonic()
+        while generation == self._generation:
+            try:
+                msg = out.get(timeout=0.5)
+            except queue.Empty:
+                if not proc.is_alive():
+                    print("[WaveformAnalyzer] worker exited unexpectedly")
+                    break
+                continue
+
+            kind = msg[0]
+            if kind == "peaks":
+                mins.append(msg[1])
+                maxs.append(msg[2])
+                now = time.monotonic()
+                if now - last_emit >= self.EMIT_INTERVAL:
+                    last_emit = now
+                    self._publish(mins, maxs, False, generation)
+            elif kind == "done":
+                pyramid = self._publish(mins, maxs, True, generation)
+                if pyramid is not None:
+                    self._cache.save_arrays(url, self.CACHE_NAME,
+                                            **pyramid.to_arrays())
+                break
+            else:
+                print(f"[WaveformAnalyzer] analysis failed: {msg[1]}")
+                break
+        proc.join(timeout=1.0)
+
+    def _publish(self, mins, maxs, complete: bool,
+                 generation: int) -> Optional[PeakPyramid]:
+        if not mins or generation != self._generation:
+            return None
+        pyramid = PeakPyramid(np.concatenate(mins), np.concatenate(maxs))
+        self._bus.emit("waveform_changed", pyramid, complete)
+        return pyramid
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._generation += 1
+            proc, self._process = self._process, None
+        if proc is not None and proc.is_alive():
+            proc.terminate()
+
+    def shutdown(self) -> None:
+        self.cancel()
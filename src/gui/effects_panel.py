@@ -62,8 +62,16 @@ class EffectsPanel(ctk.CTkFrame):
         self.transpose_label = ctk.CTkLabel(transpose_frame, text="0 st", width=60)
         self.transpose_label.pack(side="left")
 
-        # Reset
-        ctk.CTkButton(self, text="Reset Effects", width=120, command=self._reset).pack(pady=5)
+        # Reset + loudness normalization
+        bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
+        bottom_frame.pack(pady=5)
+        ctk.CTkButton(bottom_frame, text="Reset Effects", width=120,
+                      command=self._reset).pack(side="left", padx=5)
+        self.normalize_var = ctk.BooleanVar(value=app.audio_effects.normalize)
+        ctk.CTkCheckBox(
+            bottom_frame, text="Normalize loudness", variable=self.normalize_var,
+            command=self._on_normalize_toggled
+        ).pack(side="left", padx=5)
 
     def _set_tempo_preset(self, speed: float) -> None:
         self.app.audio_effects.tempo = speed
@@ -99,6 +107,9 @@ class EffectsPanel(ctk.CTkFrame):
         sign = "+" if semitones > 0 else ""
         self.transpose_label.configure(text=f"{sign}{semitones} st")
 
+    def _on_normalize_toggled(self) -> None:
+        self.app.audio_effects.normalize = bool(self.normalize_var.get())
+
     def _reset(self) -> None:
         self.app.audio_effects.reset()
         self.tempo_slider.set(1.0)
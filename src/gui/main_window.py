@@ -4,9 +4,6 @@ from .url_bar import UrlBar
 from .video_frame import VideoFrame
 from .timeline_canvas import TimelineCanvas
 from .transport_bar import TransportBar
-from .marker_panel import MarkerPanel
-from .sequence_editor import SequenceEditor
-from .effects_panel import EffectsPanel
 
 
 class MainWindow(ctk.CTk):
@@ -49,22 +46,12 @@ class MainWindow(ctk.CTk):
 
         self.paned.add(self.top_pane, minsize=150, stretch="always")
 
-        # Bottom pane: Marker panel + Sequence editor + Effects
+        # Bottom pane: Marker panel + Sequence editor + Effects, filled by
+        # build_panels() once the first frame is on screen
         self.bottom_pane = ctk.CTkFrame(self.paned, fg_color="transparent")
-
-        panels_frame = ctk.CTkFrame(self.bottom_pane)
-        panels_frame.pack(fill="both", expand=True, pady=2)
-        panels_frame.grid_columnconfigure(0, weight=1)
-        panels_frame.grid_columnconfigure(1, weight=1)
-
-        self.marker_panel = MarkerPanel(panels_frame, app)
-        self.marker_panel.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-
-        self.sequence_editor = SequenceEditor(panels_frame, app)
-        self.sequence_editor.grid(row=0, column=1, sticky="nsew", padx=2, pady=2)
-
-        self.effects_panel = EffectsPanel(self.bottom_pane, app)
-        self.effects_panel.pack(fill="x", pady=5)
+        self.marker_panel = None
+        self.sequence_editor = None
+        self.effects_panel = None
 
         self.paned.add(self.bottom_pane, minsize=100, stretch="never")
 
@@ -116,7 +103,33 @@ class MainWindow(ctk.CTk):
         # Looper: Ctrl+L (L is now YouTube-style forward)
         self.bind("<Control-l>", lambda e: self._on_key_looper())
         self.bind("<Escape>", lambda e: self._on_escape())
+        # Undo / redo marker and segment edits
+        self.bind("<Control-z>", lambda e: self._on_key_undo())
+        self.bind("<Control-y>", lambda e: self._on_key_redo())
+        self.bind("<Control-Z>", lambda e: self._on_key_redo())
         self.bind("<Double-Button-1>", lambda e: self._on_double_click(e))
+        # Sampling profiler on/off (writes a flamegraph .folded file)
+        self.bind("<Control-P>", lambda e: self.app.toggle_profiler())
+
+    def build_panels(self) -> None:
+        """Create the bottom-pane panels (deferred to shorten startup)."""
+        from .marker_panel import MarkerPanel
+        from .sequence_editor import SequenceEditor
+        from .effects_panel import EffectsPanel
+
+        panels_frame = ctk.CTkFrame(self.bottom_pane)
+        panels_frame.pack(fill="both", expand=True, pady=2)
+        panels_frame.grid_columnconfigure(0, weight=1)
+        panels_frame.grid_columnconfigure(1, weight=1)
+
+        self.marker_panel = MarkerPanel(panels_frame, self.app)
+        self.marker_panel.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
+
+        self.sequence_editor = SequenceEditor(panels_frame, self.app)
+        self.sequence_editor.grid(row=0, column=1, sticky="nsew", padx=2, pady=2)
+
+        self.effects_panel = EffectsPanel(self.bottom_pane, self.app)
+        self.effects_panel.pack(fill="x", pady=5)
 
     def toggle_fullscreen(self) -> None:
         """Toggle fullscreen mode. Hides all UI except video in fullscreen."""
@@ -194,6 +207,8 @@ class MainWindow(ctk.CTk):
         new_val = self.app.audio_effects.tempo + delta
         self.app.audio_effects.tempo = new_val
         tempo = self.app.audio_effects.tempo
+        if self.effects_panel is None:
+            return
         self.effects_panel.tempo_slider.set(tempo)
         self.effects_panel.tempo_label.configure(text=f"{tempo:.2f}x")
         self.effects_panel._update_preset_highlight(tempo)
@@ -203,6 +218,8 @@ class MainWindow(ctk.CTk):
             return
         new_val = self.app.audio_effects.semitones + delta
         self.app.audio_effects.semitones = new_val
+        if self.effects_panel is None:
+            return
         self.effects_panel.transpose_slider.set(self.app.audio_effects.semitones)
         s = self.app.audio_effects.semitones
         sign = "+" if s > 0 else ""
@@ -240,6 +257,16 @@ class MainWindow(ctk.CTk):
             return
         self.app.add_marker_at_current()
 
+    def _on_key_undo(self) -> None:
+        if self._focus_on_entry():
+            return
+        self.app.edit_history.undo()
+
+    def _on_key_redo(self) -> None:
+        if self._focus_on_entry():
+            return
+        self.app.edit_history.redo()
+
     def _on_key_looper(self) -> None:
         if self._focus_on_entry():
             return
@@ -1,16 +1,89 @@
+import math
 import customtkinter as ctk
+from ..core.events import EventBus
 from ..utils.time_fmt import seconds_to_mmss
 
 
+class _MarkerRow:
+    """Widgets of one list row, rebound to whichever marker scrolls into
+    it. Each setter touches Tk only when the shown value changes."""
+
+    def __init__(self, panel: 'MarkerPanel', parent):
+        self.marker_id = None
+        self.editing = False  # memo entry has focus
+        self._shown = {}  # widget option -> last value set
+        self.frame = ctk.CTkFrame(parent, fg_color="transparent",
+                                  height=MarkerPanel.ROW_HEIGHT)
+        self.color_box = ctk.CTkLabel(self.frame, text="\u2588", width=20)
+        self.color_box.pack(side="left", padx=2)
+        self.label = ctk.CTkLabel(self.frame, text="", width=30,
+                                  font=("Courier", 13, "bold"))
+        self.label.pack(side="left", padx=2)
+        self.time = ctk.CTkLabel(self.frame, text="", width=90)
+        self.time.pack(side="left", padx=2)
+        self.memo = ctk.CTkEntry(self.frame, width=120, placeholder_text="memo...")
+        self.memo.pack(side="left", padx=2)
+        self.memo.bind("<FocusIn>", lambda e: setattr(self, "editing", True))
+        self.memo.bind("<FocusOut>", lambda e: self._end_edit(panel))
+        self.memo.bind("<Return>", lambda e: panel._commit_memo(self))
+        self.swap = ctk.CTkButton(self.frame, text="\u2194", width=28,
+                                  command=lambda: panel._on_swap_click(self.marker_id))
+        self.swap.pack(side="left", padx=1)
+        ctk.CTkButton(self.frame, text="\u2192", width=28,
+                      command=lambda: panel._seek_to_marker(self.marker_id)
+                      ).pack(side="left", padx=1)
+        ctk.CTkButton(self.frame, text="\u00D7", width=28, fg_color="#CC3333",
+                      command=lambda: panel._delete_marker(self.marker_id)
+                      ).pack(side="left", padx=1)
+        for widget in (self.frame, *self.frame.winfo_children()):
+            panel._bind_wheel(widget)
+
+    def _end_edit(self, panel: 'MarkerPanel') -> None:
+        self.editing = False
+        panel._commit_memo(self)
+
+    def _set(self, widget, key: str, **options) -> None:
+        if self._shown.get(key) != options:
+            self._shown[key] = options
+            widget.configure(**options)
+
+    def show(self, marker, swap_selected: bool) -> None:
+        same_marker = marker.id == self.marker_id
+        self.marker_id = marker.id
+        self._set(self.frame, "frame",
+                  fg_color="#2A4A6B" if swap_selected else "transparent")
+        self._set(self.color_box, "color", text_color=marker.color)
+        self._set(self.label, "label", text=marker.label)
+        self._set(self.time, "time", text=seconds_to_mmss(marker.position))
+        self._set(self.swap, "swap",
+                  text="\u2714" if swap_selected else "\u2194",
+                  fg_color="#DAA520" if swap_selected
+                  else ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        # Leave the entry alone if it already shows the memo, or while
+        # the user is typing into it
+        if self.memo.get() != marker.memo and not (self.editing and same_marker):
+            self.memo.delete(0, "end")
+            if marker.memo:
+                self.memo.insert(0, marker.memo)
+
+
 class MarkerPanel(ctk.CTkFrame):
-    """Panel for displaying and managing markers. Uses marker IDs internally."""
+    """Panel for displaying and managing markers. Uses marker IDs internally.
+
+    The list is virtualized: only as many row widgets exist as fit in the
+    visible area, and scrolling rebinds them to other markers. Marker
+    changes update the shown rows in place."""
+
+    ROW_HEIGHT = 30
+    LIST_HEIGHT = 150
 
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
         self._swap_selection = None  # marker ID selected for swap
-        self._rebuilding = False
-        self._memo_entries = {}  # marker_id -> entry widget
+        self._markers = ()  # sorted by position, as emitted
+        self._rows: list[_MarkerRow] = []
+        self._first = 0  # index of the marker in the top row
 
         header = ctk.CTkFrame(self, fg_color="transparent")
         header.pack(fill="x", padx=5, pady=(5, 2))
@@ -23,98 +96,113 @@ class MarkerPanel(ctk.CTkFrame):
             header, text="Clear", width=60, fg_color="#666666",
             command=self._clear_markers
         ).pack(side="right", padx=2)
+        self.snap_var = ctk.BooleanVar(value=app.snap_to_onsets)
+        ctk.CTkCheckBox(
+            header, text="Snap", width=60, variable=self.snap_var,
+            command=self._on_snap_toggled
+        ).pack(side="right", padx=2)
 
-        self.list_frame = ctk.CTkScrollableFrame(self, height=150)
-        self.list_frame.pack(fill="both", expand=True, padx=5, pady=2)
+        list_area = ctk.CTkFrame(self, fg_color="transparent")
+        list_area.pack(fill="both", expand=True, padx=5, pady=2)
+        self.scrollbar = ctk.CTkScrollbar(list_area, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.list_frame = ctk.CTkFrame(list_area, height=self.LIST_HEIGHT)
+        self.list_frame.pack(side="left", fill="both", expand=True)
+        self.list_frame.bind("<Configure>", lambda e: self._ensure_rows(e.height))
+        self._bind_wheel(self.list_frame)
 
         # Swap status label
         self.swap_label = ctk.CTkLabel(self, text="", height=20)
         self.swap_label.pack(fill="x", padx=5)
 
-        app.event_bus.on("markers_changed", self._on_markers_changed)
+        app.event_bus.on("markers_changed", self._on_markers_changed, lane=EventBus.MAIN)
 
     def _add_marker(self) -> None:
         self.app.add_marker_at_current()
 
+    def _on_snap_toggled(self) -> None:
+        """Snap new markers and marker drags to detected onsets."""
+        self.app.snap_to_onsets = bool(self.snap_var.get())
+
     def _clear_markers(self) -> None:
         self._swap_selection = None
         self.swap_label.configure(text="")
         self.app.marker_manager.clear()
 
-    def _on_markers_changed(self, markers) -> None:
-        self.after(0, lambda: self._rebuild_list(markers))
-
-    def _rebuild_list(self, markers) -> None:
-        # Save pending memo values before destroying widgets
-        self._rebuilding = True
-        for mid, entry in self._memo_entries.items():
-            try:
-                val = entry.get().strip()
-                m = self.app.marker_manager.get_by_id(mid)
-                if m and m.memo != val:
-                    m.memo = val  # Direct set without emitting event
-            except Exception:
-                pass
-        self._memo_entries = {}
-
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-        self._rebuilding = False
-
-        for marker in markers:
-            is_swap_selected = (marker.id == self._swap_selection)
-            fg = "#2A4A6B" if is_swap_selected else "transparent"
-            row = ctk.CTkFrame(self.list_frame, fg_color=fg)
-            row.pack(fill="x", pady=1)
-
-            color_box = ctk.CTkLabel(row, text="\u2588", text_color=marker.color, width=20)
-            color_box.pack(side="left", padx=2)
-
-            ctk.CTkLabel(row, text=marker.label, width=30,
-                         font=("Courier", 13, "bold")).pack(side="left", padx=2)
-            ctk.CTkLabel(row, text=seconds_to_mmss(marker.position),
-                         width=90).pack(side="left", padx=2)
-
-            memo_entry = ctk.CTkEntry(row, width=120, placeholder_text="memo...")
-            if marker.memo:
-                memo_entry.insert(0, marker.memo)
-            memo_entry.pack(side="left", padx=2)
-            self._memo_entries[marker.id] = memo_entry
-            memo_entry.bind("<FocusOut>",
-                            lambda e, mid=marker.id, ent=memo_entry:
-                            self._on_memo_focus_out(mid, ent))
-            memo_entry.bind("<Return>",
-                            lambda e, mid=marker.id, ent=memo_entry:
-                            self.app.marker_manager.update_memo(mid, ent.get().strip()))
-
-            # Swap label button
-            swap_text = "\u2194" if not is_swap_selected else "\u2714"
-            ctk.CTkButton(
-                row, text=swap_text, width=28,
-                fg_color="#DAA520" if is_swap_selected else None,
-                command=lambda mid=marker.id: self._on_swap_click(mid)
-            ).pack(side="left", padx=1)
-
-            # Seek button
-            ctk.CTkButton(
-                row, text="\u2192", width=28,
-                command=lambda p=marker.position: self._seek_to(p)
-            ).pack(side="left", padx=1)
-
-            # Delete button
-            ctk.CTkButton(
-                row, text="\u00D7", width=28, fg_color="#CC3333",
-                command=lambda mid=marker.id: self._delete_marker(mid)
-            ).pack(side="left", padx=1)
-
-    def _on_memo_focus_out(self, marker_id: str, entry) -> None:
-        if self._rebuilding:
-            return
-        try:
-            val = entry.get().strip()
-        except Exception:
+    def _on_markers_changed(self, markers, diff=None) -> None:
+        self._markers = markers
+        if diff is not None and not (diff.reset or diff.added or diff.removed):
+            shown = [row.marker_id for row in self._rows if row.marker_id is not None]
+            in_view = [m.id for m in markers[self._first:self._first + len(shown)]]
+            if shown == in_view and diff.updated.isdisjoint(shown):
+                return  # the edit does not touch the rows in view
+        self._refresh()
+
+    # -- virtual list ----------------------------------------------------------
+
+    def _bind_wheel(self, widget) -> None:
+        widget.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self._scroll(-1))
+        widget.bind("<Button-5>", lambda e: self._scroll(1))
+
+    @property
+    def _visible_rows(self) -> int:
+        return max(1, self.list_frame.winfo_height() // self.ROW_HEIGHT)
+
+    def _ensure_rows(self, height: int) -> None:
+        """Create row widgets to fill `height`; they are never destroyed."""
+        needed = math.ceil(height / self.ROW_HEIGHT)
+        while len(self._rows) < needed:
+            self._rows.append(_MarkerRow(self, self.list_frame))
+        self._refresh()
+
+    def _scroll(self, rows: int) -> None:
+        self._scroll_to(self._first + rows)
+
+    def _on_scrollbar(self, action: str, value, unit: str = "") -> None:
+        if action == "moveto":
+            self._scroll_to(round(float(value) * len(self._markers)))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self._scroll(int(value) * step)
+
+    def _scroll_to(self, first: int) -> None:
+        first = max(0, min(first, len(self._markers) - self._visible_rows))
+        if first != self._first:
+            self._first = first
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Bind the rows to the markers in view and hide unused rows."""
+        total = len(self._markers)
+        self._first = max(0, min(self._first, total - self._visible_rows))
+        for i, row in enumerate(self._rows):
+            index = self._first + i
+            if index < total:
+                marker = self._markers[index]
+                if row.marker_id is not None and row.marker_id != marker.id:
+                    self._commit_memo(row)  # typed text stays with its marker
+                row.show(marker, marker.id == self._swap_selection)
+                row.frame.place(x=0, y=i * self.ROW_HEIGHT, relwidth=1,
+                                height=self.ROW_HEIGHT)
+            elif row.marker_id is not None:
+                self._commit_memo(row)
+                row.marker_id = None
+                row.frame.place_forget()
+        if total:
+            self.scrollbar.set(self._first / total,
+                               min(1.0, (self._first + self._visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _commit_memo(self, row: _MarkerRow) -> None:
+        """Save the row's memo entry if it differs from the marker's memo."""
+        marker = self.app.marker_manager.get_by_id(row.marker_id)
+        if marker is None:
             return
-        self.app.marker_manager.update_memo(marker_id, val)
+        value = row.memo.get().strip()
+        if value != marker.memo:
+            self.app.marker_manager.update_memo(marker.id, value)
 
     def _on_swap_click(self, marker_id: str) -> None:
         if self._swap_selection is None:
@@ -122,12 +210,12 @@ class MarkerPanel(ctk.CTkFrame):
             m = self.app.marker_manager.get_by_id(marker_id)
             lbl = m.label if m else "?"
             self.swap_label.configure(text=f"Swap: select another to swap with {lbl}")
-            self._rebuild_list(self.app.marker_manager.get_markers())
+            self._refresh()
         elif self._swap_selection == marker_id:
             # Deselect
             self._swap_selection = None
             self.swap_label.configure(text="")
-            self._rebuild_list(self.app.marker_manager.get_markers())
+            self._refresh()
         else:
             # Perform swap
             self.app.marker_manager.swap_labels(self._swap_selection, marker_id)
@@ -135,12 +223,14 @@ class MarkerPanel(ctk.CTkFrame):
             self.swap_label.configure(text="")
 
     def _delete_marker(self, marker_id: str) -> None:
-        self.app.sequence_looper.remove_segments_referencing(marker_id)
-        self.app.marker_manager.remove_marker(marker_id)
+        with self.app.edit_history.transaction():
+            self.app.sequence_looper.remove_segments_referencing(marker_id)
+            self.app.marker_manager.remove_marker(marker_id)
         if self._swap_selection == marker_id:
             self._swap_selection = None
             self.swap_label.configure(text="")
 
-    def _seek_to(self, position: float) -> None:
-        if self.app.player:
-            self.app.player.seek(position)
+    def _seek_to_marker(self, marker_id: str) -> None:
+        marker = self.app.marker_manager.get_by_id(marker_id)
+        if marker and self.app.player:
+            self.app.player.seek(marker.position)
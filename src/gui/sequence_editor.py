@@ -1,11 +1,78 @@
 import re
 import customtkinter as ctk
+from ..core.events import EventBus
 from ..core.sequence_looper import SequenceLooper
 
 
+class _SegmentRow:
+    """Widgets of one segment row, kept for the segment's lifetime. Each
+    setter touches Tk only when the shown value changes."""
+
+    def __init__(self, editor: 'SequenceEditor', parent, segment_id: str):
+        self.segment_id = segment_id
+        self._shown = {}  # widget key -> last options set
+        jump = lambda e: editor._jump_to_id(segment_id)
+        self.frame = ctk.CTkFrame(parent, fg_color="transparent", cursor="hand2")
+        self.frame.bind("<Button-1>", jump)
+        self.index = ctk.CTkLabel(self.frame, text="", width=40)
+        self.index.pack(side="left", padx=2)
+        self.index.bind("<Button-1>", jump)
+        self.range = ctk.CTkLabel(self.frame, text="", width=40,
+                                  font=("Courier", 13, "bold"))
+        self.range.pack(side="left", padx=2)
+        self.range.bind("<Button-1>", jump)
+        self.name = ctk.CTkLabel(self.frame, text="", width=120, anchor="w")
+        self.name.bind("<Button-1>", jump)
+        self.fx = ctk.CTkLabel(self.frame, text="", font=("Arial", 10),
+                               text_color="#DAA520")
+        self.up = ctk.CTkButton(
+            self.frame, text="\u25B2", width=28,
+            command=lambda: editor._move_by(segment_id, -1))
+        self.up.pack(side="left", padx=1)
+        ctk.CTkButton(
+            self.frame, text="\u25BC", width=28,
+            command=lambda: editor._move_by(segment_id, 1)
+        ).pack(side="left", padx=1)
+        ctk.CTkButton(
+            self.frame, text="\u00D7", width=28, fg_color="#CC3333",
+            command=lambda: editor._remove(segment_id)
+        ).pack(side="left", padx=1)
+
+    def _set(self, widget, key: str, **options) -> bool:
+        if self._shown.get(key) == options:
+            return False
+        self._shown[key] = options
+        widget.configure(**options)
+        return True
+
+    def _set_packed(self, widget, key: str, text: str) -> None:
+        """Show `widget` with `text` before the buttons, or hide it if empty."""
+        if self._set(widget, key, text=text):
+            if text:
+                widget.pack(side="left", padx=2, before=self.up)
+            else:
+                widget.pack_forget()
+
+    def set_active(self, index: int, active: bool) -> None:
+        self._set(self.frame, "frame", fg_color="#1F6AA5" if active else "transparent")
+        indicator = "\u25B6 " if active else ""
+        self._set(self.index, "index", text=f"{indicator}{index + 1}.")
+
+    def show(self, index: int, segment, range_label: str, fx_text: str,
+             active: bool) -> None:
+        self.set_active(index, active)
+        self._set(self.range, "range", text=range_label)
+        self._set_packed(self.name, "name", segment.display_name)
+        self._set_packed(self.fx, "fx", fx_text)
+
+
 class SequenceEditor(ctk.CTkFrame):
     """Sequence definition and reordering UI. Uses marker IDs internally,
-    displays labels in dropdowns for user convenience."""
+    displays labels in dropdowns for user convenience.
+
+    Segment rows are kept per segment id and patched from the
+    sequence_changed diff; a segment change at a loop boundary only
+    restyles the previously and newly active rows."""
 
     def __init__(self, parent, app):
         super().__init__(parent)
@@ -14,6 +81,9 @@ class SequenceEditor(ctk.CTkFrame):
         self._marker_id_map = {}  # label -> id
         self._pair_name_history = {}  # "AB" -> last used display_name
         self._last_pair_key = ""  # tracks current dropdown pair like "AB"
+        self._rows: dict[str, _SegmentRow] = {}  # segment id -> row
+        self._order: list[str] = []  # segment ids as packed
+        self._active_id = None  # segment id of the highlighted row
 
         header = ctk.CTkFrame(self, fg_color="transparent")
         header.pack(fill="x", padx=5, pady=(5, 2))
@@ -66,7 +136,7 @@ class SequenceEditor(ctk.CTkFrame):
         self.name_entry.pack(side="left", fill="x", expand=True, padx=2)
 
         # Batch input
-        batch_label = ctk.CTkLabel(self, text="Batch:  AB,CD,EF  or  AB:name,CD:name",
+        batch_label = ctk.CTkLabel(self, text="Batch:  AB,CD,EF  or  AB:name,CD:name  (AB@0.75x@-2st)",
                                    font=("Arial", 10), anchor="w",
                                    text_color="#888888")
         batch_label.pack(fill="x", padx=8, pady=(6, 0))
@@ -96,9 +166,10 @@ class SequenceEditor(ctk.CTkFrame):
         )
         self.stop_btn.pack(side="left", padx=5, expand=True, fill="x")
 
-        app.event_bus.on("markers_changed", self._on_markers_changed)
-        app.event_bus.on("sequence_changed", self._on_sequence_changed)
-        app.event_bus.on("segment_changed", self._on_segment_changed)
+        bus = app.event_bus
+        bus.on("markers_changed", self._on_markers_changed, lane=EventBus.MAIN)
+        bus.on("sequence_changed", self._on_sequence_changed, lane=EventBus.MAIN)
+        bus.on("segment_changed", self._on_segment_changed, lane=EventBus.MAIN)
 
     def _on_loop_mode_changed(self, value: str) -> None:
         mode_map = {
@@ -108,13 +179,11 @@ class SequenceEditor(ctk.CTkFrame):
         }
         self.app.sequence_looper.loop_mode = mode_map.get(value, SequenceLooper.LOOP_SEQUENCE)
 
-    def _on_markers_changed(self, markers) -> None:
+    def _on_markers_changed(self, markers, _diff=None) -> None:
         self._marker_id_map = {m.label: m.id for m in markers}
-        labels = [m.label for m in markers]
-        self.after(0, lambda: self._update_dropdowns(labels))
-        # Also refresh segment list since labels may have changed
-        segments = self.app.sequence_looper.get_segments()
-        self.after(0, lambda: self._rebuild_list(segments))
+        self._update_dropdowns([m.label for m in markers])
+        # Range labels ("AB") follow marker labels; unchanged rows cost nothing
+        self._refresh_rows(self.app.sequence_looper.get_segments())
 
     def _update_dropdowns(self, labels) -> None:
         if not labels:
@@ -165,27 +234,45 @@ class SequenceEditor(ctk.CTkFrame):
                 self._pair_name_history[pair_key] = display_name
             self._last_pair_key = pair_key
 
-    def _parse_batch(self, text: str) -> list[tuple[str, str, str]]:
-        """Parse batch input text into list of (start_label, end_label, name).
+    def _parse_batch(self, text: str) -> tuple[list[tuple], list[str]]:
+        """Parse batch input text into a list of
+        (start_label, end_label, name, tempo, semitones), plus the '@'
+        override tokens that were not understood.
 
         Supported formats:
           AB CD EF        (space-separated)
           AB,CD,EF        (comma-separated)
           AB/CD/EF        (slash-separated)
           AB:intro,CD:verse  (colon attaches a name)
+          AB@0.75x@-2st   (per-segment tempo / transpose override)
+          AB@0.75x:intro, AB:intro@0.75x  (both together)
           Mixed delimiters and case are OK.
         """
         # Split by comma, space, or slash (but not colon — that's for names)
         tokens = re.split(r'[,\s/]+', text.strip())
         results = []
+        invalid = []
         for token in tokens:
             if not token:
                 continue
-            # Split name by colon: "AB:intro" -> ("AB", "intro")
+            # Split name by colon first: "AB@0.75x:intro" -> ("AB@0.75x", "intro")
             if ':' in token:
                 pair_part, name_part = token.split(':', 1)
             else:
                 pair_part, name_part = token, ""
+            overrides = {}
+            pair_part, bad = self._split_overrides(pair_part, overrides)
+            invalid.extend(bad)
+            # Overrides may also trail the name; other '@'s belong to it
+            while '@' in name_part:
+                head, _, tail = name_part.rpartition('@')
+                parsed = self._parse_override(tail)
+                if parsed is None:
+                    break
+                overrides.setdefault(*parsed)
+                name_part = head
+            tempo = overrides.get("tempo")
+            semitones = overrides.get("semitones")
             pair_part = pair_part.upper()
             if len(pair_part) < 2:
                 continue
@@ -194,8 +281,34 @@ class SequenceEditor(ctk.CTkFrame):
             # Simple approach: try 1-char + 1-char first, then 2+2, etc.
             start_lbl, end_lbl = self._split_label_pair(pair_part)
             if start_lbl and end_lbl:
-                results.append((start_lbl, end_lbl, name_part.strip()))
-        return results
+                results.append((start_lbl, end_lbl, name_part.strip(),
+                                tempo, semitones))
+        return results, invalid
+
+    @staticmethod
+    def _parse_override(part: str) -> tuple[str, float | int] | None:
+        """('tempo', 0.75) for '0.75x', ('semitones', -2) for '-2st'."""
+        m = re.fullmatch(r'(\d+(?:\.\d+)?)x', part, re.IGNORECASE)
+        if m:
+            return "tempo", float(m.group(1))
+        m = re.fullmatch(r'([+-]?\d+)st', part, re.IGNORECASE)
+        if m:
+            return "semitones", int(m.group(1))
+        return None
+
+    @classmethod
+    def _split_overrides(cls, token: str, overrides: dict) -> tuple[str, list[str]]:
+        """Strip '@0.75x' / '@-2st' suffixes from a batch token into
+        `overrides`; returns the rest and the '@' parts not understood."""
+        base, *parts = token.split('@')
+        invalid = []
+        for part in parts:
+            parsed = cls._parse_override(part)
+            if parsed is None:
+                invalid.append(f"@{part}")
+            else:
+                overrides[parsed[0]] = parsed[1]
+        return base, invalid
 
     def _split_label_pair(self, pair: str) -> tuple[str, str]:
         """Split a label pair like 'AB' or 'AAAB' into (start, end).
@@ -214,7 +327,7 @@ class SequenceEditor(ctk.CTkFrame):
         text = self.batch_entry.get().strip()
         if not text:
             return
-        parsed = self._parse_batch(text)
+        parsed, invalid = self._parse_batch(text)
         if not parsed:
             self.batch_status.configure(
                 text="No valid segments found. Use marker labels like AB,CD,EF",
@@ -223,19 +336,28 @@ class SequenceEditor(ctk.CTkFrame):
 
         added = 0
         skipped = []
-        for start_lbl, end_lbl, name in parsed:
-            start_id = self._marker_id_map.get(start_lbl)
-            end_id = self._marker_id_map.get(end_lbl)
-            if start_id and end_id and start_id != end_id:
-                self.app.sequence_looper.add_segment(start_id, end_id, name)
-                added += 1
-            else:
-                skipped.append(f"{start_lbl}{end_lbl}")
+        with self.app.edit_history.transaction():
+            for start_lbl, end_lbl, name, tempo, semitones in parsed:
+                start_id = self._marker_id_map.get(start_lbl)
+                end_id = self._marker_id_map.get(end_lbl)
+                if start_id and end_id and start_id != end_id:
+                    self.app.sequence_looper.add_segment(start_id, end_id, name,
+                                                         tempo=tempo,
+                                                         semitones=semitones)
+                    added += 1
+                else:
+                    skipped.append(f"{start_lbl}{end_lbl}")
 
         self.batch_entry.delete(0, "end")
-        if skipped:
+        if skipped or invalid:
+            problems = []
+            if skipped:
+                problems.append(f"skipped: {', '.join(skipped)}")
+            if invalid:
+                problems.append(f"ignored overrides: {', '.join(invalid)} "
+                                "(use @0.75x or @-2st)")
             self.batch_status.configure(
-                text=f"Added {added}, skipped: {', '.join(skipped)}",
+                text=f"Added {added}, {'; '.join(problems)}",
                 text_color="#DAA520")
         else:
             self.batch_status.configure(
@@ -251,10 +373,10 @@ class SequenceEditor(ctk.CTkFrame):
     def _stop_sequence(self) -> None:
         self.app.sequence_looper.stop()
 
-    def _on_sequence_changed(self, segments, current_index) -> None:
+    def _on_sequence_changed(self, segments, current_index, diff=None) -> None:
         self._current_index = current_index
-        self.after(0, lambda: self._rebuild_list(segments))
-        self.after(0, self._sync_loop_mode_dropdown)
+        self._patch_rows(segments, diff)
+        self._sync_loop_mode_dropdown()
 
     def _sync_loop_mode_dropdown(self) -> None:
         reverse_map = {
@@ -267,53 +389,71 @@ class SequenceEditor(ctk.CTkFrame):
         self.loop_mode_var.set(display)
 
     def _on_segment_changed(self, index) -> None:
+        """Move the highlight: restyles at most two rows."""
         self._current_index = index
-        segments = self.app.sequence_looper.get_segments()
-        self.after(0, lambda: self._rebuild_list(segments))
-
-    def _rebuild_list(self, segments) -> None:
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-
+        new_id = self._order[index] if 0 <= index < len(self._order) else None
+        if not self.app.sequence_looper.active:
+            new_id = None
+        if new_id == self._active_id:
+            return
+        old = self._rows.get(self._active_id)
+        if old is not None:
+            old.set_active(self._order.index(old.segment_id), False)
+        if new_id is not None:
+            self._rows[new_id].set_active(index, True)
+        self._active_id = new_id
+
+    def _index_of(self, segment_id: str) -> int:
+        try:
+            return self._order.index(segment_id)
+        except ValueError:
+            return -1
+
+    def _patch_rows(self, segments, diff=None) -> None:
+        """Apply a sequence_changed diff: drop removed rows, create added
+        ones, repack only if the order changed, then refresh the rows."""
+        ids = [seg.id for seg in segments]
+        live = set(ids)
+        if diff is None or diff.reset:
+            stale = [sid for sid in self._rows if sid not in live]
+        else:
+            stale = [sid for sid in diff.removed if sid in self._rows]
+        for sid in stale:
+            self._rows.pop(sid).frame.destroy()
+        for sid in ids:
+            if sid not in self._rows:
+                self._rows[sid] = _SegmentRow(self, self.list_frame, sid)
+        if ids != self._order:
+            for sid in ids:
+                self._rows[sid].frame.pack_forget()
+            for sid in ids:
+                self._rows[sid].frame.pack(fill="x", pady=1)
+            self._order = ids
+        self._refresh_rows(segments)
+
+    def _refresh_rows(self, segments) -> None:
+        if [seg.id for seg in segments] != self._order:
+            self._patch_rows(segments)  # structure changed; _patch_rows refreshes
+            return
+        looper = self.app.sequence_looper
+        active = looper.active
+        self._active_id = None
         for i, seg in enumerate(segments):
-            is_active = (i == self._current_index and self.app.sequence_looper.active)
-            fg = "#1F6AA5" if is_active else "transparent"
-            row = ctk.CTkFrame(self.list_frame, fg_color=fg, cursor="hand2")
-            row.pack(fill="x", pady=1)
-
-            # Click row to jump to this segment
-            row.bind("<Button-1>", lambda e, idx=i: self._jump_to(idx))
-
-            indicator = "\u25B6 " if is_active else ""
-            idx_label = ctk.CTkLabel(row, text=f"{indicator}{i+1}.", width=40)
-            idx_label.pack(side="left", padx=2)
-            idx_label.bind("<Button-1>", lambda e, idx=i: self._jump_to(idx))
-
-            # Resolve labels from IDs
-            range_label = self.app.sequence_looper.get_segment_label(seg)
-            range_lbl_widget = ctk.CTkLabel(row, text=range_label, width=40,
-                         font=("Courier", 13, "bold"))
-            range_lbl_widget.pack(side="left", padx=2)
-            range_lbl_widget.bind("<Button-1>", lambda e, idx=i: self._jump_to(idx))
-
-            if seg.display_name:
-                name_widget = ctk.CTkLabel(row, text=seg.display_name, width=120,
-                             anchor="w")
-                name_widget.pack(side="left", padx=2)
-                name_widget.bind("<Button-1>", lambda e, idx=i: self._jump_to(idx))
-
-            ctk.CTkButton(
-                row, text="\u25B2", width=28,
-                command=lambda idx=i: self._move(idx, idx - 1)
-            ).pack(side="left", padx=1)
-            ctk.CTkButton(
-                row, text="\u25BC", width=28,
-                command=lambda idx=i: self._move(idx, idx + 1)
-            ).pack(side="left", padx=1)
-            ctk.CTkButton(
-                row, text="\u00D7", width=28, fg_color="#CC3333",
-                command=lambda idx=i: self.app.sequence_looper.remove_segment(idx)
-            ).pack(side="left", padx=1)
+            is_active = active and i == self._current_index
+            if is_active:
+                self._active_id = seg.id
+            self._rows[seg.id].show(i, seg, looper.get_segment_label(seg),
+                                    self._effects_text(seg), is_active)
+
+    @staticmethod
+    def _effects_text(seg) -> str:
+        parts = []
+        if seg.tempo is not None:
+            parts.append(f"{seg.tempo:.2f}x")
+        if seg.semitones is not None:
+            sign = "+" if seg.semitones > 0 else ""
+            parts.append(f"{sign}{seg.semitones}st")
+        return " ".join(parts)
 
     def _jump_to(self, index: int) -> None:
         """Jump to segment and start playback from there."""
@@ -321,7 +461,18 @@ class SequenceEditor(ctk.CTkFrame):
         if self.app.player and self.app.player.paused:
             self.app.player.play()
 
-    def _move(self, old_idx: int, new_idx: int) -> None:
-        segments = self.app.sequence_looper.get_segments()
-        if 0 <= new_idx < len(segments):
+    def _jump_to_id(self, segment_id: str) -> None:
+        index = self._index_of(segment_id)
+        if index >= 0:
+            self._jump_to(index)
+
+    def _move_by(self, segment_id: str, step: int) -> None:
+        old_idx = self._index_of(segment_id)
+        new_idx = old_idx + step
+        if old_idx >= 0 and 0 <= new_idx < len(self._order):
             self.app.sequence_looper.reorder(old_idx, new_idx)
+
+    def _remove(self, segment_id: str) -> None:
+        index = self._index_of(segment_id)
+        if index >= 0:
+            self.app.sequence_looper.remove_segment(index)
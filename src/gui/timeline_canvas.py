@@ -1,31 +1,75 @@
+import base64
 import tkinter as tk
+from bisect import bisect_left, bisect_right, insort
 import customtkinter as ctk
+from ..core.events import ChangeDiff, EventBus
 from ..utils.time_fmt import seconds_to_hms
 
 
 class TimelineCanvas(ctk.CTkFrame):
-    """Custom seekbar with marker visualization and marker drag support."""
+    """Custom seekbar with marker visualization and marker drag support.
+
+    The timeline shows a viewport [view_start, view_end] of the media:
+    the mouse wheel zooms around the cursor, Shift+wheel pans, and the
+    view pages forward when the playhead runs off its right edge.
+    Markers closer than CLUSTER_PX at the current zoom are drawn as one
+    cluster showing their count; clicking a cluster zooms in on it.
+    Clusters are found by bisecting the sorted marker positions, so
+    drawing costs O(visible clusters * log n) whatever the marker count.
+
+    Canvas items are kept and updated in place: a position update moves
+    the progress bar and playhead. A markers_changed diff is applied to
+    the sorted positions by bisection and then only the marker and
+    cluster items whose unit changed are created, moved or deleted; a
+    reset diff or a view change rebuilds the visible markers. The canvas
+    width is cached from <Configure>."""
 
     TRACK_HEIGHT = 6
     MARKER_SIZE = 10
     CANVAS_HEIGHT = 44
     MARKER_HIT_RADIUS = 12
+    WAVEFORM_HEIGHT = 14  # half-height of the waveform band in pixels
+    CLUSTER_PX = 12  # markers closer than this are drawn as one cluster
+    MIN_VIEW_SPAN = 2.0  # seconds visible at the deepest zoom
+    ZOOM_STEP = 1.25  # view span factor per wheel notch
+    PAN_FRACTION = 0.1  # of the view span per Shift+wheel notch
 
     def __init__(self, parent, app):
         super().__init__(parent, height=self.CANVAS_HEIGHT)
         self.app = app
         self._duration = 0.0
         self._position = 0.0
-        self._markers = []
+        self._markers = []  # sorted by position
+        self._positions: list[float] = []  # parallel to _markers, for bisect
+        self._pos_by_id: dict[str, float] = {}  # the positions in _positions
+        self._view_start = 0.0
+        self._view_end = 0.0  # 0 until the duration is known
+        self._scale = 0.0  # pixels per second in the view
         self._dragging_seekbar = False
         self._dragging_marker_id = None
+        self._drag_position = 0.0  # preview position of the dragged marker
         self._active_segments = []
+        self._waveform = None  # PeakPyramid, possibly partial
+        self._waveform_coords = None  # cached polygon coords
+        self._waveform_key = None  # (width, duration, pyramid) of the cache
+        self._preview = None  # Toplevel showing the hover thumbnail
+        self._preview_label = None
+        self._preview_image = None  # keep a reference so Tk doesn't drop it
+        self._preview_index = None
+        self._width = 1  # canvas width, updated on <Configure>
+        self._marker_items: dict[str, tuple[int, int]] = {}  # id -> (polygon, text)
+        self._cluster_items: dict[tuple[float, int], tuple[int, int]] = {}  # (x, count) -> items
+        self._units: list[tuple[float, int, int]] = []  # drawn (x, lo, hi) marker ranges
+        self._unit_xs: list[float] = []  # x of each unit, for bisect
+        self._time_text = ""
+        self._playhead_visible = True
 
         self.canvas = tk.Canvas(
             self, height=self.CANVAS_HEIGHT, bg="#2B2B2B",
             highlightthickness=0, cursor="hand2"
         )
         self.canvas.pack(side="left", fill="x", expand=True)
+        self._create_items()
 
         self.time_label = ctk.CTkLabel(self, text="00:00 / 00:00", width=130)
         self.time_label.pack(side="right", padx=5)
@@ -33,83 +77,294 @@ class TimelineCanvas(ctk.CTkFrame):
         self.canvas.bind("<Button-1>", self._on_click)
         self.canvas.bind("<B1-Motion>", self._on_drag)
         self.canvas.bind("<ButtonRelease-1>", self._on_release)
-        self.canvas.bind("<Configure>", lambda e: self._redraw())
+        self.canvas.bind("<Motion>", lambda e: self._show_preview(e.x))
+        self.canvas.bind("<Leave>", lambda e: self._hide_preview())
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_wheel)
+        for button, notch in (("4", 1), ("5", -1)):  # X11 wheel
+            self.canvas.bind(f"<Button-{button}>",
+                             lambda e, n=notch: self._scroll(e, n))
+            self.canvas.bind(f"<Shift-Button-{button}>",
+                             lambda e, n=notch: self._scroll(e, n))
+
+        bus = app.event_bus
+        bus.on("position_changed", self._on_position_changed, lane=EventBus.MAIN)
+        bus.on("duration_changed", self._on_duration_changed, lane=EventBus.MAIN)
+        bus.on("markers_changed", self._on_markers_changed, lane=EventBus.MAIN)
+        bus.on("waveform_changed", self._on_waveform_changed, lane=EventBus.MAIN)
+        bus.on("thumbnails_changed", self._on_thumbnails_changed, lane=EventBus.MAIN)
 
-        app.event_bus.on("position_changed", self._on_position_changed)
-        app.event_bus.on("duration_changed", self._on_duration_changed)
-        app.event_bus.on("markers_changed", self._on_markers_changed)
+    def _create_items(self) -> None:
+        """Create the items that always exist; _layout() places them.
+        Creation order is stacking order: markers go on top, segment
+        regions are lowered below everything."""
+        c = self.canvas
+        self._waveform_item = c.create_polygon(0, 0, 0, 0, 0, 0, fill="#44525E",
+                                               outline="", tags="waveform",
+                                               state="hidden")
+        self._track_item = c.create_rectangle(0, 0, 0, 0, fill="#555555",
+                                              outline="", tags="track")
+        self._progress_item = c.create_rectangle(0, 0, 0, 0, fill="#1F6AA5",
+                                                 outline="", tags="progress")
+        self._playhead_item = c.create_oval(0, 0, 0, 0, fill="#FFFFFF",
+                                            outline="", tags="playhead")
 
     def set_active_segments(self, segments):
         self._active_segments = segments
-        self._redraw()
+        self._draw_segments()
 
     def _pos_to_x(self, pos: float) -> float:
-        if self._duration <= 0:
-            return 10
-        width = self.canvas.winfo_width() - 20
-        return 10 + (pos / self._duration) * width
+        return 10 + (pos - self._view_start) * self._scale
 
     def _x_to_pos(self, x: float) -> float:
-        width = self.canvas.winfo_width() - 20
-        if width <= 0:
+        if self._scale <= 0:
             return 0
-        return max(0, min(self._duration, ((x - 10) / width) * self._duration))
+        pos = self._view_start + (x - 10) / self._scale
+        return max(0, min(self._duration, pos))
+
+    # -- viewport --------------------------------------------------------
+
+    def set_view(self, start: float, end: float) -> None:
+        """Show [start, end] seconds, clamped to the media and the
+        deepest zoom, and lay everything out again."""
+        duration = self._duration
+        if duration <= 0:
+            self._view_start, self._view_end = 0.0, 0.0
+        else:
+            span = min(duration, max(end - start, self.MIN_VIEW_SPAN))
+            start = max(0.0, min(start, duration - span))
+            self._view_start, self._view_end = start, start + span
+        self._layout()
+
+    @property
+    def zoomed(self) -> bool:
+        return self._view_end - self._view_start < self._duration
+
+    def _on_wheel(self, event) -> None:
+        self._scroll(event, 1 if event.delta > 0 else -1)
+
+    def _scroll(self, event, notch: int) -> None:
+        """Zoom around the cursor (pan with Shift) by one wheel notch."""
+        if self._duration <= 0:
+            return
+        start, end = self._view_start, self._view_end
+        span = end - start
+        if event.state & 0x0001:  # Shift
+            shift = -notch * span * self.PAN_FRACTION
+            self.set_view(start + shift, end + shift)
+            return
+        anchor = self._x_to_pos(event.x)
+        factor = 1 / self.ZOOM_STEP if notch > 0 else self.ZOOM_STEP
+        new_span = span * factor
+        ratio = (anchor - start) / span if span > 0 else 0.5
+        new_start = anchor - ratio * new_span
+        self.set_view(new_start, new_start + new_span)
+
+    def _follow_playhead(self, previous: float) -> None:
+        """Page the view when playback runs past its right edge."""
+        if (self.zoomed and self._view_start <= previous <= self._view_end
+                < self._position):
+            span = self._view_end - self._view_start
+            start = self._position - span * 0.1
+            self.set_view(start, start + span)
 
     def _hit_test_marker(self, x: float, y: float):
-        """Return the Marker hit by (x, y), or None. Checks top area only."""
+        """Return the Marker hit by (x, y), a (start, end) time range for
+        a cluster, or None. Checks the top area only."""
         cy = self.CANVAS_HEIGHT // 2
-        for marker in reversed(self._markers):
-            mx = self._pos_to_x(marker.position)
-            if abs(x - mx) <= self.MARKER_HIT_RADIUS and y <= cy + 4:
-                return marker
-        return None
+        if y > cy + 4 or not self._units:
+            return None
+        i = bisect_left(self._unit_xs, x - self.MARKER_HIT_RADIUS)
+        best = None
+        while i < len(self._units) and self._unit_xs[i] <= x + self.MARKER_HIT_RADIUS:
+            if best is None or abs(self._unit_xs[i] - x) <= abs(self._unit_xs[best] - x):
+                best = i
+            i += 1
+        if best is None:
+            return None
+        _ux, lo, hi = self._units[best]
+        if hi - lo == 1:
+            return self._markers[lo]
+        return self._positions[lo], self._positions[hi - 1]
+
+    def _on_configure(self, event) -> None:
+        if event.width != self._width:
+            self._width = event.width
+            self._layout()
 
     def _on_position_changed(self, position: float) -> None:
         if not self._dragging_seekbar and self._dragging_marker_id is None:
-            self._position = position
-            self.after(0, self._redraw)
-            self.after(0, lambda: self.time_label.configure(
-                text=f"{seconds_to_hms(position)} / {seconds_to_hms(self._duration)}"
-            ))
+            previous, self._position = self._position, position
+            self._move_playhead()
+            self._follow_playhead(previous)
+            text = f"{seconds_to_hms(position)} / {seconds_to_hms(self._duration)}"
+            if text != self._time_text:  # changes once per second
+                self._time_text = text
+                self.time_label.configure(text=text)
 
     def _on_duration_changed(self, duration: float) -> None:
-        self._duration = duration
-        self.after(0, self._redraw)
+        zoomed = self.zoomed
+        previous, self._duration = self._duration, duration
+        if zoomed and abs(duration - previous) <= previous * 0.01:
+            self.set_view(self._view_start, self._view_end)  # refined estimate
+        else:
+            self.set_view(0.0, duration)  # new media starts zoomed out
 
-    def _on_markers_changed(self, markers) -> None:
+    def _on_markers_changed(self, markers, diff=None) -> None:
         self._markers = markers
-        self.after(0, self._redraw)
+        if diff is None or diff.reset or not self._apply_positions(diff):
+            self._positions = [m.position for m in markers]
+            self._pos_by_id = {m.id: m.position for m in markers}
+            self._draw_markers()
+        else:
+            self._update_markers(diff)
+        if self._active_segments:
+            self._draw_segments()
+
+    def _apply_positions(self, diff) -> bool:
+        """Apply `diff` to the sorted positions with bisect; False when
+        they cannot be patched (the caller rebuilds them)."""
+        positions, by_id = self._positions, self._pos_by_id
+        manager = self.app.marker_manager
+        for marker_id in diff.removed | diff.updated:
+            pos = by_id.pop(marker_id, None)
+            if pos is None:
+                return False
+            i = bisect_left(positions, pos)
+            if i == len(positions) or positions[i] != pos:
+                return False
+            del positions[i]
+        for marker_id in diff.added | diff.updated:
+            marker = manager.get_by_id(marker_id)
+            if marker is None:
+                return False
+            insort(positions, marker.position)
+            by_id[marker_id] = marker.position
+        return len(positions) == len(self._markers)
+
+    def _on_waveform_changed(self, pyramid, _complete: bool) -> None:
+        self._waveform = pyramid
+        self._waveform_coords = None
+        self._draw_waveform()
+
+    def _waveform_polygon(self, x1: int, x2: int, cy: int):
+        """Polygon coords of the waveform envelope between x1 and x2,
+        cached until the width, view or pyramid changes."""
+        pyramid = self._waveform
+        if pyramid is None or pyramid.peak <= 0 or x2 <= x1:
+            return None
+        if self._view_end > self._view_start:
+            t0, t1 = self._view_start, self._view_end
+        else:
+            t0, t1 = 0.0, pyramid.duration
+        key = (x1, x2, t0, t1, id(pyramid))
+        if key == self._waveform_key and self._waveform_coords is not None:
+            return self._waveform_coords
+
+        lo, hi = pyramid.envelope(t0, t1, x2 - x1)
+        scale = self.WAVEFORM_HEIGHT / pyramid.peak
+        xs = list(range(x1, x2))
+        top = (cy - hi * scale).tolist()
+        bottom = (cy - lo * scale).tolist()
+        coords = []
+        for x, y in zip(xs, top):
+            coords.extend((x, y))
+        for x, y in zip(reversed(xs), reversed(bottom)):
+            coords.extend((x, y))
+        self._waveform_key = key
+        self._waveform_coords = coords
+        return coords
+
+    def _show_preview(self, x: float) -> None:
+        """Show the sprite-sheet thumbnail for the time under `x`.
+
+        Never seeks the player; frames come from the memory-mapped sheet."""
+        thumbs = self.app.thumbnail_generator
+        pos = self._x_to_pos(x)
+        frame = thumbs.frame_at(pos)
+        if frame is None:
+            self._hide_preview()
+            return
+        h, w = frame.shape[:2]
+        if self._preview is None:
+            self._preview = tk.Toplevel(self)
+            self._preview.overrideredirect(True)
+            self._preview.attributes("-topmost", True)
+            self._preview_label = tk.Label(
+                self._preview, bg="#000000", fg="#FFFFFF",
+                compound="top", font=("Arial", 9), bd=1, relief="solid"
+            )
+            self._preview_label.pack()
+        index = int(round(pos / thumbs.INTERVAL))
+        if index != self._preview_index:
+            ppm = f"P6 {w} {h} 255 ".encode("ascii") + frame.tobytes()
+            self._preview_image = tk.PhotoImage(
+                data=base64.b64encode(ppm), format="ppm"
+            )
+            self._preview_index = index
+        self._preview_label.configure(image=self._preview_image,
+                                      text=seconds_to_hms(pos))
+        px = self.canvas.winfo_rootx() + int(x) - w // 2
+        py = self.canvas.winfo_rooty() - h - 24
+        self._preview.geometry(f"+{px}+{py}")
+        self._preview.deiconify()
+
+    def _on_thumbnails_changed(self, _ready: bool) -> None:
+        # A new sheet (or none): the cached preview belongs to the old one
+        self._preview_index = None
+        self._preview_image = None
+        self._hide_preview()
+
+    def _hide_preview(self) -> None:
+        if self._preview is not None:
+            self._preview.withdraw()
 
     def _on_click(self, event) -> None:
         hit = self._hit_test_marker(event.x, event.y)
+        if isinstance(hit, tuple):
+            start, end = hit
+            pad = max((end - start) * 0.25, self.MIN_VIEW_SPAN)
+            self.set_view(start - pad, end + pad)
+            return
         if hit:
             self._dragging_marker_id = hit.id
+            self._drag_position = hit.position
+            self._place_marker(hit)
             self.canvas.configure(cursor="sb_h_double_arrow")
             return
 
         self._dragging_seekbar = True
         pos = self._x_to_pos(event.x)
         self._position = pos
-        self._redraw()
+        self._move_playhead()
 
     def _on_drag(self, event) -> None:
         if self._dragging_marker_id:
             pos = self._x_to_pos(event.x)
-            for m in self._markers:
-                if m.id == self._dragging_marker_id:
-                    m.position = pos
-                    break
-            self._redraw()
+            if self.app.snap_to_onsets:
+                pos = self.app.marker_manager.snap(pos)
+            self._drag_position = pos
+            marker = self.app.marker_manager.get_by_id(self._dragging_marker_id)
+            if marker is not None:
+                self._place_marker(marker)
+            self._show_preview(self._pos_to_x(pos))
         elif self._dragging_seekbar:
             pos = self._x_to_pos(event.x)
             self._position = pos
-            self._redraw()
+            self._move_playhead()
+            self._show_preview(event.x)
 
     def _on_release(self, event) -> None:
+        self._hide_preview()
         if self._dragging_marker_id:
             pos = self._x_to_pos(event.x)
-            self.app.marker_manager.update_position(self._dragging_marker_id, pos)
-            self._dragging_marker_id = None
+            self.app.marker_manager.update_position(
+                self._dragging_marker_id, pos, snap=self.app.snap_to_onsets
+            )
+            marker_id, self._dragging_marker_id = self._dragging_marker_id, None
+            # Drops the drag outline; markers_changed re-clusters the move
+            self._update_markers(ChangeDiff(updated=frozenset((marker_id,))))
             self.canvas.configure(cursor="hand2")
         elif self._dragging_seekbar:
             self._dragging_seekbar = False
@@ -117,58 +372,170 @@ class TimelineCanvas(ctk.CTkFrame):
             if self.app.player:
                 self.app.player.seek(pos)
 
-    def _redraw(self) -> None:
-        self.canvas.delete("all")
-        w = self.canvas.winfo_width()
+    # -- drawing ---------------------------------------------------------
+
+    def _layout(self) -> None:
+        """Place every item for the current width and view."""
+        span = self._view_end - self._view_start
+        self._scale = (self._width - 20) / span if span > 0 else 0.0
         cy = self.CANVAS_HEIGHT // 2
+        half = self.TRACK_HEIGHT // 2
+        self.canvas.coords(self._track_item, 10, cy - half, self._width - 10, cy + half)
+        self._draw_segments()
+        self._draw_waveform()
+        self._draw_markers()
+        self._move_playhead()
 
-        # Active segment regions
+    def _move_playhead(self) -> None:
+        cy = self.CANVAS_HEIGHT // 2
+        half = self.TRACK_HEIGHT // 2
+        px = self._pos_to_x(self._position)
+        visible = 10 <= px <= self._width - 10
+        self.canvas.coords(self._progress_item, 10, cy - half,
+                           max(10, min(px, self._width - 10)), cy + half)
+        self.canvas.coords(self._playhead_item, px - 7, cy - 7, px + 7, cy + 7)
+        if visible != self._playhead_visible:
+            self._playhead_visible = visible
+            self.canvas.itemconfigure(self._playhead_item,
+                                      state="normal" if visible else "hidden")
+
+    def _draw_segments(self) -> None:
+        self.canvas.delete("segment")
+        cy = self.CANVAS_HEIGHT // 2
+        markers = self.app.marker_manager
         for seg in self._active_segments:
-            m1 = self.app.marker_manager.get_by_id(seg.start_marker_id)
-            m2 = self.app.marker_manager.get_by_id(seg.end_marker_id)
+            m1 = markers.get_by_id(seg.start_marker_id)
+            m2 = markers.get_by_id(seg.end_marker_id)
             if m1 and m2:
-                sx = self._pos_to_x(min(m1.position, m2.position))
-                ex = self._pos_to_x(max(m1.position, m2.position))
+                start = max(min(m1.position, m2.position), self._view_start)
+                end = min(max(m1.position, m2.position), self._view_end)
+                if start >= end:
+                    continue  # outside the view
                 self.canvas.create_rectangle(
-                    sx, cy - self.TRACK_HEIGHT - 2,
-                    ex, cy + self.TRACK_HEIGHT + 2,
-                    fill="#1F6AA5", stipple="gray25", outline=""
+                    self._pos_to_x(start), cy - self.TRACK_HEIGHT - 2,
+                    self._pos_to_x(end), cy + self.TRACK_HEIGHT + 2,
+                    fill="#1F6AA5", stipple="gray25", outline="", tags="segment"
                 )
+        self.canvas.tag_lower("segment")
 
-        # Track background
-        x1, x2 = 10, w - 10
-        self.canvas.create_rectangle(
-            x1, cy - self.TRACK_HEIGHT // 2,
-            x2, cy + self.TRACK_HEIGHT // 2,
-            fill="#555555", outline=""
+    def _draw_waveform(self) -> None:
+        coords = self._waveform_polygon(10, self._width - 10, self.CANVAS_HEIGHT // 2)
+        if coords:
+            self.canvas.coords(self._waveform_item, coords)
+            self.canvas.itemconfigure(self._waveform_item, state="normal")
+        else:
+            self.canvas.itemconfigure(self._waveform_item, state="hidden")
+
+    def _marker_coords(self, mx: float) -> tuple[list, tuple]:
+        """Polygon and label coords of a marker at x = mx."""
+        top = self.CANVAS_HEIGHT // 2 - self.TRACK_HEIGHT // 2 - 2
+        half = self.MARKER_SIZE // 2
+        polygon = [mx, top,
+                   mx - half, top - self.MARKER_SIZE,
+                   mx + half, top - self.MARKER_SIZE]
+        return polygon, (mx, top - self.MARKER_SIZE - 3)
+
+    def _create_marker(self, marker) -> None:
+        polygon, text = self._marker_coords(self._pos_to_x(marker.position))
+        self._marker_items[marker.id] = (
+            self.canvas.create_polygon(polygon, fill=marker.color, outline="",
+                                       width=0, tags="marker"),
+            self.canvas.create_text(*text, text=marker.label, fill=marker.color,
+                                    font=("Arial", 8, "bold"), anchor="s",
+                                    tags="marker"),
         )
 
-        # Progress
-        px = self._pos_to_x(self._position)
-        self.canvas.create_rectangle(
-            x1, cy - self.TRACK_HEIGHT // 2,
-            px, cy + self.TRACK_HEIGHT // 2,
-            fill="#1F6AA5", outline=""
+    def _create_cluster(self, x: float, count: int) -> None:
+        polygon, text = self._marker_coords(x)
+        self._cluster_items[(x, count)] = (
+            self.canvas.create_polygon(polygon, fill="#AAAAAA", outline="#FFFFFF",
+                                       width=1, tags="marker"),
+            self.canvas.create_text(*text, text=str(count), fill="#DDDDDD",
+                                    font=("Arial", 8, "bold"), anchor="s",
+                                    tags="marker"),
         )
 
-        # Playhead
-        self.canvas.create_oval(px - 7, cy - 7, px + 7, cy + 7, fill="#FFFFFF", outline="")
-
-        # Markers
-        for marker in self._markers:
-            mx = self._pos_to_x(marker.position)
-            is_dragging = (marker.id == self._dragging_marker_id)
-            outline = "#FFFFFF" if is_dragging else ""
-            outline_w = 2 if is_dragging else 0
-
-            self.canvas.create_polygon(
-                mx, cy - self.TRACK_HEIGHT // 2 - 2,
-                mx - self.MARKER_SIZE // 2, cy - self.TRACK_HEIGHT // 2 - self.MARKER_SIZE - 2,
-                mx + self.MARKER_SIZE // 2, cy - self.TRACK_HEIGHT // 2 - self.MARKER_SIZE - 2,
-                fill=marker.color, outline=outline, width=outline_w
-            )
-            self.canvas.create_text(
-                mx, cy - self.TRACK_HEIGHT // 2 - self.MARKER_SIZE - 5,
-                text=marker.label, fill=marker.color, font=("Arial", 8, "bold"),
-                anchor="s"
-            )
+    def _place_marker(self, marker) -> None:
+        """Move and restyle the items of a marker drawn on its own."""
+        items = self._marker_items.get(marker.id)
+        if items is None:
+            return
+        is_dragging = (marker.id == self._dragging_marker_id)
+        mx = self._pos_to_x(self._drag_position if is_dragging else marker.position)
+        polygon, text = self._marker_coords(mx)
+        self.canvas.coords(items[0], polygon)
+        self.canvas.coords(items[1], text)
+        self.canvas.itemconfigure(items[0], fill=marker.color,
+                                  outline="#FFFFFF" if is_dragging else "",
+                                  width=2 if is_dragging else 0)
+        self.canvas.itemconfigure(items[1], text=marker.label, fill=marker.color)
+
+    def _cluster_units(self) -> list[tuple[float, int, int]]:
+        """(x, lo, hi) for each run of visible markers closer than
+        CLUSTER_PX, left to right. One bisect per run."""
+        units = []
+        if self._scale <= 0:
+            return units
+        positions = self._positions
+        margin = self.MARKER_SIZE / self._scale
+        i = bisect_left(positions, self._view_start - margin)
+        end = bisect_right(positions, self._view_end + margin)
+        gap = self.CLUSTER_PX / self._scale
+        while i < end:
+            j = min(bisect_right(positions, positions[i] + gap, i + 1, end), end)
+            x = self._pos_to_x((positions[i] + positions[j - 1]) / 2)
+            units.append((x, i, j))
+            i = j
+        return units
+
+    def _draw_markers(self) -> None:
+        """Rebuild the marker items inside the view."""
+        self.canvas.delete("marker")
+        self._marker_items = {}
+        self._cluster_items = {}
+        self._units = self._cluster_units()
+        self._unit_xs = [x for x, _lo, _hi in self._units]
+        for x, lo, hi in self._units:
+            if hi - lo == 1:
+                self._create_marker(self._markers[lo])
+            else:
+                self._create_cluster(x, hi - lo)
+        self._place_dragged()
+
+    def _update_markers(self, diff) -> None:
+        """Re-cluster the view and patch only the units that changed:
+        markers that joined or left a cluster, clusters whose extent or
+        count changed, and markers in diff.updated (moved or restyled)."""
+        self._units = self._cluster_units()
+        self._unit_xs = [x for x, _lo, _hi in self._units]
+        singles = {}
+        clusters = set()
+        for x, lo, hi in self._units:
+            if hi - lo == 1:
+                singles[self._markers[lo].id] = self._markers[lo]
+            else:
+                clusters.add((x, hi - lo))
+        for marker_id in [i for i in self._marker_items if i not in singles]:
+            for item in self._marker_items.pop(marker_id):
+                self.canvas.delete(item)
+        for key in [k for k in self._cluster_items if k not in clusters]:
+            for item in self._cluster_items.pop(key):
+                self.canvas.delete(item)
+        for marker_id, marker in singles.items():
+            if marker_id not in self._marker_items:
+                self._create_marker(marker)
+            elif marker_id in diff.updated:
+                self._place_marker(marker)
+        for x, count in clusters:
+            if (x, count) not in self._cluster_items:
+                self._create_cluster(x, count)
+        self._place_dragged()
+
+    def _place_dragged(self) -> None:
+        """Draw the marker being dragged on its own, even if clustered."""
+        if self._dragging_marker_id is not None:
+            marker = self.app.marker_manager.get_by_id(self._dragging_marker_id)
+            if marker is not None:
+                if marker.id not in self._marker_items:  # clustered or off-view
+                    self._create_marker(marker)
+                self._place_marker(marker)
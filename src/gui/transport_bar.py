@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from ..core.events import EventBus
 
 
 class TransportBar(ctk.CTkFrame):
@@ -35,7 +36,8 @@ class TransportBar(ctk.CTkFrame):
         )
         self.stop_btn.pack(side="left", padx=2)
 
-        app.event_bus.on("playback_state_changed", self._on_state_changed)
+        app.event_bus.on("playback_state_changed", self._on_state_changed,
+                         lane=EventBus.MAIN)
 
     def _toggle_play(self) -> None:
         if self.app.player:
@@ -43,4 +45,4 @@ class TransportBar(ctk.CTkFrame):
 
     def _on_state_changed(self, state: str) -> None:
         text = "\u23F8" if state == "playing" else "\u25B6"
-        self.after(0, lambda: self.play_btn.configure(text=text))
+        self.play_btn.configure(text=text)
@@ -1,6 +1,9 @@
 import json
 import os
+import tkinter as tk
 import customtkinter as ctk
+from ..core.loop_settings_store import normalize_url
+from ..utils.time_fmt import seconds_to_mmss
 
 
 class UrlBar(ctk.CTkFrame):
@@ -11,12 +14,22 @@ class UrlBar(ctk.CTkFrame):
         "url_history.json"
     )
     MAX_HISTORY = 50
+    MAX_RESULTS = 12
 
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
         self._history: list[dict] = []  # [{"url": ..., "title": ...}, ...]
+        self._history_by_label: dict[str, dict] = {}
+        self._titles: dict[str, str] = {}  # normalized URL -> title
         self._load_history()
+        self._index_history()
+        self._results = []  # SearchHits shown in the popup
+        self._results_popup = None
+        self._results_list = None
+        # Titles of older sessions are only known from the history file
+        app.search_index.index_titles(
+            (h["url"], h.get("title", "")) for h in self._history)
 
         ctk.CTkLabel(self, text="URL:", width=40).pack(side="left", padx=(5, 2))
 
@@ -41,6 +54,14 @@ class UrlBar(ctk.CTkFrame):
         if not history_labels:
             self.history_menu.configure(state="disabled")
 
+        self.search_entry = ctk.CTkEntry(self, width=180,
+                                         placeholder_text="Search sessions...")
+        self.search_entry.pack(side="left", padx=(2, 2))
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
+        self.search_entry.bind("<Return>", lambda e: self._open_result(0))
+        self.search_entry.bind("<Down>", lambda e: self._focus_results())
+        self.search_entry.bind("<Escape>", lambda e: self._hide_results())
+
         self.title_label = ctk.CTkLabel(self, text="", width=200, anchor="w")
         self.title_label.pack(side="left", padx=5)
 
@@ -59,13 +80,9 @@ class UrlBar(ctk.CTkFrame):
 
     def _on_history_selected(self, value: str) -> None:
         """When a history item is selected, populate the URL entry."""
-        # Find matching history item by display label
-        labels = self._history_labels()
-        try:
-            idx = labels.index(value)
-        except ValueError:
+        item = self._history_by_label.get(value)
+        if item is None:
             return
-        item = self._history[idx]
         self.url_entry.delete(0, "end")
         self.url_entry.insert(0, item["url"])
 
@@ -84,8 +101,87 @@ class UrlBar(ctk.CTkFrame):
         # Trim
         self._history = self._history[:self.MAX_HISTORY]
         self._save_history()
+        self._index_history()
         self._refresh_history_menu()
 
+    def _index_history(self) -> None:
+        """Rebuild the label and title lookups after the history changes."""
+        # First entry wins when truncated labels collide, like the menu order
+        self._history_by_label = {}
+        for label, item in zip(self._history_labels(), self._history):
+            self._history_by_label.setdefault(label, item)
+        # Search hits carry normalized URLs
+        self._titles = {}
+        for item in self._history:
+            self._titles.setdefault(normalize_url(item["url"]), item.get("title", ""))
+
+    def _on_search_key(self, event) -> None:
+        if event.keysym in ("Return", "Down", "Escape"):
+            return
+        query = self.search_entry.get().strip()
+        self._results = self.app.search_index.search(query, self.MAX_RESULTS) if query else []
+        if self._results:
+            self._show_results()
+        else:
+            self._hide_results()
+
+    @staticmethod
+    def _result_text(hit) -> str:
+        if hit.kind == "segment":
+            return f"[{hit.label}] {hit.text}"
+        if hit.kind == "memo":
+            return f"{hit.label} {seconds_to_mmss(hit.ref)}  {hit.text}"
+        return hit.label or hit.url
+
+    def _show_results(self) -> None:
+        if self._results_popup is None:
+            self._results_popup = tk.Toplevel(self)
+            self._results_popup.overrideredirect(True)
+            self._results_popup.attributes("-topmost", True)
+            self._results_list = tk.Listbox(
+                self._results_popup, bg="#2B2B2B", fg="#DCE4EE",
+                selectbackground="#1F6AA5", activestyle="none",
+                font=("Arial", 10), width=60, borderwidth=1
+            )
+            self._results_list.pack(fill="both", expand=True)
+            self._results_list.bind("<ButtonRelease-1>", lambda e: self._open_selected())
+            self._results_list.bind("<Return>", lambda e: self._open_selected())
+            self._results_list.bind("<Escape>", lambda e: self._hide_results())
+        self._results_list.delete(0, "end")
+        for hit in self._results:
+            text = self._result_text(hit)
+            if hit.kind != "title":
+                text += f"  \u2014 {self._titles.get(hit.url) or hit.url}"
+            self._results_list.insert("end", text)
+        self._results_list.configure(height=len(self._results))
+        x = self.search_entry.winfo_rootx()
+        y = self.search_entry.winfo_rooty() + self.search_entry.winfo_height()
+        self._results_popup.geometry(f"+{x}+{y}")
+        self._results_popup.deiconify()
+
+    def _hide_results(self) -> None:
+        if self._results_popup is not None:
+            self._results_popup.withdraw()
+
+    def _focus_results(self) -> None:
+        if self._results and self._results_list is not None:
+            self._results_list.focus_set()
+            self._results_list.selection_set(0)
+
+    def _open_selected(self) -> None:
+        selection = self._results_list.curselection()
+        if selection:
+            self._open_result(selection[0])
+
+    def _open_result(self, index: int) -> None:
+        if not (0 <= index < len(self._results)):
+            return
+        hit = self._results[index]
+        self._hide_results()
+        self.url_entry.delete(0, "end")
+        self.url_entry.insert(0, hit.url)
+        self.app.open_search_hit(hit)
+
     def _refresh_history_menu(self) -> None:
         labels = self._history_labels()
         if labels:
@@ -0,0 +1,26 @@
+import time
+
+
+class StartupTrace:
+    """Per-phase wall-clock timings of application startup, printed as a
+    table when enabled (run.py --startup-trace). Disabled traces record
+    nothing."""
+
+    def __init__(self, started: float | None = None, enabled: bool = True):
+        self.enabled = enabled
+        self._started = time.perf_counter() if started is None else started
+        self._marks: list[tuple[str, float]] = []
+
+    def mark(self, phase: str, at: float | None = None) -> None:
+        """Record the end of `phase` (now, or at perf_counter time `at`)."""
+        if self.enabled:
+            self._marks.append((phase, time.perf_counter() if at is None else at))
+
+    def report(self) -> None:
+        if not self.enabled:
+            return
+        previous = self._started
+        for phase, at in self._marks:
+            print(f"[startup] {phase:24s} {(at - previous) * 1000:8.1f} ms"
+                  f"   total {(at - self._started) * 1000:8.1f} ms")
+            previous = at